@@ -9,9 +9,14 @@ Run with: uvicorn main:app --reload
 
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
+import anyio
 from pydantic import BaseModel, Field
 from typing import Optional, List
+import asyncio
+import json
 import os
+import uuid
 from pathlib import Path
 from dotenv import load_dotenv
 
@@ -21,8 +26,13 @@ load_dotenv(root_dir / '.env')
 
 # Import our AI services
 from services.matcher import SemanticMatcher
+from services.vector_index import index_path_for
 from services.moderator import ContentModerator
-from services.chat import ChatAssistant
+from services.chat import ChatAssistant, OpenRouterClient
+from services.context_window import ContextWindow
+from services.outbound import OutboundError
+from services.inference_pool import InferencePool, PoolSaturatedError
+from services.session_store import MemorySessionStore, SQLiteSessionStore
 
 # Initialize app
 app = FastAPI(
@@ -49,6 +59,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Session-Id"],  # session id of /api/chat/stream
 )
 
 
@@ -60,12 +71,90 @@ matcher: Optional[SemanticMatcher] = None
 moderator: Optional[ContentModerator] = None
 
 # Paths to trained models (configurable via env for container deployments)
+# Embedding store directory (memory-mapped, shared between workers)
 EMBEDDINGS_PATH = Path(
-    os.getenv("EMBEDDINGS_PATH", "../data/processed/mentor_embeddings.pkl")
+    os.getenv("EMBEDDINGS_PATH", "../data/processed/mentor_embeddings")
 )
+# Legacy pickle, used until it is converted with scripts/convert_embeddings.py
+LEGACY_EMBEDDINGS_PATH = EMBEDDINGS_PATH.with_suffix('.pkl')
 MODERATOR_PATH = Path(
     os.getenv("MODERATOR_PATH", "../models/moderator.pkl")
 )
+# Optional ANN index built by the embedding scripts (brute-force search if missing)
+INDEX_PATH = Path(
+    os.getenv("INDEX_PATH", str(index_path_for(EMBEDDINGS_PATH)))
+)
+# Override the IVF index's n_probe per deployment (recall vs speed)
+IVF_N_PROBE = os.getenv("MATCHER_IVF_NPROBE")
+# Micro-batching of concurrent query encodes (max size 1 disables it)
+BATCH_MAX_SIZE = int(os.getenv("MATCHER_BATCH_MAX_SIZE", "32"))
+BATCH_WAIT_MS = float(os.getenv("MATCHER_BATCH_WAIT_MS", "5"))
+# LRU cache of query embeddings (size 0 disables it)
+QUERY_CACHE_SIZE = int(os.getenv("QUERY_CACHE_SIZE", "1024"))
+QUERY_CACHE_TTL = float(os.getenv("QUERY_CACHE_TTL", "3600"))
+# Threads for model calls, and how many more calls may queue before /api/match
+# and /api/moderate answer 503. Pool threads mostly wait on the batching
+# encoder, so keep INFERENCE_WORKERS >= MATCHER_BATCH_MAX_SIZE to fill batches.
+INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", "32"))
+INFERENCE_QUEUE_DEPTH = int(os.getenv("INFERENCE_QUEUE_DEPTH", "64"))
+
+# Model calls run here, off the event loop, so /api/health stays responsive
+inference_pool = InferencePool(INFERENCE_WORKERS, INFERENCE_QUEUE_DEPTH)
+
+# OpenRouter calls share one keep-alive connection pool and one rate limit
+# per worker (OPENROUTER_RPS=0 disables the limit)
+OPENROUTER_API_URL = os.getenv("OPENROUTER_API_URL")
+OPENROUTER_TIMEOUT = float(os.getenv("OPENROUTER_TIMEOUT", "30"))
+OPENROUTER_CONNECT_TIMEOUT = float(os.getenv("OPENROUTER_CONNECT_TIMEOUT", "5"))
+OPENROUTER_MAX_CONNECTIONS = int(os.getenv("OPENROUTER_MAX_CONNECTIONS", "100"))
+OPENROUTER_RPS = float(os.getenv("OPENROUTER_RPS", "10"))
+# Calls in flight per worker (more wait up to 5s, then get 503), retries with
+# backoff, and the circuit breaker that fails chats fast while OpenRouter is down
+OPENROUTER_MAX_CONCURRENCY = int(os.getenv("OPENROUTER_MAX_CONCURRENCY", "64"))
+OPENROUTER_MAX_RETRIES = int(os.getenv("OPENROUTER_MAX_RETRIES", "3"))
+OPENROUTER_BREAKER_FAILURES = int(os.getenv("OPENROUTER_BREAKER_FAILURES", "5"))
+OPENROUTER_BREAKER_RESET = float(os.getenv("OPENROUTER_BREAKER_RESET", "30"))
+
+openrouter = OpenRouterClient(
+    api_url=OPENROUTER_API_URL,
+    timeout=OPENROUTER_TIMEOUT,
+    connect_timeout=OPENROUTER_CONNECT_TIMEOUT,
+    max_connections=OPENROUTER_MAX_CONNECTIONS,
+    requests_per_second=OPENROUTER_RPS,
+    max_concurrency=OPENROUTER_MAX_CONCURRENCY,
+    max_retries=OPENROUTER_MAX_RETRIES,
+    failure_threshold=OPENROUTER_BREAKER_FAILURES,
+    reset_timeout=OPENROUTER_BREAKER_RESET
+)
+
+# Prompt token budget per chat turn (0 sends the whole conversation). Older
+# turns of session conversations are folded into a rolling summary, or just
+# dropped with CHAT_CONTEXT_SUMMARIZE=0. History sent by the client always
+# just drops them: the summary would never reach the client, so every later
+# turn would pay for another summary call.
+CHAT_CONTEXT_TOKENS = int(os.getenv("CHAT_CONTEXT_TOKENS", "1500"))
+CHAT_CONTEXT_SUMMARIZE = os.getenv("CHAT_CONTEXT_SUMMARIZE", "1") != "0"
+
+chat_context = (
+    ContextWindow(max_tokens=CHAT_CONTEXT_TOKENS, summarize=CHAT_CONTEXT_SUMMARIZE)
+    if CHAT_CONTEXT_TOKENS > 0 else None
+)
+chat_window = (
+    ContextWindow(max_tokens=CHAT_CONTEXT_TOKENS, summarize=False)
+    if CHAT_CONTEXT_TOKENS > 0 else None
+)
+
+# Server-side chat history, so clients only send the new message. In memory
+# per worker by default; set CHAT_SESSION_DB to share a SQLite file between workers.
+CHAT_SESSION_DB = os.getenv("CHAT_SESSION_DB")
+CHAT_SESSION_MAX = int(os.getenv("CHAT_SESSION_MAX", "10000"))
+CHAT_SESSION_TTL = float(os.getenv("CHAT_SESSION_TTL", "7200"))
+CHAT_SESSION_MAX_MESSAGES = int(os.getenv("CHAT_SESSION_MAX_MESSAGES", "40"))
+
+if CHAT_SESSION_DB:
+    chat_sessions = SQLiteSessionStore(CHAT_SESSION_DB, CHAT_SESSION_MAX, CHAT_SESSION_TTL, CHAT_SESSION_MAX_MESSAGES)
+else:
+    chat_sessions = MemorySessionStore(CHAT_SESSION_MAX, CHAT_SESSION_TTL, CHAT_SESSION_MAX_MESSAGES)
 
 
 @app.on_event("startup")
@@ -79,10 +168,32 @@ async def load_models():
 
     # Load semantic matcher
     try:
-        matcher = SemanticMatcher()
-        if EMBEDDINGS_PATH.exists():
-            print(f"Loading embeddings from {EMBEDDINGS_PATH}")
-            matcher.load_embeddings(str(EMBEDDINGS_PATH))
+        matcher = SemanticMatcher(
+            query_cache_size=QUERY_CACHE_SIZE,
+            query_cache_ttl=QUERY_CACHE_TTL
+        )
+        if BATCH_MAX_SIZE > 1:
+            matcher.enable_batching(BATCH_MAX_SIZE, BATCH_WAIT_MS)
+        embeddings_path = EMBEDDINGS_PATH
+        if not embeddings_path.exists() and LEGACY_EMBEDDINGS_PATH.exists():
+            print(f"Note: Using legacy {LEGACY_EMBEDDINGS_PATH}")
+            print("  Run scripts/convert_embeddings.py for faster, shared-memory startup.")
+            embeddings_path = LEGACY_EMBEDDINGS_PATH
+
+        if embeddings_path.exists():
+            print(f"Loading embeddings from {embeddings_path}")
+            matcher.load_embeddings(str(embeddings_path))
+            if INDEX_PATH.exists():
+                try:
+                    matcher.load_index(str(INDEX_PATH))
+                except Exception as e:
+                    print(f"Warning: Failed to load index, using brute-force search: {e}")
+                if IVF_N_PROBE and matcher.index.kind == 'ivf':
+                    try:
+                        matcher.index.n_probe = int(IVF_N_PROBE)
+                        print(f"  IVF n_probe set to {matcher.index.n_probe}")
+                    except ValueError as e:
+                        print(f"Warning: Ignoring MATCHER_IVF_NPROBE={IVF_N_PROBE}: {e}")
         else:
             print(f"Warning: Embeddings not found at {EMBEDDINGS_PATH}")
             print("  Matching will not work until you generate embeddings.")
@@ -105,12 +216,25 @@ async def load_models():
         print(f"Warning: Failed to load moderator: {e}")
         moderator = ContentModerator()  # Use untrained moderator
 
+    # Moderate every mentor post once up front; risky posts are then
+    # excluded inside the similarity search instead of per request
+    if matcher is not None and matcher.mentor_posts is not None:
+        matcher.set_moderator(moderator)
+
     print("="*60)
     print(f"Matcher loaded: {matcher is not None and matcher.mentor_embeddings is not None}")
     print(f"Moderator loaded: {moderator is not None and moderator.is_trained}")
     print("="*60 + "\n")
 
 
+@app.on_event("shutdown")
+async def shutdown_pool():
+    """Stop inference threads and close API connections when the server stops."""
+    inference_pool.shutdown()
+    await openrouter.aclose()
+    chat_sessions.close()
+
+
 # ============================================================================
 # API MODELS
 # ============================================================================
@@ -138,12 +262,19 @@ class ChatMessage(BaseModel):
 
 class ChatRequest(BaseModel):
     message: str = Field(..., min_length=1, max_length=1000)
-    conversation_history: Optional[List[ChatMessage]] = None
+    session_id: Optional[str] = Field(
+        None, min_length=8, max_length=64, pattern="^[A-Za-z0-9_-]+$",
+        description="Continue a server-side conversation (returned by the first reply)"
+    )
+    conversation_history: Optional[List[ChatMessage]] = Field(
+        None, description="Full history, for clients without a session (used for this turn, never saved over a stored one)"
+    )
 
 
 class ChatResponse(BaseModel):
     response: str
     should_show_stories: bool = False
+    session_id: Optional[str] = None
 
 
 class HealthResponse(BaseModel):
@@ -168,6 +299,37 @@ async def health_check():
     }
 
 
+def _server_busy() -> HTTPException:
+    """Backpressure response when the inference pool is full."""
+    return HTTPException(
+        status_code=503,
+        detail="Server busy. Please retry shortly.",
+        headers={"Retry-After": "1"}
+    )
+
+
+def _match_posts(user_text: str, top_k: int, min_similarity: float) -> list[dict]:
+    """
+    Model-bound part of /api/match: crisis check, then the matcher's search
+    (which already skips risky posts). Runs on an inference pool thread.
+    """
+    # Step 1: Check user input with moderator (if available)
+    if moderator is not None and moderator.is_trained:
+        mod_result = moderator.predict(user_text)
+        # High risk = crisis detected
+        if mod_result['is_risky'] and mod_result['risk_score'] > 0.8:
+            # Still return matches, but could add crisis resources here
+            pass
+
+    # Step 2: Find matching mentor stories (risky posts were filtered out
+    # ahead of time, see matcher.set_moderator)
+    return matcher.match(
+        user_text,
+        top_k=top_k,
+        min_similarity=min_similarity
+    )
+
+
 @app.post("/api/match")
 async def match_to_mentors(request: MatchRequest):
     """
@@ -177,9 +339,9 @@ async def match_to_mentors(request: MatchRequest):
 
     Flow:
     1. Check user input with moderator (crisis detection)
-    2. Find matching mentor stories using semantic similarity
-    3. Filter matches through moderator (safety check)
-    4. Return ranked, filtered results as array of MatchedStory objects
+    2. Find matching mentor stories using semantic similarity, skipping
+       posts the moderator flagged (precomputed at startup)
+    3. Return ranked, filtered results as array of MatchedStory objects
     """
     if matcher is None or matcher.mentor_embeddings is None:
         raise HTTPException(
@@ -187,35 +349,18 @@ async def match_to_mentors(request: MatchRequest):
             detail="Matcher not loaded. Please generate embeddings first."
         )
 
-    # Step 1: Check user input with moderator (if available)
-    if moderator is not None and moderator.is_trained:
-        mod_result = moderator.predict(request.user_text)
-        # High risk = crisis detected
-        if mod_result['is_risky'] and mod_result['risk_score'] > 0.8:
-            # Still return matches, but could add crisis resources here
-            pass
-
-    # Step 2: Find matching mentor stories
     try:
-        matches = matcher.match(
+        matches = await inference_pool.run(
+            _match_posts,
             request.user_text,
-            top_k=request.top_k,
-            min_similarity=request.min_similarity
+            request.top_k,
+            request.min_similarity
         )
+    except PoolSaturatedError:
+        raise _server_busy()
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Matching failed: {str(e)}")
 
-    # Step 3: Filter matches through moderator (if available)
-    if moderator is not None and moderator.is_trained:
-        safe_matches = []
-        for match in matches:
-            content = match.get('content', '')
-            mod_result = moderator.predict(content)
-            if not mod_result['is_risky']:
-                safe_matches.append(match)
-            # If risky, skip this mentor post
-        matches = safe_matches
-
     # Return array directly (frontend expects List[MatchedStory])
     return matches
 
@@ -237,7 +382,10 @@ async def moderate_content(request: ModerateRequest):
             confidence=0.5
         )
 
-    result = moderator.predict(request.text)
+    try:
+        result = await inference_pool.run(moderator.predict, request.text)
+    except PoolSaturatedError:
+        raise _server_busy()
     return ModerateResponse(**result)
 
 
@@ -260,6 +408,110 @@ I'm here to understand, not to judge. When you're ready, I'll help you find stor
     }
 
 
+async def _chat_assistant(request: ChatRequest) -> tuple[ChatAssistant, str, bool]:
+    """
+    Chat assistant for this request, its session id, and whether to save
+    the conversation under that id after the reply.
+
+    Only ids the store already knows are reused; an unknown or expired id
+    gets a fresh server-issued one, so clients cannot pick (or guess)
+    session ids. History comes from the request if the client sent it,
+    otherwise from the session; client-sent history is never written
+    over an existing session.
+    """
+    stored = None
+    if request.session_id:
+        # SQLite lookups block, so keep them off the event loop
+        stored = await asyncio.to_thread(chat_sessions.get, request.session_id)
+    session_id = request.session_id if stored is not None else uuid.uuid4().hex
+
+    # If conversation history provided, use it (sliding window only, see chat_window)
+    if request.conversation_history is not None:
+        # Share the worker's connection pool and rate limiter
+        chat = ChatAssistant(client=openrouter, context=chat_window)
+        # Convert Pydantic models to dict for ChatAssistant
+        chat.conversation_history = [
+            {"role": msg.role, "content": msg.content}
+            for msg in request.conversation_history
+        ]
+        return chat, session_id, stored is None
+    # Session history: a rolling summary is saved with it
+    chat = ChatAssistant(client=openrouter, context=chat_context)
+    chat.conversation_history = stored or []
+    return chat, session_id, True
+
+
+async def _save_session(session_id: str, chat: ChatAssistant, save: bool):
+    if save:
+        await asyncio.to_thread(chat_sessions.save, session_id, chat.conversation_history)
+
+
+def _should_show_stories(history_length: int) -> bool:
+    # Count messages from conversation history (before this turn)
+    user_message_count = history_length
+    # Add 1 for the current message
+    user_message_count += 1
+
+    # After 2-3 user messages, signal frontend to show stories
+    return user_message_count >= 2
+
+
+def _log_chat_error(e: Exception):
+    # Debug logging to see actual error
+    import traceback
+    print(f"\n{'='*60}")
+    print("CHAT ERROR DEBUG")
+    print(f"{'='*60}")
+    print(f"Error type: {type(e).__name__}")
+    print(f"Error message: {str(e)}")
+    print(f"\nFull traceback:")
+    traceback.print_exc()
+    print(f"{'='*60}\n")
+
+
+def _chat_failed(e: Exception) -> HTTPException:
+    if isinstance(e, OutboundError):
+        # Refused before reaching OpenRouter (circuit open or too many calls): no traceback
+        print(f"Chat unavailable: {e}")
+        return HTTPException(
+            status_code=503,
+            detail="Chat is temporarily unavailable. Please retry shortly.",
+            headers={"Retry-After": str(int(e.retry_after + 0.5))}
+        )
+    _log_chat_error(e)
+    return HTTPException(
+        status_code=500,
+        detail=f"Chat failed: {str(e)}. Make sure OPENROUTER_API_KEY is set in .env"
+    )
+
+
+def _sse(data: dict, event: Optional[str] = None) -> str:
+    """One Server-Sent Events message."""
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data)}\n\n"
+
+
+async def _close_stream(tokens):
+    """Close a chat token stream, releasing its OpenRouter connection and slot."""
+    # Shielded: on client disconnect Starlette cancels the response's task group
+    with anyio.CancelScope(shield=True):
+        await tokens.aclose()
+
+
+class _ChatStreamResponse(StreamingResponse):
+    """StreamingResponse that closes the token stream even if the body never started."""
+
+    def __init__(self, content, tokens, **kwargs):
+        super().__init__(content, **kwargs)
+        self.tokens = tokens
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            await _close_stream(self.tokens)
+
+
 @app.post("/api/chat", response_model=ChatResponse)
 async def chat_assistance(request: ChatRequest):
     """
@@ -269,47 +521,77 @@ async def chat_assistance(request: ChatRequest):
     Uses Gemini via OpenRouter API (fast, free LLM).
     """
     try:
-        # Create a new chat assistant instance
-        chat = ChatAssistant()
+        chat, session_id, save = await _chat_assistant(request)
+        history_length = len(chat.conversation_history)
 
-        # If conversation history provided, use it
-        if request.conversation_history:
-            # Convert Pydantic models to dict for ChatAssistant
-            chat.conversation_history = [
-                {"role": msg.role, "content": msg.content}
-                for msg in request.conversation_history
-            ]
-
-        # Send message and get response
-        response = chat.send(request.message)
-
-        # Count user messages from conversation history
-        user_message_count = len(request.conversation_history) if request.conversation_history else 0
-        # Add 1 for the current message
-        user_message_count += 1
-
-        # After 2-3 user messages, signal frontend to show stories
-        should_show_stories = user_message_count >= 2
+        # Send message and get response (awaited, so other requests keep running)
+        response = await chat.send_async(request.message)
+        await _save_session(session_id, chat, save)
 
         return ChatResponse(
             response=response,
-            should_show_stories=should_show_stories
+            should_show_stories=_should_show_stories(history_length),
+            session_id=session_id
         )
     except Exception as e:
-        # Debug logging to see actual error
-        import traceback
-        print(f"\n{'='*60}")
-        print("CHAT ERROR DEBUG")
-        print(f"{'='*60}")
-        print(f"Error type: {type(e).__name__}")
-        print(f"Error message: {str(e)}")
-        print(f"\nFull traceback:")
-        traceback.print_exc()
-        print(f"{'='*60}\n")
-        raise HTTPException(
-            status_code=500,
-            detail=f"Chat failed: {str(e)}. Make sure OPENROUTER_API_KEY is set in .env"
-        )
+        raise _chat_failed(e)
+
+
+@app.post("/api/chat/stream")
+async def chat_stream(request: ChatRequest):
+    """
+    Streaming version of /api/chat, as Server-Sent Events.
+
+    Tokens are forwarded as the model generates them:
+        data: {"delta": "That sounds"}
+        data: {"delta": " really hard."}
+        event: done
+        data: {"response": "That sounds really hard.", "should_show_stories": false, "session_id": "..."}
+
+    The session id is also sent up front in the X-Session-Id header.
+
+    Errors before the first token return a 500 like /api/chat; errors
+    mid-stream end it with an `event: error` message.
+    """
+    try:
+        chat, session_id, save = await _chat_assistant(request)
+        history_length = len(chat.conversation_history)
+        tokens = chat.send_stream(request.message)
+        # Wait for the first token, so a failed API call is still an HTTP error
+        first = await tokens.__anext__()
+    except StopAsyncIteration:
+        first = None
+    except Exception as e:
+        raise _chat_failed(e)
+
+    async def events():
+        try:
+            if first is not None:
+                yield _sse({"delta": first})
+            async for delta in tokens:
+                yield _sse({"delta": delta})
+        except Exception as e:
+            _log_chat_error(e)
+            yield _sse({"detail": f"Chat failed: {str(e)}"}, event="error")
+            return
+        finally:
+            # Release the upstream stream and its OpenRouter slot now, not when
+            # the generator is garbage collected (client gone, error, or cancelled)
+            await _close_stream(tokens)
+        await _save_session(session_id, chat, save)
+        yield _sse({
+            "response": chat.conversation_history[-1]["content"],
+            "should_show_stories": _should_show_stories(history_length),
+            "session_id": session_id
+        }, event="done")
+
+    return _ChatStreamResponse(
+        events(),
+        tokens,
+        media_type="text/event-stream",
+        # Stop proxies (e.g. nginx) from buffering the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no", "X-Session-Id": session_id}
+    )
 
 
 # ============================================================================
@@ -322,12 +604,20 @@ async def get_stats():
     stats = {
         "matcher": {
             "loaded": matcher is not None and matcher.mentor_embeddings is not None,
-            "num_posts": len(matcher.mentor_posts) if matcher and matcher.mentor_posts is not None else 0
+            "num_posts": len(matcher.mentor_posts) if matcher and matcher.mentor_posts is not None else 0,
+            "index": matcher.index.kind if matcher else "none",
+            "batching": matcher.encoder.stats() if matcher and matcher.encoder else None,
+            "query_cache": matcher.query_cache.stats() if matcher else None,
+            "blocked_posts": int((~matcher.safe_mask).sum()) if matcher and matcher.safe_mask is not None else 0
         },
         "moderator": {
             "loaded": moderator is not None and moderator.is_trained,
             "model_type": "logistic_regression" if moderator and moderator.is_trained else "none"
-        }
+        },
+        "inference_pool": inference_pool.stats(),
+        "openrouter": openrouter.stats(),
+        # The SQLite store reads from disk; keep it off the event loop like get/save
+        "chat_sessions": await asyncio.to_thread(chat_sessions.stats)
     }
     return stats
 
@@ -0,0 +1,138 @@
+"""
+Benchmark the IVF approximate index against exact brute-force search.
+
+Reports recall@k (fraction of the exact top-k that IVF also returns) and
+per-query latency for several n_lists / n_probe settings, so each
+deployment can pick its recall/speed trade-off.
+
+Usage:
+    python scripts/benchmark_ann_index.py
+    python scripts/benchmark_ann_index.py --rows 1000000 --queries 200
+    python scripts/benchmark_ann_index.py --embeddings ../data/processed/mentor_embeddings
+"""
+
+import argparse
+import pickle
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from services.embedding_store import is_store, load_store, save_store
+from services.vector_index import (
+    BruteForceIndex,
+    IVFIndex,
+    index_path_for,
+    load_index,
+    normalize_embeddings,
+    save_index,
+)
+
+DIM = 384  # all-MiniLM-L6-v2
+N_PROBES = [1, 4, 8, 16, 32]
+
+
+def synthetic_embeddings(n: int, rng: np.random.Generator, n_topics: int = 1000) -> np.ndarray:
+    """Clustered vectors: real post embeddings group by topic, uniform noise does not."""
+    topics = rng.normal(size=(n_topics, DIM)).astype(np.float32)
+    labels = rng.integers(0, n_topics, size=n)
+    noise = rng.normal(scale=1.5, size=(n, DIM)).astype(np.float32)
+    return normalize_embeddings(topics[labels] + noise)
+
+
+def run_queries(index, queries: np.ndarray, k: int) -> tuple[list, float]:
+    """Search every query; return results and mean latency in ms."""
+    results = []
+    start = time.perf_counter()
+    for q in queries:
+        results.append(index.search(q, k)[0])
+    return results, (time.perf_counter() - start) / len(queries) * 1000
+
+
+def recall_at_k(exact: list, approx: list) -> float:
+    hits = sum(len(np.intersect1d(e, a)) for e, a in zip(exact, approx))
+    return hits / sum(len(e) for e in exact)
+
+
+def check_round_trip(embeddings: np.ndarray, rows: int = 10_000):
+    """
+    Save a store, index the in-memory rows like the generate scripts do,
+    then load both back like main.py. Raises if the index is rejected.
+    """
+    embeddings = np.asarray(embeddings[:rows])
+    with tempfile.TemporaryDirectory() as tmp:
+        store_path = Path(tmp) / 'mentor_embeddings'
+        save_store(store_path, pd.DataFrame({'row': np.arange(len(embeddings))}), embeddings, 'synthetic')
+        index = IVFIndex(n_lists=max(1, int(np.sqrt(len(embeddings))))).build(embeddings)
+        save_index(index, index_path_for(store_path))
+        load_index(index_path_for(store_path), load_store(store_path)[1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark IVF vs exact search')
+    parser.add_argument('--rows', type=int, default=100_000, help='Synthetic corpus size')
+    parser.add_argument('--queries', type=int, default=200, help='Number of queries')
+    parser.add_argument('--k', type=int, default=10, help='Top-k to compare (match() uses top_k * 2)')
+    parser.add_argument('--embeddings', help='Use a real embedding store (or legacy .pkl) instead of synthetic data')
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    if args.embeddings and is_store(args.embeddings):
+        embeddings = load_store(args.embeddings)[1]
+    elif args.embeddings:
+        with open(args.embeddings, 'rb') as f:
+            embeddings = normalize_embeddings(pickle.load(f)['embeddings'])
+    else:
+        embeddings = synthetic_embeddings(args.rows, rng)
+
+    # Queries: perturbed corpus rows, like a user describing a known struggle
+    picks = rng.choice(len(embeddings), args.queries)
+    queries = normalize_embeddings(
+        embeddings[picks] + rng.normal(scale=0.05, size=(args.queries, embeddings.shape[1]))
+    )
+
+    print("=" * 60)
+    print("BENCHMARK: IVF INDEX vs EXACT SEARCH")
+    print("=" * 60)
+    print(f"{len(embeddings):,} posts, {args.queries} queries, recall@{args.k}\n")
+
+    try:
+        check_round_trip(embeddings)
+    except ValueError as e:
+        print(f"Saved index does not load with its store: {e}")
+        sys.exit(1)
+    print("Round trip (save store + index, load both): OK\n")
+
+    exact, exact_ms = run_queries(BruteForceIndex().build(embeddings), queries, args.k)
+    print(f"Exact (brute-force): {exact_ms:.3f} ms/query\n")
+
+    default_lists = max(1, int(np.sqrt(len(embeddings))))
+    for n_lists in sorted({default_lists // 2, default_lists, default_lists * 2} - {0}):
+        start = time.perf_counter()
+        index = IVFIndex(n_lists=n_lists).build(embeddings)
+        build_s = time.perf_counter() - start
+        print(f"IVF n_lists={n_lists} (built in {build_s:.1f}s)")
+        print(f"  {'n_probe':>8} | {'recall':>7} | {'ms/query':>9} | {'speed-up':>8}")
+        for n_probe in N_PROBES:
+            if n_probe > n_lists:
+                continue
+            index.n_probe = n_probe
+            approx, ms = run_queries(index, queries, args.k)
+            print(f"  {n_probe:>8} | {recall_at_k(exact, approx):>7.3f} | "
+                  f"{ms:>9.3f} | {exact_ms / ms:>7.1f}x")
+        print()
+
+    print("=" * 60)
+    print("Set MATCHER_INDEX=ivf, MATCHER_IVF_LISTS and MATCHER_IVF_NPROBE")
+    print("when generating embeddings to use the chosen settings.")
+    print("=" * 60)
+
+
+if __name__ == '__main__':
+    main()
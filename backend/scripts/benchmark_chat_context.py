@@ -0,0 +1,143 @@
+"""
+Benchmark ChatAssistant's context window: prompt tokens per turn.
+
+Runs long synthetic conversations against a local fake completions
+server (scripts/fake_openrouter.py) and counts the prompt tokens of every
+request it receives (estimate_tokens, plus tiktoken's cl100k_base count
+when tiktoken is installed). Summary requests get a reply in the SUMMARY format.
+
+    unbounded   the whole conversation every turn (context=None)
+    sliding     ContextWindow(summarize=False): recent messages only
+    summary     ContextWindow(): older turns folded into a rolling summary
+
+Usage:
+    python scripts/benchmark_chat_context.py
+    python scripts/benchmark_chat_context.py --turns 100 --budget 1000
+"""
+
+import argparse
+import asyncio
+import random
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from services.chat import ChatAssistant, OpenRouterClient
+from services.context_window import ContextWindow, estimate_message_tokens, is_summary
+from fake_openrouter import FakeOpenRouter
+
+try:
+    import tiktoken
+    ENCODING = tiktoken.get_encoding("cl100k_base")
+except ImportError:
+    ENCODING = None
+
+WORDS = ("I feel like nobody at school really notices me and when I try to join in "
+         "the conversation just moves on without me so I end up going home and "
+         "scrolling for hours which makes everything feel worse honestly").split()
+
+REPLY = ("That sounds really isolating, especially when you keep trying and it still "
+         "feels like nobody sees you. What has it been like going home after those days?")
+
+SUMMARY = ("SUMMARY:\n- Main struggle: Feeling invisible and left out at school despite trying to connect\n"
+           "- Key feelings: loneliness, frustration, sadness\n"
+           "- Themes: loneliness, belonging, rejection")
+
+
+def real_tokens(messages: list) -> int:
+    """cl100k_base prompt tokens, counted the same way as the estimate."""
+    return sum(len(ENCODING.encode(m['content'])) + 4 for m in messages) + 3
+
+
+def summarizing(request: dict) -> bool:
+    return request['messages'][-1]['content'] == ChatAssistant.SUMMARY_REQUEST
+
+
+def reply(request: dict) -> str:
+    return SUMMARY if summarizing(request) else REPLY
+
+
+prompts = []  # (is_summary_request, estimated tokens, real tokens or None) per request
+
+
+def record(request: dict):
+    messages = request['messages']
+    prompts.append((
+        summarizing(request),
+        estimate_message_tokens(messages),
+        real_tokens(messages) if ENCODING else None,
+    ))
+
+
+def user_messages(turns: int) -> list:
+    rng = random.Random(0)
+    return [f"({turn + 1}) " + " ".join(rng.choices(WORDS, k=rng.randint(20, 80))) for turn in range(turns)]
+
+
+async def run(server: FakeOpenRouter, context, messages: list) -> tuple:
+    """Prompt tokens of each turn's reply request, plus totals including summary requests."""
+    client = OpenRouterClient(api_url=server.url, requests_per_second=None)
+    chat = ChatAssistant(api_key='test', client=client, context=context)
+    prompts.clear()
+    per_turn = []
+    for message in messages:
+        await chat.send_async(message)
+        per_turn.append(prompts[-1][1])
+    await client.aclose()
+
+    summaries = sum(1 for summarizing, _, _ in prompts if summarizing)
+    total = sum(tokens for _, tokens, _ in prompts)
+    real = sum(tokens for _, _, tokens in prompts) if ENCODING else None
+    summary_kept = bool(chat.conversation_history) and is_summary(chat.conversation_history[0])
+    return per_turn, total, real, summaries, len(chat.conversation_history), summary_kept
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark prompt tokens per chat turn')
+    parser.add_argument('--turns', type=int, default=60, help='User messages per conversation')
+    parser.add_argument('--budget', type=int, default=1500, help='ContextWindow max_tokens')
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("BENCHMARK: CHAT CONTEXT WINDOW")
+    print("=" * 60)
+
+    modes = {
+        'unbounded': None,
+        'sliding': ContextWindow(max_tokens=args.budget, summarize=False),
+        'summary': ContextWindow(max_tokens=args.budget),
+    }
+    messages = user_messages(args.turns)
+    with FakeOpenRouter(reply=reply) as server:
+        server.on_request = record
+        results = {name: asyncio.run(run(server, context, messages)) for name, context in modes.items()}
+
+    print(f"\n{args.turns} turns, budget {args.budget} tokens; prompt tokens (estimated) of each reply request\n")
+    print(f"{'turn':>5} | " + " | ".join(f"{name:>9}" for name in modes))
+    print("-" * 40)
+    shown = sorted({1, 2, 5, 10, 15, 20, 30, 40, 50, args.turns} & set(range(1, args.turns + 1)))
+    for turn in shown:
+        print(f"{turn:>5} | " + " | ".join(f"{results[name][0][turn - 1]:>9,}" for name in modes))
+
+    print(f"\n{'mode':>9} | {'max/turn':>8} | {'total (incl. summaries)':>23} | {'summary calls':>13} | "
+          f"{'history':>7} | cl100k total")
+    print("-" * 90)
+    ok = True
+    for name in modes:
+        per_turn, total, real, summaries, history, summary_kept = results[name]
+        real_text = f"{real:,}" if real is not None else "n/a (no tiktoken)"
+        print(f"{name:>9} | {max(per_turn):>8,} | {total:>23,} | {summaries:>13} | {history:>7} | {real_text}")
+        if modes[name] is not None:
+            ok &= max(per_turn) <= args.budget
+    ok &= results['summary'][5]
+
+    print("\n" + "=" * 60)
+    print("ALL TURNS WITHIN BUDGET" if ok else "FAILED")
+    print("=" * 60)
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
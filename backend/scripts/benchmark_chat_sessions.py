@@ -0,0 +1,216 @@
+"""
+Benchmark the chat session store.
+
+1. Request payload per turn over a long conversation: the whole
+   conversation_history every turn vs a session id plus the new message,
+   and the time to parse and validate each (ChatRequest when the backend
+   imports, JSON parsing only otherwise)
+2. get/save latency for MemorySessionStore and SQLiteSessionStore with
+   --sessions conversations stored, plus the limits: messages per
+   conversation, LRU eviction and TTL expiry
+3. SQLite sharing: a conversation saved by one process is read by another
+4. /api/chat with session ids through a real uvicorn server against the
+   fake OpenRouter endpoint of fake_openrouter.py (skipped if the
+   backend's model dependencies aren't installed)
+
+Usage:
+    python scripts/benchmark_chat_sessions.py
+    python scripts/benchmark_chat_sessions.py --turns 40 --sessions 50000
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from pathlib import Path
+
+import httpx
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from services.session_store import MemorySessionStore, SQLiteSessionStore
+from fake_openrouter import FakeOpenRouter, free_port
+
+
+def conversation(turns: int) -> list:
+    """A synthetic chat: ~60-word user messages, ~40-word replies."""
+    messages = []
+    for turn in range(turns):
+        messages.append({"role": "user", "content": f"Turn {turn}: " + "I keep feeling left out at school " * 8})
+        messages.append({"role": "assistant", "content": "That sounds really isolating. " * 8})
+    return messages
+
+
+def validator():
+    """Parse + validate a request body the way /api/chat does, if the backend imports."""
+    try:
+        from main import ChatRequest
+        return 'ChatRequest', ChatRequest.model_validate_json
+    except ImportError:
+        return 'json.loads', json.loads
+
+
+def bench_payloads(turns: int):
+    name, validate = validator()
+    history = conversation(turns)
+    session_id = uuid.uuid4().hex
+    print(f"{'turn':>5} | {'full history':>13} | {'session id':>10} | {'validate full':>13} | {'validate session':>16}")
+    print("-" * 70)
+    totals = [0, 0]
+    for turn in range(turns):
+        message = history[2 * turn]["content"]
+        full = json.dumps({"message": message, "conversation_history": history[:2 * turn]}).encode()
+        session = json.dumps({"message": message, "session_id": session_id}).encode()
+        totals[0] += len(full)
+        totals[1] += len(session)
+        if turn in (0, 4, 9, 19, 39, turns - 1):
+            timings = []
+            for body in (full, session):
+                start = time.perf_counter()
+                for _ in range(200):
+                    validate(body)
+                timings.append((time.perf_counter() - start) / 200 * 1e6)
+            print(f"{turn + 1:>5} | {len(full):>11,} B | {len(session):>8,} B | "
+                  f"{timings[0]:>10.1f} µs | {timings[1]:>13.1f} µs")
+    print(f"total over {turns} turns: {totals[0] / 1024:,.0f} KB vs {totals[1] / 1024:,.0f} KB uploaded "
+          f"(validation: {name})")
+
+
+def bench_store(store, n_sessions: int, label: str):
+    history = conversation(10)
+    ids = [uuid.uuid4().hex for _ in range(n_sessions)]
+    start = time.perf_counter()
+    for session_id in ids:
+        store.save(session_id, history)
+    save_us = (time.perf_counter() - start) / n_sessions * 1e6
+
+    sample = ids[::max(1, n_sessions // 5000)]
+    start = time.perf_counter()
+    found = sum(store.get(session_id) is not None for session_id in sample)
+    get_us = (time.perf_counter() - start) / len(sample) * 1e6
+    print(f"{label:>8} | {n_sessions:>9,} | {save_us:>9.1f} µs | {get_us:>8.1f} µs | {found == len(sample)}")
+
+
+def check_limits(make_store, label: str) -> bool:
+    store = make_store(max_sessions=3, ttl_seconds=0.2, max_messages=4)
+    store.save('a' * 8, conversation(5))
+    kept = store.get('a' * 8)
+    bounded = kept == conversation(5)[-4:]
+    for key in 'bcd':
+        store.save(key * 8, conversation(1))
+    if isinstance(store, SQLiteSessionStore):
+        store._prune()
+    evicted = store.get('a' * 8) is None and store.get('d' * 8) is not None
+    time.sleep(0.3)
+    expired = store.get('d' * 8) is None
+    store.close()
+    print(f"  {label}: last 4 of 10 messages kept: {bounded}, LRU evicted: {evicted}, expired after TTL: {expired}")
+    return bounded and evicted and expired
+
+
+def check_sqlite_shared(path: str) -> bool:
+    """Save in a child process, read here."""
+    session_id = uuid.uuid4().hex
+    code = (f"import sys; sys.path.insert(0, {str(Path(__file__).parent.parent)!r}); "
+            f"from services.session_store import SQLiteSessionStore; "
+            f"SQLiteSessionStore({path!r}).save({session_id!r}, [{{'role': 'user', 'content': 'hi'}}])")
+    subprocess.run([sys.executable, '-c', code], check=True)
+    store = SQLiteSessionStore(path)
+    shared = store.get(session_id) == [{'role': 'user', 'content': 'hi'}]
+    store.close()
+    print(f"  saved in another process, read here: {shared}")
+    return shared
+
+
+def check_endpoint() -> bool:
+    """Needs OPENROUTER_API_URL pointing at the fake before main is first imported."""
+    try:
+        import uvicorn
+        import main
+    except ImportError as e:
+        print(f"  skipped: backend dependencies not installed ({e})")
+        return True
+
+    port = free_port()
+    uv = uvicorn.Server(uvicorn.Config(main.app, host='127.0.0.1', port=port, log_level='warning'))
+    threading.Thread(target=uv.run, daemon=True).start()
+    while not uv.started:
+        time.sleep(0.05)
+    try:
+        url = f"http://127.0.0.1:{port}/api/chat"
+        first = httpx.post(url, json={"message": "I feel lonely"}, timeout=30).json()
+        second = httpx.post(url, json={"message": "Nobody talks to me",
+                                       "session_id": first["session_id"]}, timeout=30).json()
+        stored = main.chat_sessions.get(first["session_id"])
+        # A client-chosen id is replaced; history sent with a known id is not saved over it
+        chosen = httpx.post(url, json={"message": "hi", "session_id": "chosen-by-client"}, timeout=30).json()
+        httpx.post(url, json={"message": "hi", "session_id": first["session_id"],
+                              "conversation_history": []}, timeout=30)
+        kept = main.chat_sessions.get(first["session_id"])
+        chosen_stored = main.chat_sessions.get("chosen-by-client")
+    finally:
+        uv.should_exit = True
+
+    # The fake replies "... (turn N)" for the Nth user message it sees
+    ok = (second["session_id"] == first["session_id"] and second["response"].endswith("(turn 2)")
+          and not first["should_show_stories"] and second["should_show_stories"] and len(stored) == 4)
+    print(f"  second turn sent only the session id; the model saw both turns, "
+          f"4 messages stored, should_show_stories on turn 2: {ok}")
+    fixed = chosen["session_id"] != "chosen-by-client" and chosen_stored is None and kept == stored
+    print(f"  unknown id replaced by a server-issued one, sent history not saved over the session: {fixed}")
+    return ok and fixed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the chat session store')
+    parser.add_argument('--turns', type=int, default=40, help='Turns in the synthetic conversation')
+    parser.add_argument('--sessions', type=int, default=20000, help='Conversations stored for get/save timing')
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("BENCHMARK: CHAT SESSIONS")
+    print("=" * 60)
+
+    # Before anything imports main, so its OpenRouter client uses the fake
+    fake = FakeOpenRouter().__enter__()
+    os.environ['OPENROUTER_API_URL'] = fake.url
+    os.environ.setdefault('OPENROUTER_API_KEY', 'test')
+
+    print("\nRequest payload per turn\n")
+    bench_payloads(args.turns)
+
+    ok = True
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"\nStore operations (10-turn conversations)\n")
+        print(f"{'backend':>8} | {'sessions':>9} | {'save':>12} | {'get':>11} | all found")
+        print("-" * 60)
+        bench_store(MemorySessionStore(max_sessions=args.sessions), args.sessions, 'memory')
+        sqlite = SQLiteSessionStore(os.path.join(tmp, 'bench.sqlite'), max_sessions=args.sessions)
+        bench_store(sqlite, args.sessions, 'sqlite')
+        sqlite.close()
+
+        print("\nLimits (max 3 sessions, 4 messages, 0.2s TTL)")
+        ok &= check_limits(MemorySessionStore, 'memory')
+        ok &= check_limits(lambda **kw: SQLiteSessionStore(os.path.join(tmp, 'limits.sqlite'), **kw), 'sqlite')
+
+        print("\nSQLite shared between processes")
+        ok &= check_sqlite_shared(os.path.join(tmp, 'shared.sqlite'))
+
+    print("\n/api/chat with a session id")
+    ok &= check_endpoint()
+    fake.__exit__(None, None, None)
+
+    print("\n" + "=" * 60)
+    print("ALL PASSED" if ok else "FAILED")
+    print("=" * 60)
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
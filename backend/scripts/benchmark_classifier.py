@@ -0,0 +1,177 @@
+"""
+Benchmark ClassifierService.classify.
+
+Checks that classify() returns exactly the same result as the old
+implementation (one re.search per pattern, pattern lists rebuilt on
+every call), then compares throughput in messages/sec.
+
+Usage:
+    python scripts/benchmark_classifier.py
+    python scripts/benchmark_classifier.py --messages 200000
+"""
+
+import argparse
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from services.classifier import ClassifierService
+
+# Fragments that trigger the rules, including overlapping ones
+# ('hate my body' / 'hate', 'game is rigged' / 'game changer', ...)
+TRIGGERS = [
+    "agree?", "Thoughts ?", "I'm humbled", "i am BLESSED", "thought leader", "game-changer",
+    "gamechanger", "excited to share", "dream job", "🚀", "🙏✨", "hate my body", "so ugly",
+    "too fat", "skipped lunch", "skipping meals", "need to lose", "wish i looked", "count calories",
+    "fasting", "starving", "women only want", "girls only want", "game is rigged",
+    "the system is rigged", "blackpill", "chad", "chads", "normie", "they reject", "everyone reject",
+    "it's over", "its over", "its overrated", "hate", "stupid", "idiot", "loser", "pathetic",
+    "kill", "die", "death", "deathly", "hate my looks", "thoughts leader", "agree thought leader",
+    "so so fat", "İ'm humbled", "ＡＧＲＥＥ",
+]
+FILLER = [
+    "i", "went", "to", "the", "gym", "today", "and", "honestly", "it", "was", "fine", "lol",
+    "my", "friends", "never", "text", "back", "work", "is", "busy", "weekend", "plans", "?", "!",
+    "École", "naïve", "😢",
+]
+
+
+def random_message(rng: random.Random, trigger_rate: float = 0.1) -> str:
+    words = []
+    for _ in range(rng.randint(0, 40)):
+        pool = TRIGGERS if rng.random() < trigger_rate else FILLER
+        words.append(rng.choice(pool))
+    return rng.choice([" ", "", "  "]).join(words)
+
+
+def legacy_classify(classifier: ClassifierService, text: str) -> dict:
+    """The original classify(): pattern lists rebuilt and searched one by one."""
+    text_lower = text.lower()
+    scores = {cat: 0.0 for cat in classifier.categories}
+    indicators = []
+
+    linkedin_patterns = [
+        (r'agree\s*\??', 'agree?'),
+        (r'thoughts\s*\??', 'thoughts?'),
+        (r"i('m| am) (humbled|honored|blessed|grateful)", 'humbled/grateful'),
+        (r'thought leader', 'thought leader'),
+        (r'game.?changer', 'game-changer'),
+        (r'excited to (announce|share)', 'excited to announce'),
+        (r'dream job', 'dream job'),
+    ]
+    for pattern, indicator in linkedin_patterns:
+        if re.search(pattern, text_lower):
+            scores["linkedin_lunatic"] += 0.2
+            indicators.append(indicator)
+
+    if re.search(r'🚀|💪|🙏|✨|🔥|💡|🎯', text):
+        scores["linkedin_lunatic"] += 0.15
+        indicators.append("professional emojis")
+
+    body_patterns = [
+        (r'hate my (body|face|looks)', 'negative body talk'),
+        (r'(too|so) (fat|skinny|ugly)', 'negative self-description'),
+        (r'(skipped?|skip(ping)?) (lunch|dinner|breakfast|meals?)', 'meal skipping'),
+        (r'need to lose', 'weight loss focus'),
+        (r'wish i (looked|was|could be)', 'appearance comparison'),
+        (r'(counting|count) calories', 'calorie counting'),
+        (r'(fasting|starving)', 'fasting mention'),
+    ]
+    for pattern, indicator in body_patterns:
+        if re.search(pattern, text_lower):
+            scores["body_dysmorphia"] += 0.25
+            indicators.append(indicator)
+
+    incel_patterns = [
+        (r'(women|females?|girls?) only want', 'gender generalization'),
+        (r'(society|system|game) is rigged', 'system rigged'),
+        (r'blackpill', 'blackpill'),
+        (r'\bchad\b', 'chad reference'),
+        (r'normie', 'normie'),
+        (r'(everyone|they) reject', 'rejection focus'),
+        (r"it'?s over\b", "it's over"),
+    ]
+    for pattern, indicator in incel_patterns:
+        if re.search(pattern, text_lower):
+            scores["incel"] += 0.25
+            indicators.append(indicator)
+
+    toxic_patterns = [
+        (r'\b(hate|stupid|idiot|loser|pathetic)\b', 'toxic language'),
+        (r'\b(kill|die|death)\b', 'violent language'),
+    ]
+    for pattern, indicator in toxic_patterns:
+        if re.search(pattern, text_lower):
+            scores["toxic"] += 0.15
+            indicators.append(indicator)
+
+    total = sum(scores.values())
+    if total > 0:
+        scores = {k: min(v / max(total, 1), 1.0) for k, v in scores.items()}
+    else:
+        scores["normal"] = 1.0
+
+    primary_category = max(scores, key=scores.get)
+    confidence = scores[primary_category]
+
+    if confidence < 0.3:
+        primary_category = "normal"
+        confidence = 1.0 - sum(v for k, v in scores.items() if k != "normal")
+        scores["normal"] = confidence
+
+    return {
+        "text": text,
+        "category": primary_category,
+        "confidence": round(confidence, 3),
+        "indicators": indicators,
+        "scores": {k: round(v, 3) for k, v in scores.items()}
+    }
+
+
+def throughput(fn, messages: list) -> float:
+    start = time.perf_counter()
+    for message in messages:
+        fn(message)
+    return len(messages) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark ClassifierService.classify')
+    parser.add_argument('--messages', type=int, default=100_000, help='Messages per run')
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    classifier = ClassifierService()
+
+    print("=" * 60)
+    print("BENCHMARK: CLASSIFIER")
+    print("=" * 60)
+
+    # Parity: identical dicts, including indicator order and float scores
+    parity = [""] + TRIGGERS + [" ".join(TRIGGERS)] + [random_message(rng, 0.5) for _ in range(50_000)]
+    for message in parity:
+        expected = legacy_classify(classifier, message)
+        actual = classifier.classify(message)
+        assert actual == expected, f"{message!r}\n  expected {expected}\n  actual   {actual}"
+    print(f"\nParity: {len(parity):,} messages, identical results")
+
+    print(f"\n{'trigger rate':>12} | {'before':>14} | {'after':>14} | {'speed-up':>8}")
+    print("-" * 58)
+    for rate in [0.0, 0.1, 0.5]:
+        messages = [random_message(rng, rate) for _ in range(args.messages)]
+        old = throughput(lambda m: legacy_classify(classifier, m), messages)
+        new = throughput(classifier.classify, messages)
+        print(f"{rate:>12.1f} | {old:>8,.0f} msg/s | {new:>8,.0f} msg/s | {new / old:>7.1f}x")
+
+    print("\n" + "=" * 60)
+    print("BENCHMARK COMPLETE")
+    print("=" * 60)
+
+
+if __name__ == '__main__':
+    main()
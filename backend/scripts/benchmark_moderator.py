@@ -0,0 +1,141 @@
+"""
+Benchmark ContentModerator feature extraction and batch prediction.
+
+1. Checks that extract_features_batch() gives exactly the same values as
+   calling extract_features() per text (the old batch path), then
+   compares throughput in texts/sec.
+2. Checks that predict_batch() returns the same dicts as predict() per
+   text, then compares throughput at several batch sizes.
+
+Usage:
+    python scripts/benchmark_moderator.py
+    python scripts/benchmark_moderator.py --texts 200000
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from services.moderator import ContentModerator
+
+WORDS = [
+    "i", "feel", "SO", "lonely", "today", "Nobody", "gets", "it", "WHY", "help",
+    "école", "naïve", "ÅNGST", "straße", "İstanbul", "😢", "🙏", "123", "ǅ", "Ⅻ",
+]
+PUNCTUATION = ["", "", "", ".", "!", "?", "...", "!!", "?!", " . ", "\n", "\t", "\x1c", "\u2028", "\x85", "\u200b"]
+
+PREDICT_BATCH_SIZES = [1, 10, 100, 10_000]
+
+# Inputs the scalar path has to handle specially
+EDGE_CASES = ["", " ", ".", "...", "!?!?", " . . ", "　", "A", "a.B!c?", None, 0, 42, float("nan")]
+
+
+def random_text(rng: random.Random) -> str:
+    parts = []
+    for _ in range(rng.randint(0, 60)):
+        parts.append(rng.choice(WORDS) + rng.choice(PUNCTUATION))
+    return " ".join(parts)
+
+
+def scalar_batch(moderator: ContentModerator, texts: list) -> np.ndarray:
+    """The old batch path: one dict per text, stacked through a DataFrame."""
+    features_df = pd.DataFrame([moderator.extract_features(t) for t in texts])
+    return features_df[moderator.FEATURE_NAMES].values
+
+
+def throughput(fn, texts: list, repeats: int = 1) -> float:
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn(texts)
+    return len(texts) * repeats / (time.perf_counter() - start)
+
+
+def train_demo_model(moderator: ContentModerator, texts: list):
+    """Fit the moderator's pipeline on synthetic labels (shouting = risky)."""
+    X = moderator.extract_features_batch(texts)
+    caps_ratio = X[:, moderator.FEATURE_NAMES.index('caps_ratio')]
+    y = (caps_ratio > np.median(caps_ratio)).astype(int)
+    moderator.model = Pipeline([
+        ('scaler', StandardScaler()),
+        ('classifier', LogisticRegression(class_weight='balanced', max_iter=1000, random_state=42))
+    ]).fit(X, y)
+    moderator.is_trained = True
+
+
+def benchmark_predict(moderator: ContentModerator, rng: random.Random):
+    print("\n" + "-" * 60)
+    print("predict() per text vs predict_batch()")
+    print("-" * 60)
+
+    train_demo_model(moderator, [random_text(rng) for _ in range(5_000)])
+
+    # Parity: same verdicts, scores equal to float precision
+    texts = EDGE_CASES + [random_text(rng) for _ in range(5_000)]
+    single = [moderator.predict(t) for t in texts]
+    batch = moderator.predict_batch(texts)
+    assert [r['is_risky'] for r in single] == [r['is_risky'] for r in batch]
+    max_diff = max(abs(a['risk_score'] - b['risk_score']) for a, b in zip(single, batch))
+    assert max_diff < 1e-12, max_diff
+    print(f"Parity: {len(texts):,} texts, same verdicts, max risk_score diff {max_diff:.1e}\n")
+
+    print(f"{'batch size':>12} | {'predict loop':>14} | {'predict_batch':>14} | {'speed-up':>8}")
+    print("-" * 58)
+    for size in PREDICT_BATCH_SIZES:
+        batch_texts = [random_text(rng) for _ in range(size)]
+        repeats = max(1, 2_000 // size)
+        old = throughput(lambda t: [moderator.predict(x) for x in t], batch_texts, repeats)
+        new = throughput(moderator.predict_batch, batch_texts, repeats)
+        print(f"{size:>12,} | {old:>8,.0f} tx/s | {new:>8,.0f} tx/s | {new / old:>7.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark moderator feature extraction')
+    parser.add_argument('--texts', type=int, default=100_000, help='Number of texts')
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    moderator = ContentModerator()
+
+    print("=" * 60)
+    print("BENCHMARK: CONTENT MODERATOR")
+    print("=" * 60)
+
+    # Parity: identical values, not just close
+    parity_texts = EDGE_CASES + [random_text(rng) for _ in range(20_000)]
+    expected = scalar_batch(moderator, parity_texts).astype(float)
+    actual = moderator.extract_features_batch(parity_texts)
+    assert actual.shape == expected.shape, (actual.shape, expected.shape)
+    mismatched = np.argwhere(actual != expected)
+    assert len(mismatched) == 0, f"Mismatch at {mismatched[:5]}: {[parity_texts[i] for i, _ in mismatched[:5]]}"
+    print(f"\nParity: {len(parity_texts):,} texts, all {len(moderator.FEATURE_NAMES)} features identical")
+
+    texts = [random_text(rng) for _ in range(args.texts)]
+    ascii_texts = [t.encode('ascii', 'ignore').decode() for t in texts]
+
+    print(f"\n{'input':>12} | {'per-text':>14} | {'batch':>14} | {'speed-up':>8}")
+    print("-" * 58)
+    for label, batch in [("mixed", texts), ("ascii", ascii_texts)]:
+        old = throughput(lambda t: scalar_batch(moderator, t), batch)
+        new = throughput(moderator.extract_features_batch, batch)
+        print(f"{label:>12} | {old:>8,.0f} tx/s | {new:>8,.0f} tx/s | {new / old:>7.1f}x")
+
+    benchmark_predict(moderator, rng)
+
+    print("\n" + "=" * 60)
+    print("BENCHMARK COMPLETE")
+    print("=" * 60)
+
+
+if __name__ == '__main__':
+    main()
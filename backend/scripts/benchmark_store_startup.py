@@ -0,0 +1,141 @@
+"""
+Benchmark worker startup: legacy pickle vs memory-mapped embedding store.
+
+Builds a synthetic corpus, saves it in both formats, then starts several
+worker processes at once (like `uvicorn --workers N`). Each worker loads
+the embeddings the way SemanticMatcher does, runs one full-corpus query,
+and reports its load time and memory:
+
+- RSS: resident memory, including shared file pages
+- Anon: private heap memory (not shared with other workers)
+- PSS: proportional share; shared pages are split between the workers
+
+Linux only (reads /proc). Model loading is left out: it is the same for
+both formats.
+
+Usage:
+    python scripts/benchmark_store_startup.py
+    python scripts/benchmark_store_startup.py --posts 200000 --workers 4
+"""
+
+import argparse
+import json
+import pickle
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from services.embedding_store import load_store, save_store
+from services.vector_index import normalize_embeddings
+
+DIM = 384  # all-MiniLM-L6-v2
+
+
+def read_memory_mb() -> dict:
+    """RSS, private anonymous memory and PSS of this process in MB."""
+    memory = {}
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith(('VmRSS:', 'RssAnon:')):
+                key, value = line.split()[:2]
+                memory[key.rstrip(':')] = int(value) / 1024
+    try:
+        with open('/proc/self/smaps_rollup') as f:
+            for line in f:
+                if line.startswith('Pss:'):
+                    memory['Pss'] = int(line.split()[1]) / 1024
+    except FileNotFoundError:
+        memory['Pss'] = float('nan')
+    return memory
+
+
+def run_worker(fmt: str, path: str):
+    """Load embeddings like SemanticMatcher.load_embeddings, query once, report."""
+    start = time.perf_counter()
+    if fmt == 'pickle':
+        with open(path, 'rb') as f:
+            data = pickle.load(f)
+        posts = data['posts']
+        embeddings = normalize_embeddings(data['embeddings'])
+    else:
+        posts, embeddings, _ = load_store(path)
+    load_s = time.perf_counter() - start
+
+    # A query touches every row, so all pages are resident afterwards
+    query = normalize_embeddings(np.ones(embeddings.shape[1], dtype=np.float32))
+    _ = embeddings @ query
+
+    print(json.dumps({'load_s': load_s, 'num_posts': len(posts), **read_memory_mb()}))
+
+
+def make_corpus(n: int) -> tuple[pd.DataFrame, np.ndarray]:
+    rng = np.random.default_rng(42)
+    words = np.array("i feel lonely anxious stressed tired work family friends help better "
+                     "sleep school anger rejection belonging myself people".split())
+    posts = pd.DataFrame({
+        'id': [f"post-{i}" for i in range(n)],
+        'content': [" ".join(rng.choice(words, 60)) for _ in range(n)],
+        'topic_tags': [list(rng.choice(words, 3)) for _ in range(n)],
+        'user_id': [f"user-{i % 500}" for i in range(n)],
+        'timestamp': ["2025-11-30T12:00:00Z"] * n,
+    })
+    embeddings = rng.normal(size=(n, DIM)).astype(np.float32)
+    return posts, embeddings
+
+
+def start_workers(fmt: str, path: Path, workers: int) -> list[dict]:
+    procs = [
+        subprocess.Popen([sys.executable, __file__, '--child', fmt, str(path)],
+                         stdout=subprocess.PIPE, text=True)
+        for _ in range(workers)
+    ]
+    return [json.loads(p.communicate()[0]) for p in procs]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark embedding startup formats')
+    parser.add_argument('--posts', type=int, default=100_000, help='Synthetic corpus size')
+    parser.add_argument('--workers', type=int, default=4, help='Concurrent worker processes')
+    parser.add_argument('--child', nargs=2, metavar=('FORMAT', 'PATH'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_worker(*args.child)
+        return
+
+    print("=" * 60)
+    print("BENCHMARK: EMBEDDING STARTUP (PICKLE vs STORE)")
+    print("=" * 60)
+
+    posts, embeddings = make_corpus(args.posts)
+    with tempfile.TemporaryDirectory() as tmp:
+        pkl_path = Path(tmp) / 'mentor_embeddings.pkl'
+        store_path = Path(tmp) / 'mentor_embeddings'
+        with open(pkl_path, 'wb') as f:
+            pickle.dump({'posts': posts, 'embeddings': embeddings, 'model_name': 'all-MiniLM-L6-v2'}, f)
+        save_store(store_path, posts, embeddings, 'all-MiniLM-L6-v2')
+
+        print(f"{args.posts:,} posts x {DIM} dims, {args.workers} workers started together")
+        print(f"Embedding matrix: {embeddings.nbytes / 1024 / 1024:.1f} MB\n")
+        print(f"{'format':>8} | {'load (s)':>9} | {'RSS (MB)':>9} | {'Anon (MB)':>9} | {'PSS (MB)':>9}")
+        print("-" * 56)
+
+        for fmt, path in [('pickle', pkl_path), ('store', store_path)]:
+            results = start_workers(fmt, path, args.workers)
+            mean = {k: np.mean([r[k] for r in results]) for k in ['load_s', 'VmRSS', 'RssAnon', 'Pss']}
+            print(f"{fmt:>8} | {mean['load_s']:>9.3f} | {mean['VmRSS']:>9.1f} | "
+                  f"{mean['RssAnon']:>9.1f} | {mean['Pss']:>9.1f}")
+
+    print("\n(per-worker means; Anon and PSS are what each extra worker really costs)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+"""
+Benchmark top-k selection used by SemanticMatcher.match.
+
+Compares the old full sort (np.argsort over every post) with the
+partial selection in services.vector_index.top_k_indices.
+
+Usage:
+    python scripts/benchmark_topk.py
+"""
+
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from services.vector_index import top_k_indices
+
+CORPUS_SIZES = [10_000, 100_000, 1_000_000]
+TOP_K = 5
+REPEATS = 20
+
+
+def full_sort(scores: np.ndarray, k: int) -> np.ndarray:
+    """The original selection: sort every score, keep the first k."""
+    return np.argsort(scores, kind='stable')[::-1][:k]
+
+
+def time_it(fn, scores: np.ndarray, k: int) -> float:
+    """Best-of-REPEATS wall time in milliseconds."""
+    best = float('inf')
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        fn(scores, k)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+print("=" * 60)
+print("BENCHMARK: TOP-K SELECTION")
+print("=" * 60)
+print(f"top_k={TOP_K} (selecting {TOP_K * 2} candidates), best of {REPEATS} runs\n")
+
+rng = np.random.default_rng(42)
+print(f"{'rows':>10} | {'full sort':>12} | {'partial':>12} | {'speed-up':>8}")
+print("-" * 52)
+
+for n in CORPUS_SIZES:
+    # Cosine similarities, same dtype the matcher produces
+    scores = rng.uniform(-1, 1, size=n).astype(np.float32)
+    k = TOP_K * 2
+
+    # Same output as the old path
+    assert np.array_equal(full_sort(scores, k), top_k_indices(scores, k))
+
+    full_ms = time_it(full_sort, scores, k)
+    partial_ms = time_it(top_k_indices, scores, k)
+    print(f"{n:>10,} | {full_ms:>9.3f} ms | {partial_ms:>9.3f} ms | {full_ms / partial_ms:>7.1f}x")
+
+print("\n" + "=" * 60)
+print("BENCHMARK COMPLETE")
+print("=" * 60)
@@ -0,0 +1,44 @@
+"""
+Convert a legacy mentor_embeddings.pkl into the embedding store format.
+
+The store (embeddings.npy + posts.json) is memory-mapped at startup, so
+uvicorn workers share one copy of the embeddings instead of each
+unpickling its own.
+
+Usage:
+    python scripts/convert_embeddings.py
+    python scripts/convert_embeddings.py path/to/mentor_embeddings.pkl path/to/mentor_embeddings
+"""
+
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from services.embedding_store import convert_pickle, load_store
+
+processed_dir = Path(__file__).parent.parent.parent / "data" / "processed"
+pkl_path = Path(sys.argv[1]) if len(sys.argv) > 1 else processed_dir / "mentor_embeddings.pkl"
+store_path = Path(sys.argv[2]) if len(sys.argv) > 2 else pkl_path.with_suffix('')
+
+print("=" * 60)
+print("CONVERTING EMBEDDINGS TO STORE FORMAT")
+print("=" * 60)
+
+if not pkl_path.exists():
+    print(f"Error: {pkl_path} not found")
+    sys.exit(1)
+
+print(f"\n1. Converting {pkl_path}...")
+convert_pickle(pkl_path, store_path)
+
+posts, embeddings, model_name = load_store(store_path)
+print(f"   Wrote {len(posts)} posts, embeddings {embeddings.shape} ({model_name})")
+print(f"   Store: {store_path}")
+
+print("\n" + "=" * 60)
+print("SUCCESS")
+print("=" * 60)
+print(f"\nThe API loads {store_path.name}/ automatically; the .pkl can be removed.")
+print("An existing .index.npz next to it keeps working (same post order).")
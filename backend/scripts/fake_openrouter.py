@@ -0,0 +1,203 @@
+"""
+Fake OpenRouter chat completions endpoint for the chat scripts.
+
+One configurable local server, shared by load_test_chat.py,
+test_chat_stream.py, test_outbound.py and the chat benchmarks:
+
+    reply        function(request) -> reply text, or its list of tokens
+                 (default: "That sounds hard. (turn N)", split at spaces)
+    latency      seconds before answering (or before the first streamed token)
+    token_delay  seconds per token: between streamed tokens, and added to
+                 the latency of non-streamed replies
+    limit        requests per second (sliding one-second window) before 429s
+    fail_next    statuses (or 'midstream') for the next requests, in order
+    fault        function() -> status or None, asked for every other request
+                 (e.g. random 503s, or a provider that is down)
+    retry_after  Retry-After header sent with every error, in seconds
+    on_request   function(request), called for every request (e.g. to
+                 measure prompts)
+
+Requests with "stream": true get the reply as Server-Sent Events, one
+token per event after a ': OPENROUTER PROCESSING' comment, like the real
+API; 'midstream' ends such a stream with an error event halfway through.
+
+Counters (reset() starts them again): requests, rate_limited, in_flight,
+peak_in_flight, connections, times (arrival time of each request).
+
+Usage:
+    with FakeOpenRouter(latency=0.1) as server:
+        client = OpenRouterClient(api_url=server.url)
+        ...
+        print(server.requests, server.peak_in_flight)
+"""
+
+import json
+import math
+import re
+import socket
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def user_turns(request: dict) -> int:
+    """How many user messages a completion request carries."""
+    return sum(1 for m in request['messages'] if m['role'] == 'user')
+
+
+def default_reply(request: dict) -> str:
+    return f"That sounds hard. (turn {user_turns(request)})"
+
+
+class FakeOpenRouter(ThreadingHTTPServer):
+    """Chat completions endpoint on localhost (see the module docstring for the knobs)."""
+
+    daemon_threads = True
+    block_on_close = False      # don't wait for hung handlers on close
+    request_queue_size = 512    # accept a burst of new connections
+
+    def __init__(self, reply=default_reply, latency: float = 0.0, token_delay: float = 0.0,
+                 limit: float = math.inf):
+        super().__init__(('127.0.0.1', 0), FakeOpenRouterHandler)
+        self.reply = reply
+        self.latency = latency
+        self.token_delay = token_delay
+        self.limit = limit
+        self.fail_next = []
+        self.fault = None
+        self.retry_after = None
+        self.on_request = None
+        self.lock = threading.Lock()
+        self.recent = deque()  # times of accepted requests in the last second
+        self.generation = 0
+        self.reset()
+
+    def reset(self):
+        """Start the counters again; requests still in flight are not counted."""
+        with self.lock:
+            self.generation += 1
+            self.requests = 0
+            self.rate_limited = 0
+            self.in_flight = 0
+            self.peak_in_flight = 0
+            self.connections = 0
+            self.times = []
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/api/v1/chat/completions"
+
+    def begin(self) -> tuple:
+        """Count a request; (generation, failure), failure being 429 when over the limit."""
+        with self.lock:
+            now = time.monotonic()
+            self.requests += 1
+            self.times.append(now)
+            while self.recent and now - self.recent[0] >= 1.0:
+                self.recent.popleft()
+            if len(self.recent) >= self.limit:
+                self.rate_limited += 1
+                return None, 429
+            self.recent.append(now)
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+            if self.fail_next:
+                failure = self.fail_next.pop(0)
+            else:
+                failure = self.fault() if self.fault is not None else None
+            return self.generation, failure
+
+    def end(self, generation: int):
+        with self.lock:
+            if generation == self.generation:
+                self.in_flight -= 1
+
+    def __enter__(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+        self.server_close()
+
+
+class FakeOpenRouterHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive, so connection reuse is visible
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def log_message(self, *args):
+        pass
+
+    def send_json(self, status: int, body: dict):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        if status != 200 and self.server.retry_after is not None:
+            self.send_header('Retry-After', str(self.server.retry_after))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def write_chunk(self, text: str):
+        data = text.encode()
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+    def do_POST(self):
+        server = self.server
+        request = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        if server.on_request is not None:
+            server.on_request(request)
+        generation, failure = server.begin()
+        if generation is None:
+            self.send_json(failure, {'error': {'message': 'rate limited', 'code': failure}})
+            return
+        try:
+            time.sleep(server.latency)
+            if isinstance(failure, int):
+                self.send_json(failure, {'error': {'message': 'injected failure', 'code': failure}})
+                return
+            reply = server.reply(request)
+            tokens = reply if isinstance(reply, list) else (re.findall(r'\s*\S+', reply) or [reply])
+            text = "".join(tokens)
+            if request.get('stream'):
+                self.stream(tokens, midstream=failure == 'midstream')
+                return
+            time.sleep(server.token_delay * len(tokens))
+            self.send_json(200, {
+                'id': 'gen-fake', 'object': 'chat.completion', 'model': request['model'],
+                'choices': [{'index': 0, 'finish_reason': 'stop', 'message': {
+                    'role': 'assistant', 'content': text}}],
+            })
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # the client timed out or hung up
+        finally:
+            server.end(generation)
+
+    def stream(self, tokens: list, midstream: bool):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        self.write_chunk(": OPENROUTER PROCESSING\n\n")
+        for i, token in enumerate(tokens):
+            time.sleep(self.server.token_delay)
+            if midstream and i == len(tokens) // 2:
+                self.write_chunk(f"data: {json.dumps({'error': {'message': 'provider died'}})}\n\n")
+                break
+            chunk = {'id': 'gen-fake', 'choices': [{'index': 0, 'delta': {'content': token}}]}
+            self.write_chunk(f"data: {json.dumps(chunk)}\n\n")
+        else:
+            self.write_chunk("data: [DONE]\n\n")
+        self.write_chunk("")
@@ -13,6 +13,7 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from services.matcher import SemanticMatcher
+from services.vector_index import index_path_for
 
 print("="*60)
 print("GENERATING EMBEDDINGS FROM SEED DATA")
@@ -44,12 +45,27 @@ print("\n3. Generating embeddings (this may take a minute)...")
 matcher.load_mentor_posts_from_list(posts)
 
 # Save embeddings to file
-output_path = Path(__file__).parent.parent.parent / "data" / "processed" / "mentor_embeddings.pkl"
+output_path = Path(__file__).parent.parent.parent / "data" / "processed" / "mentor_embeddings"
 output_path.parent.mkdir(parents=True, exist_ok=True)
 
 print(f"\n4. Saving embeddings to {output_path}...")
 matcher.save_embeddings(str(output_path))
 
+# Optional ANN index for large corpora (MATCHER_INDEX=ivf)
+print("\n5. Search index...")
+index_path = index_path_for(output_path)
+matcher.build_index_from_env(index_path)
+
+# Load the files back the way the API does at startup
+print("\n6. Checking the saved files load together...")
+try:
+    matcher.load_embeddings(str(output_path))
+    if index_path.exists():
+        matcher.load_index(str(index_path))
+except Exception as e:
+    print(f"Error loading the saved files: {str(e)}")
+    sys.exit(1)
+
 print("\n" + "="*60)
 print("SUCCESS")
 print("="*60)
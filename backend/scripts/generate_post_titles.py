@@ -11,11 +11,18 @@ Usage:
 """
 
 import os
+import sys
 import json
+from pathlib import Path
 from supabase import create_client
 import requests
 from dotenv import load_dotenv
 
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from services.outbound import OutboundProvider
+
 # Load environment variables
 load_dotenv()
 
@@ -29,6 +36,11 @@ if not all([SUPABASE_URL, SUPABASE_SERVICE_KEY, OPENROUTER_API_KEY]):
 
 supabase = create_client(SUPABASE_URL, SUPABASE_SERVICE_KEY)
 
+# Retries 429s/5xx with backoff (honouring Retry-After); once OpenRouter keeps
+# failing, the circuit opens and posts get fallback titles without waiting
+openrouter = OutboundProvider('openrouter', max_concurrency=1, max_retries=4, deadline=120)
+session = requests.Session()
+
 
 def generate_title_with_ai(content: str, topic_tags: list) -> str:
     """
@@ -59,7 +71,7 @@ Post content:
 Generate ONLY the title, nothing else:"""
 
     try:
-        response = requests.post(
+        response = openrouter.request(lambda: session.post(
             url="https://openrouter.ai/api/v1/chat/completions",
             headers={
                 "Authorization": f"Bearer {OPENROUTER_API_KEY}",
@@ -72,7 +84,7 @@ Generate ONLY the title, nothing else:"""
                 ]
             },
             timeout=30
-        )
+        ))
 
         if response.status_code == 200:
             result = response.json()
@@ -89,6 +101,7 @@ Generate ONLY the title, nothing else:"""
             return generate_fallback_title(content, topic_tags)
 
     except Exception as e:
+        # Includes CircuitOpenError while OpenRouter is down
         print(f"Error generating title: {e}")
         return generate_fallback_title(content, topic_tags)
 
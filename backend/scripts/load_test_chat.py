@@ -0,0 +1,136 @@
+"""
+Load test ChatAssistant against a local mock completions server.
+
+The mock (fake_openrouter.py) serves an OpenAI-style /chat/completions
+endpoint with a fixed latency, answers 429 above a requests-per-second
+limit (sliding one-second window) and counts concurrent requests and TCP
+connections opened.
+
+Runs many conversations at once from a single event loop, the way one
+uvicorn worker serves /api/chat:
+
+    legacy   the old send(): requests.post per call plus sleep(1.5), which
+             blocks the loop, so conversations run one call at a time
+    async    send_async() on a shared OpenRouterClient, without and with
+             the shared rate limiter
+
+Usage:
+    python scripts/load_test_chat.py
+    python scripts/load_test_chat.py --chats 64 --turns 3 --latency 0.5
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+import requests
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from services.chat import ChatAssistant, OpenRouterClient
+from fake_openrouter import FakeOpenRouter
+
+
+def legacy_send(chat: ChatAssistant, user_message: str) -> str:
+    """The old send(): a fresh connection per call and an unconditional sleep."""
+    payload = chat._start_turn(user_message)
+    time.sleep(1.5)
+    response = requests.post(chat.api_url, headers=chat._headers(), json=payload)
+    response.raise_for_status()
+    return chat._finish_turn(response.json())
+
+
+async def converse(chat: ChatAssistant, turns: int, legacy: bool) -> bool:
+    """One conversation; True if every reply came back for the right turn."""
+    for turn in range(1, turns + 1):
+        message = f"I've been feeling lonely (message {turn})"
+        if legacy:
+            reply = legacy_send(chat, message)
+        else:
+            reply = await chat.send_async(message)
+        if reply != f"That sounds hard. (turn {turn})":
+            return False
+    return len(chat.conversation_history) == 2 * turns
+
+
+async def run(server: FakeOpenRouter, client: OpenRouterClient,
+              chats: int, turns: int, legacy: bool) -> tuple[float, bool]:
+    assistants = [ChatAssistant(api_key='test', client=client) for _ in range(chats)]
+    start = time.perf_counter()
+    results = await asyncio.gather(*(converse(chat, turns, legacy) for chat in assistants))
+    return time.perf_counter() - start, all(results)
+
+
+def report(label: str, server: FakeOpenRouter, elapsed: float, calls: int, ok: bool):
+    print(f"{label:>24} | {elapsed:>7.1f}s | {calls / elapsed:>7.1f}/s | {server.peak_in_flight:>9} | "
+          f"{server.connections:>11} | {server.rate_limited:>4} | {ok}")
+
+
+async def main_async(args) -> bool:
+    ok = True
+    with FakeOpenRouter(latency=args.latency, limit=args.limit) as server:
+        print(f"{'mode':>24} | {'time':>8} | {'calls':>9} | {'in flight':>9} | "
+              f"{'connections':>11} | {'429s':>4} | replies ok")
+        print("-" * 92)
+
+        legacy_chats = min(args.chats, args.legacy_chats)
+        client = OpenRouterClient(api_url=server.url, requests_per_second=None)
+        elapsed, passed = await run(server, client, legacy_chats, args.turns, legacy=True)
+        report(f"legacy ({legacy_chats} chats)", server, elapsed, legacy_chats * args.turns, passed)
+        ok &= passed
+
+        # The same pool twice, server limit lifted: the second round should
+        # open no new connections
+        server.limit = float('inf')
+        client = OpenRouterClient(api_url=server.url, requests_per_second=None,
+                                  max_connections=args.chats)
+        for round_ in (1, 2):
+            server.reset()
+            elapsed, passed = await run(server, client, args.chats, args.turns, legacy=False)
+            report(f"async, round {round_}", server, elapsed, args.chats * args.turns, passed)
+            ok &= passed
+        await client.aclose()
+
+        # Shared limiter under the server's limit: a full burst plus one
+        # second of refill (2 x rps) fits in the server's window, so no 429s
+        server.limit = args.limit
+        rps = args.limit * 0.45
+        client = OpenRouterClient(api_url=server.url, requests_per_second=rps,
+                                  max_connections=args.chats)
+        server.reset()
+        server.recent.clear()
+        elapsed, passed = await run(server, client, args.chats, args.turns, legacy=False)
+        report(f"async, {rps:g} req/s limit", server, elapsed, args.chats * args.turns, passed)
+        ok &= passed and server.rate_limited == 0
+        await client.aclose()
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test ChatAssistant against a mock completions server')
+    parser.add_argument('--chats', type=int, default=64, help='Concurrent conversations')
+    parser.add_argument('--turns', type=int, default=3, help='Messages per conversation')
+    parser.add_argument('--latency', type=float, default=0.5, help='Mock completion latency (seconds)')
+    parser.add_argument('--limit', type=float, default=50, help='Mock server requests/sec limit')
+    parser.add_argument('--legacy-chats', type=int, default=4, help='Conversations for the (slow) legacy run')
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("CHAT LOAD TEST vs MOCK COMPLETIONS SERVER")
+    print("=" * 60)
+    print(f"\n{args.chats} conversations x {args.turns} turns, {args.latency:g}s latency, "
+          f"server limit {args.limit:g} req/s\n")
+
+    ok = asyncio.run(main_async(args))
+
+    print("\n" + "=" * 60)
+    print("ALL PASSED" if ok else "FAILED")
+    print("=" * 60)
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,125 @@
+"""
+Load test the /api/match endpoint at several concurrency levels.
+
+Reports throughput and p50/p99 latency for /api/match, how many requests
+were turned away with 503 (inference pool full), and p99 latency of
+/api/health polled during the load (it should stay low).
+
+Make sure the server is running first: python -m uvicorn main:app
+Compare runs with batching on and off, e.g.:
+    MATCHER_BATCH_MAX_SIZE=1 python -m uvicorn main:app     # batching off
+    python -m uvicorn main:app                              # batching on
+
+Usage:
+    python scripts/load_test_match.py
+    python scripts/load_test_match.py --levels 1 8 32 --requests 400
+"""
+
+import argparse
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import requests
+
+API_BASE = "http://localhost:8000"
+
+QUERIES = [
+    "I feel so alone and isolated",
+    "I'm struggling with my mental health",
+    "I'm having trouble sleeping",
+    "I feel anxious all the time",
+    "I need help dealing with stress",
+    "Nobody at school talks to me",
+    "I keep getting rejected and it's wearing me down",
+    "I don't feel like I belong anywhere",
+]
+
+_local = threading.local()
+
+
+def post_match(i: int) -> tuple[float, int]:
+    """One request on this thread's keep-alive session; returns (latency, status)."""
+    if not hasattr(_local, 'session'):
+        _local.session = requests.Session()
+    # Vary the text so no layer can serve it from a cache
+    payload = {"user_text": f"{QUERIES[i % len(QUERIES)]} ({i})", "top_k": 5}
+    start = time.perf_counter()
+    response = _local.session.post(f"{API_BASE}/api/match", json=payload)
+    return time.perf_counter() - start, response.status_code
+
+
+def probe_health(stop: threading.Event, latencies: list):
+    """Poll /api/health until stopped, recording latency in ms."""
+    session = requests.Session()
+    while not stop.is_set():
+        start = time.perf_counter()
+        session.get(f"{API_BASE}/api/health")
+        latencies.append((time.perf_counter() - start) * 1000)
+        time.sleep(0.02)
+
+
+def run_level(concurrency: int, total: int) -> dict:
+    stop = threading.Event()
+    health_latencies: list = []
+    prober = threading.Thread(target=probe_health, args=(stop, health_latencies))
+    prober.start()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(post_match, range(total)))
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    prober.join()
+
+    ok = np.array([latency for latency, status in results if status == 200]) * 1000
+    return {
+        'rps': len(ok) / elapsed,
+        'p50': np.percentile(ok, 50) if len(ok) else float('nan'),
+        'p99': np.percentile(ok, 99) if len(ok) else float('nan'),
+        'busy': sum(1 for _, status in results if status == 503),
+        'errors': sum(1 for _, status in results if status not in (200, 503)),
+        'health_p99': np.percentile(health_latencies, 99) if health_latencies else float('nan'),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test /api/match')
+    parser.add_argument('--levels', type=int, nargs='+', default=[1, 2, 4, 8, 16, 32],
+                        help='Concurrency levels (simultaneous clients)')
+    parser.add_argument('--requests', type=int, default=200, help='Requests per level')
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("LOAD TEST: /api/match")
+    print("=" * 60)
+
+    try:
+        stats = requests.get(f"{API_BASE}/api/stats").json()
+    except requests.exceptions.ConnectionError:
+        print(f"Error: Cannot connect to backend at {API_BASE}")
+        print("Make sure the backend is running: python -m uvicorn main:app")
+        return
+
+    print(f"Posts: {stats['matcher']['num_posts']}, batching: {stats['matcher'].get('batching')}\n")
+
+    # Warm up the model and connection pools
+    run_level(2, 10)
+
+    print(f"{'clients':>8} | {'req/s':>8} | {'p50 ms':>8} | {'p99 ms':>8} | "
+          f"{'503s':>5} | {'errors':>6} | {'health p99 ms':>13}")
+    print("-" * 75)
+    for level in args.levels:
+        r = run_level(level, args.requests)
+        print(f"{level:>8} | {r['rps']:>8.1f} | {r['p50']:>8.1f} | {r['p99']:>8.1f} | "
+              f"{r['busy']:>5} | {r['errors']:>6} | {r['health_p99']:>13.1f}")
+
+    stats = requests.get(f"{API_BASE}/api/stats").json()
+    print(f"\nBatching stats after run: {stats['matcher'].get('batching')}")
+    print(f"Inference pool after run: {stats.get('inference_pool')}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,202 @@
+"""
+Test streaming chat against a local fake OpenRouter endpoint.
+
+The fake (fake_openrouter.py) serves /chat/completions both ways: a
+normal JSON completion after the whole reply is "generated", or (with
+"stream": true) the reply as Server-Sent Events, one token every
+--token-delay seconds, with a ': OPENROUTER PROCESSING' comment first
+like the real API.
+
+Checks:
+    1. ChatAssistant.send_stream yields the same text as send_async,
+       with the first token long before the full reply, and adds the
+       reply to conversation_history
+    2. A 429 before the stream starts is retried; an error event
+       mid-stream raises
+    3. /api/chat/stream through a real uvicorn server: delta events,
+       then a done event with should_show_stories (skipped if the
+       backend's model dependencies aren't installed)
+
+Usage:
+    python scripts/test_chat_stream.py
+    python scripts/test_chat_stream.py --tokens 80 --token-delay 0.02
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+import httpx
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from services.chat import ChatAssistant, OpenRouterClient
+from fake_openrouter import FakeOpenRouter, free_port, user_turns
+
+
+def reply_tokens(turn: int, n_tokens: int) -> list:
+    """What the fake replies on a given user turn, split into tokens."""
+    return [f"Turn {turn}:"] + [f" word{i}" for i in range(n_tokens - 1)]
+
+
+def reply_text(turn: int, n_tokens: int) -> str:
+    return "".join(reply_tokens(turn, n_tokens))
+
+
+async def stream_timed(chat: ChatAssistant, message: str) -> tuple:
+    """(text, seconds to first token, seconds to last token)"""
+    start = time.perf_counter()
+    first = None
+    parts = []
+    async for delta in chat.send_stream(message):
+        if first is None:
+            first = time.perf_counter() - start
+        parts.append(delta)
+    return "".join(parts), first, time.perf_counter() - start
+
+
+async def test_service(server: FakeOpenRouter, n_tokens: int) -> bool:
+    client = OpenRouterClient(api_url=server.url, requests_per_second=None)
+    ok = True
+
+    chat = ChatAssistant(api_key='test', client=client)
+    start = time.perf_counter()
+    full = await chat.send_async("I feel lonely")
+    blocking = time.perf_counter() - start
+
+    text, first, total = await stream_timed(chat, "Nobody talks to me")
+    expected = reply_text(2, n_tokens)
+    history_ok = chat.conversation_history[-1] == {"role": "assistant", "content": expected}
+    passed = full == reply_text(1, n_tokens) and text == expected and history_ok
+    print(f"  send_async: full reply after {blocking * 1000:.0f}ms")
+    print(f"  send_stream: first token after {first * 1000:.0f}ms, last after {total * 1000:.0f}ms, "
+          f"same text and history updated: {passed}")
+    ok &= passed and first < blocking / 4
+
+    server.fail_next = [429]
+    chat = ChatAssistant(api_key='test', client=client)
+    text, _, _ = await stream_timed(chat, "hello")
+    passed = text == reply_text(1, n_tokens)
+    print(f"  429 before the stream: retried, full reply: {passed}")
+    ok &= passed
+
+    server.fail_next = ['midstream']
+    chat = ChatAssistant(api_key='test', client=client)
+    try:
+        await stream_timed(chat, "hello")
+        passed = False
+    except RuntimeError as e:
+        passed = 'provider died' in str(e) and len(chat.conversation_history) == 1
+    print(f"  error event mid-stream: raised, no partial reply in history: {passed}")
+    ok &= passed
+
+    await client.aclose()
+    return ok
+
+
+def read_sse(response, start: float) -> list:
+    """(event, data, seconds since start) for each SSE message."""
+    events, event = [], 'message'
+    for line in response.iter_lines():
+        if line.startswith('event:'):
+            event = line[6:].strip()
+        elif line.startswith('data:'):
+            events.append((event, json.loads(line[5:]), time.perf_counter() - start))
+            event = 'message'
+    return events
+
+
+def test_endpoint(server: FakeOpenRouter, n_tokens: int) -> bool:
+    os.environ['OPENROUTER_API_URL'] = server.url
+    os.environ.setdefault('OPENROUTER_API_KEY', 'test')
+    try:
+        import uvicorn
+        import main
+    except ImportError as e:
+        print(f"  skipped: backend dependencies not installed ({e})")
+        return True
+
+    port = free_port()
+    uv = uvicorn.Server(uvicorn.Config(main.app, host='127.0.0.1', port=port, log_level='warning'))
+    threading.Thread(target=uv.run, daemon=True).start()
+    while not uv.started:
+        time.sleep(0.05)
+
+    ok = True
+    try:
+        base = f"http://127.0.0.1:{port}"
+        history = [{"role": "user", "content": "I feel lonely"}, {"role": "assistant", "content": "I hear you."}]
+        start = time.perf_counter()
+        with httpx.stream('POST', f"{base}/api/chat/stream", timeout=30,
+                          json={"message": "Nobody talks to me", "conversation_history": history}) as response:
+            content_type = response.headers['content-type']
+            events = read_sse(response, start)
+        deltas = [data['delta'] for event, data, _ in events if event == 'message']
+        done = events[-1]
+        expected = reply_text(2, n_tokens)
+        passed = (content_type.startswith('text/event-stream') and "".join(deltas) == expected
+                  and done[0] == 'done' and done[1].pop('session_id', None) == response.headers['x-session-id']
+                  and done[1] == {"response": expected, "should_show_stories": True})
+        print(f"  /api/chat/stream: {len(deltas)} delta events, first after {events[0][2] * 1000:.0f}ms, "
+              f"done after {done[2] * 1000:.0f}ms, done event correct: {passed}")
+        ok &= passed
+
+        # More 500s than main.openrouter retries; a single one is retried away
+        server.fail_next = [500] * (main.openrouter.provider.max_retries + 1)
+        response = httpx.post(f"{base}/api/chat/stream", json={"message": "hello"}, timeout=30)
+        passed = response.status_code == 500
+        print(f"  provider 500 before streaming (retries exhausted): HTTP {response.status_code}")
+        ok &= passed
+
+        server.fail_next = ['midstream']
+        with httpx.stream('POST', f"{base}/api/chat/stream", json={"message": "hello"}, timeout=30) as response:
+            events = read_sse(response, time.perf_counter())
+        passed = events[-1][0] == 'error' and 'provider died' in events[-1][1]['detail']
+        print(f"  provider error mid-stream: ends with an error event: {passed}")
+        ok &= passed
+
+        # Hang up after the first token: the OpenRouter slot must be released right away
+        with httpx.stream('POST', f"{base}/api/chat/stream", json={"message": "hello"}, timeout=30) as response:
+            next(response.iter_lines())
+        deadline = time.monotonic() + 2
+        while main.openrouter.stats()['in_flight'] and time.monotonic() < deadline:
+            time.sleep(0.02)
+        passed = main.openrouter.stats()['in_flight'] == 0
+        print(f"  client disconnect mid-stream: OpenRouter slot released: {passed}")
+        ok &= passed
+    finally:
+        uv.should_exit = True
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Test streaming chat against a fake OpenRouter endpoint')
+    parser.add_argument('--tokens', type=int, default=40, help='Tokens per reply')
+    parser.add_argument('--token-delay', type=float, default=0.05, help='Seconds between tokens')
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("STREAMING CHAT vs FAKE OPENROUTER")
+    print("=" * 60)
+
+    reply = lambda request: reply_tokens(user_turns(request), args.tokens)
+    with FakeOpenRouter(reply=reply, token_delay=args.token_delay) as server:
+        print(f"\nChatAssistant ({args.tokens} tokens, {args.token_delay * 1000:g}ms apart)")
+        ok = asyncio.run(test_service(server, args.tokens))
+        print("\n/api/chat/stream")
+        ok &= test_endpoint(server, args.tokens)
+
+    print("\n" + "=" * 60)
+    print("ALL PASSED" if ok else "FAILED")
+    print("=" * 60)
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
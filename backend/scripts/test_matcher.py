@@ -16,7 +16,7 @@ print("TESTING SEMANTIC MATCHER")
 print("=" * 60)
 
 # Initialize matcher and load embeddings
-embeddings_path = Path(__file__).parent.parent.parent / "data" / "processed" / "mentor_embeddings.pkl"
+embeddings_path = Path(__file__).parent.parent.parent / "data" / "processed" / "mentor_embeddings"
 
 print(f"\n1. Loading embeddings from {embeddings_path}...")
 matcher = SemanticMatcher()
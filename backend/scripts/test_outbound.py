@@ -0,0 +1,254 @@
+"""
+Test the outbound call layer against a local fault-injecting completions server
+(scripts/fake_openrouter.py).
+
+The mock's behaviour can be switched while it runs:
+
+    healthy  200 after --latency seconds
+    flaky    a share of requests fail with 503 or 429 (with Retry-After)
+    down     every request fails with 503
+    hang     requests stall for longer than the client timeout
+
+Each scenario runs concurrent chat turns through OpenRouterClient (the
+shared OutboundProvider) and, where it shows the difference, through the
+previous behaviour: retry a 429 once after 2s, give up on anything else,
+no concurrency cap, no circuit breaker. Reports success rate, latency
+percentiles and how much load reached the server.
+
+Usage:
+    python scripts/test_outbound.py
+    python scripts/test_outbound.py --calls 400
+"""
+
+import argparse
+import asyncio
+import random
+import sys
+import time
+from pathlib import Path
+
+import httpx
+import numpy as np
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from services.chat import ChatAssistant, OpenRouterClient
+from fake_openrouter import FakeOpenRouter
+
+
+rng = random.Random(0)
+
+
+def set_mode(server: FakeOpenRouter, mode: str, latency: float, fail_rate: float = 0.0):
+    """Switch the fake to one of the failure modes in the module docstring."""
+    server.latency = latency * (20 if mode == 'hang' else 1)
+    if mode in ('down', 'hang'):
+        server.fault = lambda: 503
+    elif mode == 'flaky':
+        server.fault = lambda: rng.choice([429, 503]) if rng.random() < fail_rate else None
+    else:
+        server.fault = None
+
+
+async def legacy_post(client: httpx.AsyncClient, url: str, payload: dict) -> dict:
+    """The previous behaviour: retry a 429 once after 2s, give up on anything else."""
+    for attempt in range(2):
+        response = await client.post(url, json=payload)
+        if response.is_success:
+            return response.json()
+        if response.status_code != 429 or attempt == 1:
+            response.raise_for_status()
+        await asyncio.sleep(2)
+
+
+async def run_calls(n: int, call) -> dict:
+    """n concurrent calls; success count, latency percentiles and error types."""
+    latencies, errors = [], {}
+
+    async def one(i):
+        start = time.perf_counter()
+        try:
+            await call(i)
+            ok = True
+        except Exception as e:
+            errors[type(e).__name__] = errors.get(type(e).__name__, 0) + 1
+            ok = False
+        latencies.append(time.perf_counter() - start)
+        return ok
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(one(i) for i in range(n)))
+    return {
+        'ok': sum(results), 'n': n, 'elapsed': time.perf_counter() - start,
+        'p50': float(np.percentile(latencies, 50)), 'p99': float(np.percentile(latencies, 99)),
+        'errors': errors,
+    }
+
+
+def report(label: str, result: dict, server: FakeOpenRouter):
+    errors = ", ".join(f"{k} {v}" for k, v in sorted(result['errors'].items())) or "-"
+    print(f"  {label:<28} {result['ok']:>4}/{result['n']:<4} ok | p50 {result['p50']:6.2f}s | "
+          f"p99 {result['p99']:6.2f}s | {server.requests:>4} reqs, peak {server.peak_in_flight:>3} in flight | {errors}")
+
+
+def chat_call(client: OpenRouterClient):
+    async def call(i):
+        await ChatAssistant(api_key='test', client=client).send_async(f"message {i}")
+    return call
+
+
+def legacy_call(http: httpx.AsyncClient, url: str):
+    async def call(i):
+        await legacy_post(http, url, {'model': 'm', 'messages': [{'role': 'user', 'content': f"message {i}"}]})
+    return call
+
+
+async def scenarios(server: FakeOpenRouter, args) -> bool:
+    ok = True
+    # Hung requests time out quickly; otherwise leave room for the retry deadline (2 x timeout)
+    timeout, hang_timeout = 10.0, args.latency * 5
+    http = httpx.AsyncClient(timeout=timeout, limits=httpx.Limits(max_connections=1000))
+
+    def new_client(**kwargs) -> OpenRouterClient:
+        settings = dict(api_url=server.url, timeout=timeout, requests_per_second=None,
+                        max_connections=args.calls, reset_timeout=1.0)
+        settings.update(kwargs)
+        return OpenRouterClient(**settings)
+
+    print(f"\n1. Flaky provider: 30% of requests fail (429 or 503, Retry-After: 0)")
+    set_mode(server, 'flaky', args.latency, fail_rate=0.3)
+    server.retry_after = 0
+    server.reset()
+    legacy = await run_calls(args.calls, legacy_call(http, server.url))
+    report("previous (429 once)", legacy, server)
+    server.reset()
+    client = new_client()
+    result = await run_calls(args.calls, chat_call(client))
+    report("OutboundProvider", result, server)
+    ok &= result['ok'] >= args.calls * 0.98 and result['ok'] > legacy['ok']
+    await client.aclose()
+
+    print(f"\n2. Retry-After: first request answered 429 with Retry-After: 1")
+    set_mode(server, 'healthy', args.latency)
+    server.retry_after, server.fail_next = 1, [429]
+    server.reset()
+    client = new_client()
+    result = await run_calls(1, chat_call(client))
+    gap = server.times[1] - server.times[0] if len(server.times) > 1 else 0.0
+    print(f"  retried after {gap:.2f}s, succeeded: {result['ok'] == 1}")
+    ok &= result['ok'] == 1 and gap >= 1.0
+    await client.aclose()
+
+    print(f"\n3. Provider hangs past the {hang_timeout:g}s timeout (calls keep arriving for 3s)")
+    set_mode(server, 'hang', args.latency)
+    server.retry_after = None
+    http.timeout = httpx.Timeout(hang_timeout)
+
+    async def waves(call):
+        """args.calls calls spread over 3 seconds, like live traffic."""
+        per_wave = max(1, args.calls // 10)
+        tasks = []
+        for wave in range(10):
+            tasks.append(asyncio.create_task(run_calls(per_wave, call)))
+            await asyncio.sleep(0.3)
+        parts = await asyncio.gather(*tasks)
+        merged = {'ok': sum(p['ok'] for p in parts), 'n': sum(p['n'] for p in parts),
+                  'p50': float(np.median([p['p50'] for p in parts])),
+                  'p99': max(p['p99'] for p in parts), 'errors': {}}
+        for p in parts:
+            for k, v in p['errors'].items():
+                merged['errors'][k] = merged['errors'].get(k, 0) + v
+        return merged
+
+    server.reset()
+    legacy = await waves(legacy_call(http, server.url))
+    report("previous", legacy, server)
+    server.reset()
+    client = new_client(timeout=hang_timeout, max_concurrency=16, reset_timeout=30.0)
+    result = await waves(chat_call(client))
+    report("OutboundProvider", result, server)
+    breaker = client.stats()['circuit']
+    print(f"  circuit: {breaker['state']}, calls rejected without reaching the server: {breaker['rejected']}")
+    ok &= server.requests < legacy['n'] and result['p50'] < legacy['p50'] and breaker['state'] == 'open'
+    await client.aclose()
+
+    print(f"\n4. Outage then recovery (circuit resets after 1s)")
+    set_mode(server, 'down', args.latency)
+    server.reset()
+    client = new_client(max_retries=1)
+    down = await run_calls(20, chat_call(client))
+    report("while down", down, server)
+    state_down = client.stats()['circuit']['state']
+    set_mode(server, 'healthy', args.latency)
+    await asyncio.sleep(1.1)
+    server.reset()
+    # Half-open lets a single probe through; the burst follows once it has closed the circuit
+    probe = await run_calls(1, chat_call(client))
+    state_up = client.stats()['circuit']['state']
+    up = await run_calls(args.calls, chat_call(client))
+    report("after recovery", up, server)
+    print(f"  circuit: {state_down} while down, {state_up} after the probe "
+          f"({'succeeded' if probe['ok'] else 'failed'})")
+    ok &= state_down == 'open' and state_up == 'closed' and up['ok'] == args.calls
+    await client.aclose()
+
+    print(f"\n5. Concurrency cap of 8 under {args.calls} concurrent calls")
+    server.reset()
+    client = new_client(max_concurrency=8)
+    result = await run_calls(args.calls, chat_call(client))
+    report("OutboundProvider", result, server)
+    ok &= server.peak_in_flight <= 8 and result['ok'] == args.calls
+    await client.aclose()
+
+    await http.aclose()
+    return ok
+
+
+def sync_scenario(server: FakeOpenRouter, args, calls: int) -> bool:
+    """Blocking path (ChatAssistant.send / generate_post_titles) on the flaky server."""
+    from concurrent.futures import ThreadPoolExecutor
+
+    print(f"\n6. Sync callers (threads) on the flaky provider")
+    set_mode(server, 'flaky', args.latency, fail_rate=0.3)
+    server.retry_after = 0
+    server.reset()
+    client = OpenRouterClient(api_url=server.url, timeout=10.0,
+                              requests_per_second=None, max_concurrency=8)
+
+    def one(i):
+        try:
+            ChatAssistant(api_key='test', client=client).send(f"message {i}")
+            return True
+        except Exception:
+            return False
+
+    with ThreadPoolExecutor(16) as pool:
+        succeeded = sum(pool.map(one, range(calls)))
+    print(f"  {succeeded}/{calls} ok, {server.requests} requests, peak {server.peak_in_flight} in flight")
+    asyncio.run(client.aclose())
+    return succeeded >= calls * 0.98 and server.peak_in_flight <= 8
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Test the outbound layer against a fault-injecting server')
+    parser.add_argument('--calls', type=int, default=200, help='Concurrent calls per scenario')
+    parser.add_argument('--latency', type=float, default=0.1, help='Mock response latency (seconds)')
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("OUTBOUND CALLS vs FAULT-INJECTING SERVER")
+    print("=" * 60)
+
+    with FakeOpenRouter(latency=args.latency) as server:
+        ok = asyncio.run(scenarios(server, args))
+        ok &= sync_scenario(server, args, min(args.calls, 100))
+
+    print("\n" + "=" * 60)
+    print("ALL PASSED" if ok else "FAILED")
+    print("=" * 60)
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,106 @@
+"""
+Batching Encoder
+
+Micro-batches concurrent query encodes into one model forward pass.
+
+Each /api/match request only needs one embedding, but running the
+sentence-transformer at batch size 1 wastes most of the CPU. Requests
+arriving within a few milliseconds of each other are encoded together
+and each caller gets its own row back.
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+
+class BatchingEncoder:
+    """
+    Collects queries from many threads and encodes them in batches.
+
+    A background thread takes the first waiting query, then keeps
+    collecting until max_batch_size queries are queued or max_wait_ms has
+    passed, encodes them in one model.encode() call and hands each result
+    back to its caller.
+
+    Usage:
+        encoder = BatchingEncoder(model, max_batch_size=32, max_wait_ms=5)
+        embedding = encoder.encode("I feel so lonely")  # blocks until ready
+    """
+
+    def __init__(self, model, max_batch_size: int = 32, max_wait_ms: float = 5.0):
+        """
+        Args:
+            model: SentenceTransformer (anything with .encode(list[str]))
+            max_batch_size: Most queries to encode in one forward pass
+            max_wait_ms: How long the first query in a batch waits for others
+        """
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._queue: queue.Queue = queue.Queue()
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.items = 0
+
+        self._thread = threading.Thread(target=self._run, name="batching-encoder", daemon=True)
+        self._thread.start()
+
+    def encode(self, text: str) -> np.ndarray:
+        """Encode one text; blocks until its batch has been encoded."""
+        future: Future = Future()
+        self._queue.put((text, future))
+        return future.result()
+
+    def stats(self) -> dict:
+        """Batch counters, for sizing max_batch_size / max_wait_ms."""
+        with self._lock:
+            return {
+                'batches': self.batches,
+                'items': self.items,
+                'avg_batch_size': round(self.items / self.batches, 2) if self.batches else 0.0,
+                'max_batch_size': self.max_batch_size,
+                'max_wait_ms': self.max_wait * 1000,
+            }
+
+    def _collect_batch(self) -> list:
+        """Block for one query, then gather more until full or the window closes."""
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining > 0:
+                    batch.append(self._queue.get(timeout=remaining))
+                else:
+                    # Window closed: still take anything already queued
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect_batch()
+            texts = [text for text, _ in batch]
+
+            try:
+                embeddings = self.model.encode(
+                    texts, convert_to_numpy=True, batch_size=len(texts)
+                )
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            for (_, future), embedding in zip(batch, embeddings):
+                future.set_result(embedding)
+
+            with self._lock:
+                self.batches += 1
+                self.items += len(batch)
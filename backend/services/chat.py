@@ -7,10 +7,193 @@ IMPORTANT: This does NOT provide advice or therapy.
 It helps users express their feelings clearly, then passes to the matcher.
 """
 
+import json
 import os
-from typing import Optional
+import threading
+from typing import AsyncIterator, Optional
+
+import httpx
 import requests
 
+from .context_window import SUMMARY_PREFIX, ContextWindow, is_summary
+from .outbound import OutboundProvider
+
+
+class OpenRouterClient:
+    """
+    Shared HTTP plumbing for OpenRouter chat completions.
+
+    Holds one keep-alive connection pool per process (an httpx.AsyncClient
+    for async callers, a requests.Session for sync ones) and one
+    OutboundProvider (concurrency cap, rate limit, retries with backoff,
+    circuit breaker), so chat turns reuse TCP/TLS connections and back off
+    together when OpenRouter struggles.
+
+    Usage:
+        client = OpenRouterClient(timeout=30, requests_per_second=10)
+        chat = ChatAssistant(client=client)
+        reply = await chat.send_async("I feel lonely")
+        await client.aclose()   # on shutdown
+    """
+
+    API_URL = "https://openrouter.ai/api/v1/chat/completions"
+
+    def __init__(self,
+                 api_url: Optional[str] = None,
+                 timeout: float = 30.0,
+                 connect_timeout: float = 5.0,
+                 max_connections: int = 100,
+                 requests_per_second: Optional[float] = 10.0,
+                 max_concurrency: Optional[int] = None,
+                 max_retries: int = 3,
+                 failure_threshold: int = 5,
+                 reset_timeout: float = 30.0):
+        """
+        Args:
+            api_url: Chat completions endpoint (override to point at a mock server)
+            timeout: Seconds to wait for a response (read/write/pool)
+            connect_timeout: Seconds to wait for a connection
+            max_connections: Most concurrent connections to the API
+            requests_per_second: Shared request rate limit (None or 0 disables it)
+            max_concurrency: Most calls in flight (defaults to max_connections)
+            max_retries: Retries for 429/5xx responses and connection errors
+            failure_threshold: Consecutive failures before calls fail fast
+            reset_timeout: Seconds to fail fast before trying OpenRouter again
+        """
+        self.api_url = api_url or self.API_URL
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.max_connections = max_connections
+        self.provider = OutboundProvider(
+            'openrouter',
+            max_concurrency=max_concurrency or max_connections,
+            requests_per_second=requests_per_second,
+            max_retries=max_retries,
+            # No retry starts after the time one more attempt could take
+            deadline=2 * timeout,
+            failure_threshold=failure_threshold,
+            reset_timeout=reset_timeout,
+        )
+
+        # Both pools are created on first use (the async one inside the event loop)
+        self._async_client: Optional[httpx.AsyncClient] = None
+        self._session: Optional[requests.Session] = None
+        self._lock = threading.Lock()
+
+    def _get_async_client(self) -> httpx.AsyncClient:
+        if self._async_client is None:
+            self._async_client = httpx.AsyncClient(
+                timeout=httpx.Timeout(self.timeout, connect=self.connect_timeout),
+                limits=httpx.Limits(max_connections=self.max_connections,
+                                    max_keepalive_connections=self.max_connections),
+            )
+        return self._async_client
+
+    def _get_session(self) -> requests.Session:
+        with self._lock:
+            if self._session is None:
+                self._session = requests.Session()
+                adapter = requests.adapters.HTTPAdapter(pool_connections=1,
+                                                        pool_maxsize=self.max_connections)
+                self._session.mount("https://", adapter)
+                self._session.mount("http://", adapter)
+            return self._session
+
+    def _log_error(self, status_code: int, body: str, payload: dict):
+        # Debug logging for OpenRouter API errors
+        print(f"\n{'='*60}")
+        print("OPENROUTER API ERROR")
+        print(f"{'='*60}")
+        print(f"Status Code: {status_code}")
+        print(f"Response Body: {body}")
+        print(f"Request Model: {payload['model']}")
+        print(f"Request Messages Count: {len(payload['messages'])}")
+        print(f"{'='*60}\n")
+
+    async def post_async(self, headers: dict, payload: dict) -> dict:
+        """POST a completion request without blocking the event loop; returns the JSON body."""
+        client = self._get_async_client()
+        response = await self.provider.request_async(
+            lambda: client.post(self.api_url, headers=headers, json=payload)
+        )
+        if not response.is_success:
+            self._log_error(response.status_code, response.text, payload)
+            response.raise_for_status()
+        return response.json()
+
+    async def stream_async(self, headers: dict, payload: dict) -> AsyncIterator[str]:
+        """
+        POST a streaming completion request and yield content deltas as they arrive.
+
+        The provider's Server-Sent Events are parsed line by line, so each
+        token is passed on as soon as it is read. Opening the stream is
+        retried like post_async(); errors once tokens have been sent are not.
+        """
+        client = self._get_async_client()
+        payload = {**payload, "stream": True}
+        request = client.build_request("POST", self.api_url, headers=headers, json=payload)
+        async with self.provider.stream_async(lambda: client.send(request, stream=True)) as response:
+            if not response.is_success:
+                await response.aread()
+                self._log_error(response.status_code, response.text, payload)
+                response.raise_for_status()
+            async for line in response.aiter_lines():
+                # Skip blank separators and ': keep-alive' comments
+                if not line.startswith("data:"):
+                    continue
+                data = line[5:].strip()
+                if data == "[DONE]":
+                    break
+                chunk = json.loads(data)
+                if 'error' in chunk:
+                    raise RuntimeError(f"OpenRouter stream error: {chunk['error']}")
+                delta = chunk['choices'][0].get('delta', {}).get('content')
+                if delta:
+                    yield delta
+
+    def post(self, headers: dict, payload: dict) -> dict:
+        """Blocking version of post_async() on the shared requests.Session."""
+        session = self._get_session()
+        response = self.provider.request(
+            lambda: session.post(self.api_url, headers=headers, json=payload,
+                                 timeout=(self.connect_timeout, self.timeout))
+        )
+        if not response.ok:
+            self._log_error(response.status_code, response.text, payload)
+            response.raise_for_status()
+        return response.json()
+
+    def stats(self) -> dict:
+        """Load and counters, for /api/stats."""
+        return {
+            'api_url': self.api_url,
+            'max_connections': self.max_connections,
+            **self.provider.stats(),
+        }
+
+    async def aclose(self):
+        """Close both connection pools."""
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = None
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+
+
+_default_client: Optional[OpenRouterClient] = None
+_default_client_lock = threading.Lock()
+
+
+def default_client() -> OpenRouterClient:
+    """Process-wide client used by ChatAssistants created without one."""
+    global _default_client
+    with _default_client_lock:
+        if _default_client is None:
+            _default_client = OpenRouterClient()
+        return _default_client
+
+
 class ChatAssistant:
     """
     Conversational interface that helps users articulate their struggles.
@@ -48,12 +231,19 @@ SUMMARY:
 - Key feelings: [emotions mentioned]
 - Themes: [relevant themes like: loneliness, relationships, self-esteem, anger, rejection, belonging]"""
 
-    def __init__(self, api_key: Optional[str] = None):
+    SUMMARY_REQUEST = "Please provide a SUMMARY of what I've shared, using the format specified."
+
+    def __init__(self,
+                 api_key: Optional[str] = None,
+                 client: Optional[OpenRouterClient] = None,
+                 context: Optional[ContextWindow] = None):
         """
         Initialize chat assistant with OpenRouter API.
 
         Args:
             api_key: OpenRouter API key (or set OPENROUTER_API_KEY env var)
+            client: Shared connection pool and rate limiter (defaults to a process-wide one)
+            context: Token budget for the prompt (None sends the whole conversation)
         """
         self.api_key = api_key or os.getenv('OPENROUTER_API_KEY')
         if not self.api_key:
@@ -61,100 +251,156 @@ SUMMARY:
 
         # Use GPT-4o-mini - great quality, very cheap, reliable, no rate limits
         self.model = "openai/gpt-4o-mini"
-        self.api_url = "https://openrouter.ai/api/v1/chat/completions"
+        self.client = client or default_client()
+        self.api_url = self.client.api_url
+        self.context = context
         self.conversation_history = []
 
     def send(self, user_message: str) -> str:
         """
         Send a message and get a response.
 
+        Blocks the calling thread; from async code use send_async().
+
         Args:
             user_message: What the user said
 
         Returns:
             Assistant's response
         """
-        self.conversation_history.append({
-            "role": "user",
-            "content": user_message
-        })
+        payload = self._start_turn(user_message)
+        fold = self._fold_request()
+        if fold is not None:
+            try:
+                self._apply_fold(self.client.post(self._headers(), fold))
+            except Exception as e:
+                print(f"Warning: Summarizing older messages failed, sending recent ones only: {e}")
+            payload = self._request()
+        result = self.client.post(self._headers(), payload)
+        return self._finish_turn(result)
+
+    async def send_async(self, user_message: str) -> str:
+        """
+        Async version of send() for FastAPI handlers.
 
-        # Build messages with system prompt
-        messages = [{"role": "system", "content": self.SYSTEM_PROMPT}]
-        messages.extend(self.conversation_history)
+        Waits on the shared connection pool and rate limiter without
+        blocking the event loop, so one worker can have many chats
+        in flight at once.
+        """
+        payload = await self._start_turn_async(user_message)
+        result = await self.client.post_async(self._headers(), payload)
+        return self._finish_turn(result)
+
+    async def send_stream(self, user_message: str) -> AsyncIterator[str]:
+        """
+        Streaming version of send_async(): yields the response as it is generated.
 
-        # Call OpenRouter API
-        headers = {
+        The full response is added to conversation_history once the
+        stream ends.
+
+        Usage:
+            async for token in chat.send_stream("I feel lonely"):
+                print(token, end="")
+        """
+        payload = await self._start_turn_async(user_message)
+        parts = []
+        async for delta in self.client.stream_async(self._headers(), payload):
+            parts.append(delta)
+            yield delta
+        self._add_reply("".join(parts))
+
+    def _headers(self) -> dict:
+        return {
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json",
             "HTTP-Referer": "https://been-there.app",  # Required by OpenRouter
             "X-Title": "Been There"  # Optional but recommended
         }
 
-        payload = {
+    def _start_turn(self, user_message: str) -> dict:
+        """Record the user's message and build the completion request."""
+        self.conversation_history.append({
+            "role": "user",
+            "content": user_message
+        })
+        return self._request()
+
+    async def _start_turn_async(self, user_message: str) -> dict:
+        """_start_turn(), summarizing older messages first if they no longer fit."""
+        payload = self._start_turn(user_message)
+        fold = self._fold_request()
+        if fold is not None:
+            try:
+                self._apply_fold(await self.client.post_async(self._headers(), fold))
+            except Exception as e:
+                print(f"Warning: Summarizing older messages failed, sending recent ones only: {e}")
+            payload = self._request()
+        return payload
+
+    def _request(self, messages: Optional[list] = None) -> dict:
+        """Completion request for messages (default: the conversation, within the context window)."""
+        if messages is None:
+            # Build messages with system prompt
+            messages = [{"role": "system", "content": self.SYSTEM_PROMPT}]
+            if self.context is None:
+                messages.extend(self.conversation_history)
+            else:
+                summary, _, recent = self.context.split(self.SYSTEM_PROMPT, self.conversation_history)
+                messages.extend(([summary] if summary else []) + recent)
+
+        return {
             "model": self.model,
             "messages": messages,
             "max_tokens": 300,
             "temperature": 0.7
         }
 
-        # Add small delay to avoid rate limiting (only on subsequent requests)
-        import time
-        if len(self.conversation_history) > 0:
-            time.sleep(1.5)  # 1.5 second delay between requests
-
-        try:
-            response = requests.post(self.api_url, headers=headers, json=payload)
-            response.raise_for_status()
-        except requests.exceptions.HTTPError as e:
-            # Debug logging for OpenRouter API errors
-            print(f"\n{'='*60}")
-            print("OPENROUTER API ERROR")
-            print(f"{'='*60}")
-            print(f"Status Code: {e.response.status_code}")
-            print(f"Response Body: {e.response.text}")
-            print(f"Request Model: {self.model}")
-            print(f"Request Messages Count: {len(messages)}")
-            print(f"{'='*60}\n")
-
-            # If rate limited, suggest waiting
-            if e.response.status_code == 429:
-                print("⚠️  Rate limited! Waiting 2 seconds and retrying once...")
-                time.sleep(2)
-                # Retry once
-                try:
-                    response = requests.post(self.api_url, headers=headers, json=payload)
-                    response.raise_for_status()
-                except:
-                    raise  # If retry fails, give up
-            else:
-                raise
-
-        result = response.json()
+    def _fold_request(self) -> Optional[dict]:
+        """Request summarizing the messages that no longer fit the context window, if any."""
+        if self.context is None or not self.context.summarize:
+            return None
+        summary, folded, _ = self.context.split(self.SYSTEM_PROMPT, self.conversation_history)
+        if not folded:
+            return None
+        return self._request(self.context.summary_request(
+            self.SYSTEM_PROMPT, summary, folded, self.SUMMARY_REQUEST
+        ))
+
+    def _apply_fold(self, result: dict):
+        """Replace the folded messages (and any previous summary) with the new summary."""
+        _, _, recent = self.context.split(self.SYSTEM_PROMPT, self.conversation_history)
+        summary = self.context.summary_message(result['choices'][0]['message']['content'])
+        self.conversation_history = [summary] + recent
+
+    def _finish_turn(self, result: dict) -> str:
+        """Record the assistant's reply from a completion response."""
         assistant_message = result['choices'][0]['message']['content']
+        self._add_reply(assistant_message)
+        return assistant_message
 
+    def _add_reply(self, assistant_message: str):
         self.conversation_history.append({
             "role": "assistant",
             "content": assistant_message
         })
 
-        return assistant_message
-
     def get_summary(self) -> str:
         """
         Ask the assistant to summarize the conversation.
         Use this as input to the semantic matcher.
         """
-        return self.send("Please provide a SUMMARY of what I've shared, using the format specified.")
+        return self.send(self.SUMMARY_REQUEST)
 
     def get_user_text_for_matching(self) -> str:
         """
         Combine all user messages for matching.
         Alternative to get_summary() - uses raw text instead of LLM summary.
+        Messages already folded into a rolling summary are represented by it.
         """
         user_messages = [
-            msg['content'] for msg in self.conversation_history
-            if msg['role'] == 'user'
+            msg['content'][len(SUMMARY_PREFIX):] if is_summary(msg) else msg['content']
+            for msg in self.conversation_history
+            if msg['role'] == 'user' or is_summary(msg)
         ]
         return " ".join(user_messages)
 
@@ -14,6 +14,53 @@ import sys
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
 
+# Keyword rules: (category, score increment, [(pattern, indicator, keywords), ...]).
+# Patterns are matched against the lowercased text; indicators are
+# reported in this order. Every match of a pattern must contain at least
+# one of its keywords: patterns are only tried on texts containing one.
+PATTERN_GROUPS = [
+    # LinkedIn Lunatic patterns
+    ("linkedin_lunatic", 0.2, [
+        (r'agree\s*\??', 'agree?', ['agree']),
+        (r'thoughts\s*\??', 'thoughts?', ['thoughts']),
+        (r"i('m| am) (humbled|honored|blessed|grateful)", 'humbled/grateful', ['humbled', 'honored', 'blessed', 'grateful']),
+        (r'thought leader', 'thought leader', ['thought leader']),
+        (r'game.?changer', 'game-changer', ['changer']),
+        (r'excited to (announce|share)', 'excited to announce', ['excited to ']),
+        (r'dream job', 'dream job', ['dream job']),
+    ]),
+    # Emojis common in LinkedIn posts
+    ("linkedin_lunatic", 0.15, [
+        (r'🚀|💪|🙏|✨|🔥|💡|🎯', 'professional emojis', ['🚀', '💪', '🙏', '✨', '🔥', '💡', '🎯']),
+    ]),
+    # Body dysmorphia patterns
+    ("body_dysmorphia", 0.25, [
+        (r'hate my (body|face|looks)', 'negative body talk', ['hate my ']),
+        (r'(too|so) (fat|skinny|ugly)', 'negative self-description', ['fat', 'skinny', 'ugly']),
+        (r'(skipped?|skip(ping)?) (lunch|dinner|breakfast|meals?)', 'meal skipping', ['skip']),
+        (r'need to lose', 'weight loss focus', ['need to lose']),
+        (r'wish i (looked|was|could be)', 'appearance comparison', ['wish i ']),
+        (r'(counting|count) calories', 'calorie counting', [' calories']),
+        (r'(fasting|starving)', 'fasting mention', ['fasting', 'starving']),
+    ]),
+    # Incel patterns
+    ("incel", 0.25, [
+        (r'(women|females?|girls?) only want', 'gender generalization', [' only want']),
+        (r'(society|system|game) is rigged', 'system rigged', [' is rigged']),
+        (r'blackpill', 'blackpill', ['blackpill']),
+        (r'\bchad\b', 'chad reference', ['chad']),
+        (r'normie', 'normie', ['normie']),
+        (r'(everyone|they) reject', 'rejection focus', [' reject']),
+        (r"it'?s over\b", "it's over", ['s over']),
+    ]),
+    # General toxic patterns
+    ("toxic", 0.15, [
+        (r'\b(hate|stupid|idiot|loser|pathetic)\b', 'toxic language', ['hate', 'stupid', 'idiot', 'loser', 'pathetic']),
+        (r'\b(kill|die|death)\b', 'violent language', ['kill', 'die', 'death']),
+    ]),
+]
+
+
 class ClassifierService:
     """
     Service for classifying text and analyzing user personas.
@@ -36,6 +83,46 @@ class ClassifierService:
             "toxic",
             "normal"
         ]
+
+        # Flatten the rule table and compile it once
+        self._rules = []
+        keyword_rules = {}  # keyword -> indices of the rules it can trigger
+        for category, increment, patterns in PATTERN_GROUPS:
+            for pattern, indicator, keywords in patterns:
+                for keyword in keywords:
+                    keyword_rules.setdefault(keyword, set()).add(len(self._rules))
+                self._rules.append((category, increment, indicator, re.compile(pattern)))
+
+        # All keywords as one alternation, longest first. The scan skips
+        # past each keyword it finds, so finding one also has to count every
+        # keyword that could be hidden inside it or overlap its end
+        # (e.g. 'hate' inside 'hate my ').
+        def hidden_by(found: str, other: str) -> bool:
+            return other in found or any(
+                found.endswith(other[:n]) for n in range(1, len(other))
+            )
+
+        self._keyword_rules = {
+            found: frozenset().union(*(
+                rules for other, rules in keyword_rules.items() if hidden_by(found, other)
+            ))
+            for found in keyword_rules
+        }
+        self._keywords = re.compile('|'.join(
+            re.escape(keyword) for keyword in sorted(keyword_rules, key=len, reverse=True)
+        ))
+
+    def _find_rules(self, text_lower: str) -> set:
+        """
+        Indices of all rules whose pattern occurs anywhere in text_lower.
+
+        Same result as running re.search for each rule, but one scan for
+        keywords picks the candidate rules and only those are searched.
+        """
+        candidates = set()
+        for keyword in set(self._keywords.findall(text_lower)):
+            candidates |= self._keyword_rules[keyword]
+        return {i for i in candidates if self._rules[i][3].search(text_lower)}
     
     def classify(self, text: str) -> dict:
         """
@@ -50,65 +137,12 @@ class ClassifierService:
         text_lower = text.lower()
         scores = {cat: 0.0 for cat in self.categories}
         indicators = []
-        
-        # LinkedIn Lunatic patterns
-        linkedin_patterns = [
-            (r'agree\s*\??', 'agree?'),
-            (r'thoughts\s*\??', 'thoughts?'),
-            (r"i('m| am) (humbled|honored|blessed|grateful)", 'humbled/grateful'),
-            (r'thought leader', 'thought leader'),
-            (r'game.?changer', 'game-changer'),
-            (r'excited to (announce|share)', 'excited to announce'),
-            (r'dream job', 'dream job'),
-        ]
-        for pattern, indicator in linkedin_patterns:
-            if re.search(pattern, text_lower):
-                scores["linkedin_lunatic"] += 0.2
-                indicators.append(indicator)
-        
-        # Check for emojis common in LinkedIn posts
-        if re.search(r'🚀|💪|🙏|✨|🔥|💡|🎯', text):
-            scores["linkedin_lunatic"] += 0.15
-            indicators.append("professional emojis")
-        
-        # Body dysmorphia patterns
-        body_patterns = [
-            (r'hate my (body|face|looks)', 'negative body talk'),
-            (r'(too|so) (fat|skinny|ugly)', 'negative self-description'),
-            (r'(skipped?|skip(ping)?) (lunch|dinner|breakfast|meals?)', 'meal skipping'),
-            (r'need to lose', 'weight loss focus'),
-            (r'wish i (looked|was|could be)', 'appearance comparison'),
-            (r'(counting|count) calories', 'calorie counting'),
-            (r'(fasting|starving)', 'fasting mention'),
-        ]
-        for pattern, indicator in body_patterns:
-            if re.search(pattern, text_lower):
-                scores["body_dysmorphia"] += 0.25
-                indicators.append(indicator)
-        
-        # Incel patterns
-        incel_patterns = [
-            (r'(women|females?|girls?) only want', 'gender generalization'),
-            (r'(society|system|game) is rigged', 'system rigged'),
-            (r'blackpill', 'blackpill'),
-            (r'\bchad\b', 'chad reference'),
-            (r'normie', 'normie'),
-            (r'(everyone|they) reject', 'rejection focus'),
-            (r"it'?s over\b", "it's over"),
-        ]
-        for pattern, indicator in incel_patterns:
-            if re.search(pattern, text_lower):
-                scores["incel"] += 0.25
-                indicators.append(indicator)
-        
-        # General toxic patterns
-        toxic_patterns = [
-            (r'\b(hate|stupid|idiot|loser|pathetic)\b', 'toxic language'),
-            (r'\b(kill|die|death)\b', 'violent language'),
-        ]
-        for pattern, indicator in toxic_patterns:
-            if re.search(pattern, text_lower):
-                scores["toxic"] += 0.15
+
+        # Apply every rule that matched, in rule order
+        hits = self._find_rules(text_lower)
+        for i, (category, increment, indicator, _) in enumerate(self._rules):
+            if i in hits:
+                scores[category] += increment
                 indicators.append(indicator)
         
         # Normalize scores
@@ -0,0 +1,132 @@
+"""
+Context Window
+
+Keeps the prompt ChatAssistant sends to the model within a token budget.
+
+Without it every turn resends the system prompt plus the whole
+conversation, so prompt tokens (and latency and cost) grow with every
+message. Two strategies, applied once the budget is exceeded:
+
+    sliding window   only the most recent messages are sent
+    rolling summary  older messages are replaced by a summary in the
+                     assistant's own SUMMARY format, so their themes are
+                     still in context; the summary is itself re-summarized
+                     as the conversation keeps growing
+
+Token counts come from estimate_tokens(), a local approximation of
+BPE tokenizers (no tokenizer download or API call); it errs slightly high
+so the real prompt stays under budget.
+"""
+
+import re
+from typing import List, Optional, Tuple
+
+# Letter runs, digit runs, and any other single non-space character
+_PIECES = re.compile(r"[A-Za-z]+|[0-9]+|\S")
+
+# Chat formats add a few tokens per message (role, separators) and to prime the reply
+MESSAGE_OVERHEAD = 4
+REPLY_PRIMING = 3
+
+# How the rolling summary is stored in conversation_history
+SUMMARY_PREFIX = "Summary of the conversation so far:\n"
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Approximate token count of text.
+
+    Common English words are one token and longer ones one more per six
+    letters, digits go in groups of three, and every other character
+    (punctuation, emoji, non-Latin scripts) counts as one token.
+    """
+    tokens = 0
+    for piece in _PIECES.findall(text):
+        first = piece[0]
+        if first.isascii() and first.isalpha():
+            tokens += 1 + (len(piece) - 1) // 6
+        elif first.isdigit() and first.isascii():
+            tokens += (len(piece) + 2) // 3
+        else:
+            tokens += 1
+    return tokens
+
+
+def estimate_message_tokens(messages: List[dict]) -> int:
+    """Approximate prompt tokens of a chat completion request."""
+    return sum(estimate_tokens(m['content']) + MESSAGE_OVERHEAD for m in messages) + REPLY_PRIMING
+
+
+def is_summary(message: dict) -> bool:
+    return message['role'] == 'system' and message['content'].startswith(SUMMARY_PREFIX)
+
+
+class ContextWindow:
+    """
+    Token budget for the messages sent on each chat turn.
+
+    Usage:
+        window = ContextWindow(max_tokens=1500)
+        chat = ChatAssistant(context=window)
+        chat.send("...")   # older turns are summarized once the budget is exceeded
+    """
+
+    def __init__(self,
+                 max_tokens: int = 1500,
+                 min_recent_messages: int = 4,
+                 summarize: bool = True,
+                 summary_target: float = 0.5):
+        """
+        Args:
+            max_tokens: Most prompt tokens per request (system prompt included)
+            min_recent_messages: Latest messages always sent as they are
+            summarize: Fold old messages into a rolling summary (False: just drop them)
+            summary_target: After folding, the recent messages use at most this
+                share of the budget, so a summary is needed only every few turns
+        """
+        self.max_tokens = max_tokens
+        self.min_recent_messages = min_recent_messages
+        self.summarize = summarize
+        self.summary_target = summary_target
+
+    def split(self, system_prompt: str, history: List[dict]) -> Tuple[Optional[dict], List[dict], List[dict]]:
+        """
+        Divide history into (summary message or None, messages to fold away, messages to keep).
+
+        Nothing is folded while the whole prompt fits the budget. Otherwise
+        the kept messages are the most recent ones that fit in
+        summary_target of what the system prompt and summary leave free
+        (at least min_recent_messages), starting at a user message.
+        """
+        summary = history[0] if history and is_summary(history[0]) else None
+        messages = history[1:] if summary else history
+        fixed = [{"role": "system", "content": system_prompt}] + ([summary] if summary else [])
+        if estimate_message_tokens(fixed + messages) <= self.max_tokens:
+            return summary, [], messages
+
+        free = self.max_tokens - estimate_message_tokens(fixed)
+        target = free * self.summary_target if self.summarize else free
+        start = len(messages)
+        used = 0
+        while start > 0:
+            cost = estimate_tokens(messages[start - 1]['content']) + MESSAGE_OVERHEAD
+            if used + cost > target and len(messages) - start >= self.min_recent_messages:
+                break
+            used += cost
+            start -= 1
+        # Start the window at a user message, so the model never sees a reply without its question
+        while start < len(messages) - 1 and messages[start]['role'] != 'user':
+            start += 1
+        return summary, messages[:start], messages[start:]
+
+    def summary_request(self, system_prompt: str, summary: Optional[dict],
+                        folded: List[dict], instruction: str) -> List[dict]:
+        """Messages asking the model to summarize the folded turns (and the previous summary)."""
+        messages = [{"role": "system", "content": system_prompt}]
+        if summary:
+            messages.append(summary)
+        return messages + folded + [{"role": "user", "content": instruction}]
+
+    @staticmethod
+    def summary_message(text: str) -> dict:
+        return {"role": "system", "content": SUMMARY_PREFIX + text.strip()}
@@ -0,0 +1,115 @@
+"""
+Embedding Store
+
+Pickle-free on-disk format for mentor post embeddings.
+
+A store is a directory:
+- embeddings.npy: L2-normalized float32 matrix, opened with
+  np.load(mmap_mode='r') so every uvicorn worker shares the same pages
+  through the OS page cache instead of holding a private copy
+- posts.json: post metadata, stored column by column
+
+Convert an existing pickle with scripts/convert_embeddings.py.
+"""
+
+import json
+import pickle
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .vector_index import is_normalized, normalize_embeddings
+
+EMBEDDINGS_FILE = 'embeddings.npy'
+POSTS_FILE = 'posts.json'
+FORMAT_VERSION = 1
+
+# Only needed to generate embeddings, not to serve matches
+INTERNAL_COLUMNS = ['_text_for_embedding']
+
+
+def is_store(path) -> bool:
+    """True if path is an embedding store directory."""
+    return (Path(path) / EMBEDDINGS_FILE).exists()
+
+
+def _json_default(value):
+    """Make NumPy scalars and other stray types JSON-serializable."""
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    return str(value)
+
+
+def save_store(dirpath, posts: pd.DataFrame, embeddings: np.ndarray, model_name: str):
+    """
+    Write posts and embeddings to a store directory.
+
+    Args:
+        dirpath: Store directory (created if missing)
+        posts: Post metadata, one row per embedding
+        embeddings: Embedding matrix (normalized here if it isn't already)
+        model_name: Sentence-transformer model the embeddings came from
+    """
+    if len(posts) != len(embeddings):
+        raise ValueError(f"{len(posts)} posts but {len(embeddings)} embeddings")
+
+    dirpath = Path(dirpath)
+    dirpath.mkdir(parents=True, exist_ok=True)
+
+    # Write normalized rows unchanged: normalizing twice shifts the low
+    # bits, and saved indexes are fingerprinted on these exact values
+    if not is_normalized(embeddings):
+        embeddings = normalize_embeddings(embeddings)
+    np.save(dirpath / EMBEDDINGS_FILE, embeddings)
+
+    posts = posts.drop(columns=INTERNAL_COLUMNS, errors='ignore')
+    with open(dirpath / POSTS_FILE, 'w', encoding='utf-8') as f:
+        json.dump({
+            'format_version': FORMAT_VERSION,
+            'model_name': model_name,
+            'num_posts': len(posts),
+            'columns': {col: posts[col].tolist() for col in posts.columns},
+        }, f, default=_json_default, ensure_ascii=False)
+
+
+def load_store(dirpath) -> tuple[pd.DataFrame, np.ndarray, str]:
+    """
+    Open a store directory.
+
+    The embedding matrix is memory-mapped read-only, so this costs the
+    same regardless of corpus size; pages are read on first use.
+
+    Returns:
+        (posts, embeddings, model_name)
+    """
+    dirpath = Path(dirpath)
+
+    embeddings = np.load(dirpath / EMBEDDINGS_FILE, mmap_mode='r')
+
+    with open(dirpath / POSTS_FILE, 'r', encoding='utf-8') as f:
+        meta = json.load(f)
+
+    posts = pd.DataFrame(meta['columns'])
+    if len(posts) != len(embeddings):
+        raise ValueError(f"Corrupt store at {dirpath}: {len(posts)} posts "
+                         f"but {len(embeddings)} embeddings")
+
+    return posts, embeddings, meta.get('model_name')
+
+
+def convert_pickle(pkl_path, dirpath):
+    """
+    One-shot conversion of a legacy mentor_embeddings.pkl into a store.
+
+    Args:
+        pkl_path: File written by SemanticMatcher.save_embeddings() before
+            the store format existed
+        dirpath: Store directory to create
+    """
+    with open(pkl_path, 'rb') as f:
+        data = pickle.load(f)
+
+    save_store(dirpath, data['posts'], data['embeddings'], data.get('model_name'))
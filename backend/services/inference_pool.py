@@ -0,0 +1,94 @@
+"""
+Inference Pool
+
+Bounded thread pool for CPU-bound model calls made from async handlers.
+
+Running matcher.match / moderator.predict directly in an `async def`
+handler blocks the event loop, so one slow encode stalls every request
+on the worker, /api/health included. The pool moves those calls onto
+worker threads and caps how much work can pile up: once all workers are
+busy and the queue is full, new calls are rejected immediately so the
+API can answer with a backpressure response instead of queueing forever.
+"""
+
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class PoolSaturatedError(Exception):
+    """Raised when the pool's workers and queue are all in use."""
+
+
+class InferencePool:
+    """
+    Thread pool with a hard limit on running + queued calls.
+
+    Usage:
+        pool = InferencePool(max_workers=16, max_queue=64)
+        result = await pool.run(matcher.match, "I feel lonely", top_k=5)
+    """
+
+    def __init__(self, max_workers: int = 16, max_queue: int = 64):
+        """
+        Args:
+            max_workers: Threads running model calls at once
+            max_queue: Calls allowed to wait for a free thread
+        """
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="inference")
+        self._slots = threading.BoundedSemaphore(max_workers + max_queue)
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+
+    async def run(self, fn, *args, **kwargs):
+        """
+        Run fn(*args, **kwargs) on a pool thread and await its result.
+
+        Raises:
+            PoolSaturatedError: If max_workers + max_queue calls are already pending
+        """
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise PoolSaturatedError(
+                f"Inference pool full ({self.max_workers} running, {self.max_queue} queued)"
+            )
+
+        with self._lock:
+            self.in_flight += 1
+
+        try:
+            future = self._executor.submit(functools.partial(fn, *args, **kwargs))
+        except BaseException:
+            self._release(None)
+            raise
+
+        # Free the slot when the call really finishes, even if the awaiting
+        # request is cancelled first (e.g. the client disconnects)
+        future.add_done_callback(self._release)
+        return await asyncio.wrap_future(future)
+
+    def _release(self, _future):
+        with self._lock:
+            self.in_flight -= 1
+            self.completed += 1
+        self._slots.release()
+
+    def stats(self) -> dict:
+        """Current load and counters, for /api/stats."""
+        with self._lock:
+            return {
+                'max_workers': self.max_workers,
+                'max_queue': self.max_queue,
+                'in_flight': self.in_flight,
+                'completed': self.completed,
+                'rejected': self.rejected,
+            }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
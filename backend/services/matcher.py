@@ -6,13 +6,26 @@ This is the CORE AI component of the Been There platform.
 """
 
 from sentence_transformers import SentenceTransformer
-from sklearn.metrics.pairwise import cosine_similarity
 import numpy as np
+import os
 import pandas as pd
 import pickle
+import threading
 from pathlib import Path
 from typing import Optional
 
+from .batch_encoder import BatchingEncoder
+from .embedding_store import is_store, load_store, save_store
+from .query_cache import QueryEmbeddingCache, normalize_query
+from .vector_index import (
+    BruteForceIndex,
+    create_index,
+    is_normalized,
+    load_index,
+    normalize_embeddings,
+    save_index,
+)
+
 
 class SemanticMatcher:
     """
@@ -23,14 +36,20 @@ class SemanticMatcher:
     Usage:
         matcher = SemanticMatcher()
         matcher.load_mentor_posts('data/mentor_posts.csv')
-        matcher.save_embeddings('data/mentor_embeddings.pkl')
+        matcher.save_embeddings('data/mentor_embeddings')  # store directory
+
+        # Optional: approximate search for large corpora
+        matcher.build_index('ivf', n_probe=8)
+        matcher.save_index('data/mentor_embeddings.index.npz')
 
-        # Later (fast startup):
-        matcher.load_embeddings('data/mentor_embeddings.pkl')
+        # Later (fast startup, embeddings are memory-mapped):
+        matcher.load_embeddings('data/mentor_embeddings')
+        matcher.load_index('data/mentor_embeddings.index.npz')  # optional
         matches = matcher.match("I feel so lonely", top_k=5)
     """
 
-    def __init__(self, model_name: str = 'all-MiniLM-L6-v2'):
+    def __init__(self, model_name: str = 'all-MiniLM-L6-v2',
+                 query_cache_size: int = 1024, query_cache_ttl: float = 3600):
         """
         Initialize with a sentence-transformer model.
 
@@ -39,12 +58,30 @@ class SemanticMatcher:
         - 'all-mpnet-base-v2': Slower, best quality
 
         The model downloads automatically on first use (~90MB).
+
+        Repeated queries are served from an LRU cache of query embeddings
+        (query_cache_size entries, each kept query_cache_ttl seconds;
+        size 0 disables it).
         """
         print(f"Loading embedding model: {model_name}")
         self.model = SentenceTransformer(model_name)
         self.model_name = model_name
         self.mentor_posts: Optional[pd.DataFrame] = None
+        # L2-normalized float32 rows, so cosine similarity is a dot product
         self.mentor_embeddings: Optional[np.ndarray] = None
+        # Search index over mentor_embeddings (exact brute-force by default)
+        self.index = BruteForceIndex()
+        # Optional micro-batching of concurrent query encodes (see enable_batching)
+        self.encoder: Optional[BatchingEncoder] = None
+        # Query embeddings keyed on (model_name, normalized text)
+        self.query_cache = QueryEmbeddingCache(query_cache_size, query_cache_ttl)
+        # Precomputed moderation verdicts (see set_moderator): safe_mask[i] is
+        # False for risky posts, which are excluded inside the search
+        self.moderator = None
+        self.safe_mask: Optional[np.ndarray] = None
+        self._corpus_version = 0
+        self._mask_key: Optional[tuple] = None
+        self._mask_lock = threading.Lock()
 
     def load_mentor_posts_from_list(self, posts: list[dict]):
         """
@@ -100,12 +137,15 @@ class SemanticMatcher:
         texts = self.mentor_posts['_text_for_embedding'].tolist()
         print(f"Generating embeddings for {len(texts)} posts...")
 
-        self.mentor_embeddings = self.model.encode(
+        self.mentor_embeddings = normalize_embeddings(self.model.encode(
             texts,
             show_progress_bar=True,
             convert_to_numpy=True,
             batch_size=32
-        )
+        ))
+
+        self.index = BruteForceIndex().build(self.mentor_embeddings)
+        self._corpus_version += 1
 
         print(f"Embeddings generated. Shape: {self.mentor_embeddings.shape}")
 
@@ -114,12 +154,27 @@ class SemanticMatcher:
         Save pre-computed embeddings to disk for faster startup.
 
         Args:
-            filepath: Where to save (e.g., 'data/mentor_embeddings.pkl')
+            filepath: Store directory (e.g., 'data/mentor_embeddings'), or a
+                '.pkl' file for the legacy pickle format
         """
         if self.mentor_embeddings is None:
             raise ValueError("No embeddings to save. Call load_mentor_posts_from_list() first.")
 
         filepath = Path(filepath)
+
+        if filepath.suffix != '.pkl':
+            save_store(filepath, self.mentor_posts, self.mentor_embeddings, self.model_name)
+            # Index from exactly what was written: load_index() checks the
+            # index against the store's fingerprint at startup
+            saved = load_store(filepath)[1]
+            if not np.array_equal(saved, self.mentor_embeddings):
+                self.mentor_embeddings = saved
+                self.index = BruteForceIndex().build(saved)
+            size = sum(f.stat().st_size for f in filepath.iterdir())
+            print(f"Saved embeddings to {filepath}")
+            print(f"  Store size: {size / 1024 / 1024:.1f} MB")
+            return
+
         filepath.parent.mkdir(parents=True, exist_ok=True)
 
         with open(filepath, 'wb') as f:
@@ -136,21 +191,175 @@ class SemanticMatcher:
         """
         Load pre-computed embeddings from disk (fast startup).
 
+        A store directory is memory-mapped (shared between worker processes);
+        a legacy '.pkl' file is unpickled into this process.
+
         Args:
-            filepath: Path to saved embeddings file
+            filepath: Path to a store directory or saved .pkl file
         """
-        with open(filepath, 'rb') as f:
-            data = pickle.load(f)
-
-        self.mentor_posts = data['posts']
-        self.mentor_embeddings = data['embeddings']
-
-        if 'model_name' in data and data['model_name'] != self.model_name:
-            print(f"Warning: Embeddings were created with {data['model_name']}, "
+        if is_store(filepath):
+            # Stored already normalized; keep the read-only memory map as is
+            self.mentor_posts, self.mentor_embeddings, model_name = load_store(filepath)
+        else:
+            with open(filepath, 'rb') as f:
+                data = pickle.load(f)
+
+            self.mentor_posts = data['posts']
+            # Older files hold raw model output; normalize once here, not per
+            # request (newer ones are already normalized and kept as saved)
+            embeddings = data['embeddings']
+            self.mentor_embeddings = (embeddings if is_normalized(embeddings)
+                                      else normalize_embeddings(embeddings))
+            model_name = data.get('model_name')
+
+        self.index = BruteForceIndex().build(self.mentor_embeddings)
+        self._corpus_version += 1
+
+        if model_name and model_name != self.model_name:
+            print(f"Warning: Embeddings were created with {model_name}, "
                   f"but current model is {self.model_name}")
 
         print(f"Loaded {len(self.mentor_posts)} posts with embeddings from {filepath}")
 
+    def build_index(self, kind: str = 'brute', **params):
+        """
+        Build a search index over the loaded embeddings.
+
+        Args:
+            kind: 'brute' (exact, default) or 'ivf' (approximate, faster on
+                large corpora)
+            **params: Index options, e.g. n_lists / n_probe for 'ivf'
+        """
+        if self.mentor_embeddings is None:
+            raise ValueError("No embeddings to index. Call load_mentor_posts_from_list() or load_embeddings() first.")
+
+        print(f"Building '{kind}' index over {len(self.mentor_embeddings)} posts...")
+        self.index = create_index(kind, **params).build(self.mentor_embeddings)
+
+    def save_index(self, filepath: str):
+        """
+        Save the search index next to the embeddings.
+
+        Args:
+            filepath: Where to save (e.g., 'data/mentor_embeddings.index.npz')
+        """
+        save_index(self.index, filepath)
+        print(f"Saved '{self.index.kind}' index to {filepath}")
+
+    def load_index(self, filepath: str):
+        """
+        Load a search index saved with save_index().
+
+        Must be called after load_embeddings() with the matching embeddings.
+        """
+        if self.mentor_embeddings is None:
+            raise ValueError("Load embeddings before loading an index.")
+
+        self.index = load_index(filepath, self.mentor_embeddings)
+        print(f"Loaded '{self.index.kind}' index from {filepath}")
+
+    def build_index_from_env(self, filepath: str):
+        """
+        Build and save the search index configured by the environment.
+
+        MATCHER_INDEX picks the kind ('brute' by default, or 'ivf'), and
+        MATCHER_IVF_LISTS / MATCHER_IVF_NPROBE set n_lists / n_probe.
+        Brute-force search needs no index file, so a stale one at
+        filepath is removed instead.
+
+        Args:
+            filepath: Where to save (e.g., from vector_index.index_path_for())
+        """
+        kind = os.getenv("MATCHER_INDEX", "brute")
+        filepath = Path(filepath)
+        if kind == "brute":
+            if filepath.exists():
+                # A stale index would no longer match the new embeddings
+                filepath.unlink()
+                print(f"Removed stale index {filepath}")
+            return
+
+        params = {}
+        if os.getenv("MATCHER_IVF_LISTS"):
+            params["n_lists"] = int(os.getenv("MATCHER_IVF_LISTS"))
+        if os.getenv("MATCHER_IVF_NPROBE"):
+            params["n_probe"] = int(os.getenv("MATCHER_IVF_NPROBE"))
+        self.build_index(kind, **params)
+        self.save_index(str(filepath))
+
+    def set_moderator(self, moderator):
+        """
+        Exclude posts the moderator flags as risky from all matches.
+
+        Every post is moderated once (one predict_batch call) and the
+        verdicts are kept as a boolean mask aligned with mentor_embeddings.
+        The mask is rebuilt automatically when the corpus is reloaded or
+        the moderator is retrained/reloaded, so nothing is re-moderated
+        per request.
+
+        Args:
+            moderator: ContentModerator (or None to stop filtering)
+        """
+        self.moderator = moderator
+        self._refresh_safe_mask()
+
+    def _refresh_safe_mask(self):
+        """Rebuild safe_mask if the corpus or the moderator model changed."""
+        moderator = self.moderator
+        if moderator is None or not moderator.is_trained or self.mentor_posts is None:
+            self.safe_mask = None
+            self._mask_key = None
+            return
+
+        key = (id(moderator), moderator.version, self._corpus_version)
+        if key == self._mask_key:
+            return
+
+        with self._mask_lock:
+            if key == self._mask_key:
+                return
+            if 'content' in self.mentor_posts.columns:
+                contents = self.mentor_posts['content'].tolist()
+            else:
+                contents = [''] * len(self.mentor_posts)
+            verdicts = moderator.predict_batch(contents)
+            self.safe_mask = np.array([not v['is_risky'] for v in verdicts], dtype=bool)
+            self._mask_key = key
+            print(f"Moderated {len(self.safe_mask)} mentor posts "
+                  f"({int((~self.safe_mask).sum())} excluded as risky)")
+
+    def enable_batching(self, max_batch_size: int = 32, max_wait_ms: float = 5.0):
+        """
+        Encode concurrent match() queries together in one forward pass.
+
+        Only helps when match() is called from several threads at once
+        (e.g. the API's worker threads).
+
+        Args:
+            max_batch_size: Most queries encoded in one batch
+            max_wait_ms: How long a query waits for others to join its batch
+        """
+        self.encoder = BatchingEncoder(self.model, max_batch_size, max_wait_ms)
+        print(f"Query batching enabled (max {max_batch_size} queries, {max_wait_ms} ms window)")
+
+    def _encode_query(self, user_text: str) -> np.ndarray:
+        """Embed user text as a normalized vector (cached)."""
+        # The normalized text is only the cache key; the model sees what the
+        # user wrote, so cased models and NFKC-sensitive text match as before
+        cache_key = (self.model_name, normalize_query(user_text))
+        embedding = self.query_cache.get(cache_key)
+        if embedding is not None:
+            return embedding
+
+        if self.encoder is not None:
+            embedding = self.encoder.encode(user_text)
+        else:
+            embedding = self.model.encode([user_text], convert_to_numpy=True)[0]
+        embedding = normalize_embeddings(embedding)
+
+        self.query_cache.put(cache_key, embedding)
+        return embedding
+
     def match(self, user_text: str, top_k: int = 5,
               min_similarity: float = 0.2) -> list[dict]:
         """
@@ -179,18 +388,18 @@ class SemanticMatcher:
             return []
 
         # Embed user text
-        user_embedding = self.model.encode([user_text], convert_to_numpy=True)
-
-        # Calculate cosine similarity to all mentor posts
-        similarities = cosine_similarity(user_embedding, self.mentor_embeddings)[0]
+        user_embedding = self._encode_query(user_text)
 
-        # Get indices of top matches (sorted descending)
-        top_indices = np.argsort(similarities)[::-1][:top_k * 2]  # Get extra for filtering
+        # Cosine similarity to mentor posts (rows are pre-normalized),
+        # top matches sorted descending, risky posts excluded
+        self._refresh_safe_mask()
+        top_indices, top_scores = self.index.search(
+            user_embedding, top_k * 2, mask=self.safe_mask  # Get extra for filtering
+        )
 
         # Build results
         results = []
-        for idx in top_indices:
-            sim = similarities[idx]
+        for idx, sim in zip(top_indices, top_scores):
             if sim >= min_similarity and len(results) < top_k:
                 post_data = self.mentor_posts.iloc[idx].to_dict()
                 post_data['similarity_score'] = float(sim)
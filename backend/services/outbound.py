@@ -0,0 +1,410 @@
+"""
+Outbound Calls
+
+Shared resilience layer for calls to external LLM providers.
+
+Each provider (OpenRouter, ...) gets one OutboundProvider that every
+caller goes through:
+
+    concurrency cap  at most max_concurrency calls in flight; callers wait
+                     up to acquire_timeout for a slot, then fail with
+                     ProviderBusyError instead of piling up
+    rate limit       optional shared RateLimiter, taken per attempt
+    retries          429/5xx responses and connection errors/timeouts are
+                     retried with exponential backoff and full jitter,
+                     honouring Retry-After, within an overall deadline
+    circuit breaker  after failure_threshold consecutive failures (5xx or
+                     transport errors) calls fail at once with
+                     CircuitOpenError for reset_timeout seconds; then one
+                     probe call decides whether to close it again
+
+Works for both requests (sync) and httpx (async, including streamed
+responses); the caller passes a zero-argument function that sends one
+attempt and returns the response.
+"""
+
+import asyncio
+import random
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+import httpx
+import requests
+
+from .rate_limit import RateLimiter
+
+# Responses worth retrying, and those that count against the circuit breaker
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+FAILURE_STATUSES = frozenset({500, 502, 503, 504})
+
+# Errors that mean the attempt never got a response
+TRANSPORT_ERRORS = (
+    requests.exceptions.ConnectionError,
+    requests.exceptions.Timeout,
+    httpx.TransportError,
+)
+
+
+class OutboundError(Exception):
+    """A call was refused without reaching the provider."""
+
+    def __init__(self, message: str, retry_after: float = 1.0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class CircuitOpenError(OutboundError):
+    """Raised while the provider's circuit breaker is open."""
+
+
+class ProviderBusyError(OutboundError):
+    """Raised when no concurrency slot frees up within acquire_timeout."""
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Retry-After header in seconds (delta-seconds or HTTP date), or None."""
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class CircuitBreaker:
+    """
+    Thread-safe closed/open/half-open circuit breaker.
+
+    Usage:
+        breaker = CircuitBreaker(failure_threshold=5, reset_timeout=30)
+        breaker.before_call()            # raises CircuitOpenError while open
+        ...
+        breaker.record(success)
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        """
+        Args:
+            failure_threshold: Consecutive failures that open the circuit
+            reset_timeout: Seconds to stay open before letting a probe call through
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._probing = False
+        self.times_opened = 0
+        self.rejected = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state(time.monotonic())
+
+    def _state(self, now: float) -> str:
+        if self._opened_at is None:
+            return 'closed'
+        if now - self._opened_at >= self.reset_timeout:
+            return 'half_open'
+        return 'open'
+
+    def before_call(self):
+        """Let the call through, or raise CircuitOpenError."""
+        with self._lock:
+            now = time.monotonic()
+            state = self._state(now)
+            if state == 'closed':
+                return
+            if state == 'half_open' and not self._probing:
+                self._probing = True  # this call is the probe; the rest keep failing fast
+                return
+            self.rejected += 1
+            wait = max(0.0, self.reset_timeout - (now - self._opened_at)) if state == 'open' else 1.0
+        raise CircuitOpenError("Provider unavailable (circuit open)", retry_after=max(wait, 1.0))
+
+    def record(self, success: bool):
+        with self._lock:
+            self._probing = False
+            if success:
+                self._failures = 0
+                self._opened_at = None
+                return
+            self._failures += 1
+            if self._opened_at is not None or self._failures >= self.failure_threshold:
+                if self._opened_at is None:
+                    self.times_opened += 1
+                # A failed probe restarts the open period
+                self._opened_at = time.monotonic()
+
+    def release_probe(self):
+        """The probe ended without a verdict (e.g. a 4xx); let the next call probe."""
+        with self._lock:
+            self._probing = False
+
+
+class OutboundProvider:
+    """
+    Concurrency cap, rate limit, retries and circuit breaker for one provider.
+
+    Usage:
+        openrouter = OutboundProvider('openrouter', max_concurrency=32, requests_per_second=10)
+
+        response = openrouter.request(lambda: session.post(url, json=payload, timeout=30))
+        response = await openrouter.request_async(lambda: client.post(url, json=payload))
+
+        async with openrouter.stream_async(
+                lambda: client.send(client.build_request("POST", url, json=payload), stream=True)
+        ) as response:
+            async for line in response.aiter_lines():
+                ...
+
+    The final response is returned whatever its status (after retries), so
+    callers still decide how to report errors; transport errors are
+    re-raised once retries run out.
+    """
+
+    def __init__(self,
+                 name: str,
+                 max_concurrency: int = 32,
+                 acquire_timeout: float = 5.0,
+                 requests_per_second: Optional[float] = None,
+                 max_retries: int = 3,
+                 base_delay: float = 0.5,
+                 max_delay: float = 8.0,
+                 deadline: Optional[float] = 60.0,
+                 failure_threshold: int = 5,
+                 reset_timeout: float = 30.0):
+        """
+        Args:
+            name: Provider name, for logs and stats
+            max_concurrency: Most calls in flight at once (sync and async callers are capped separately)
+            acquire_timeout: Seconds to wait for a free slot before ProviderBusyError
+            requests_per_second: Shared request rate limit (None or 0 disables it)
+            max_retries: Retries after the first attempt
+            base_delay: Backoff before the first retry (doubles each time, full jitter)
+            max_delay: Longest single backoff
+            deadline: Seconds after which no more retries start (None for no limit)
+            failure_threshold: Consecutive failures that open the circuit
+            reset_timeout: Seconds the circuit stays open before a probe call
+        """
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.acquire_timeout = acquire_timeout
+        self.limiter = RateLimiter(requests_per_second) if requests_per_second else None
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline = deadline
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._async_slots: Optional[asyncio.Semaphore] = None  # created inside the event loop
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.calls = 0
+        self.retries = 0
+        self.busy = 0
+        self.failed = 0
+
+    # --- bookkeeping ---------------------------------------------------------
+
+    def _enter(self):
+        with self._lock:
+            self.calls += 1
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+
+    def _exit(self):
+        with self._lock:
+            self.in_flight -= 1
+
+    def _count(self, counter: str):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def _busy_error(self) -> ProviderBusyError:
+        self._count('busy')
+        return ProviderBusyError(
+            f"Too many calls to {self.name} in flight ({self.max_concurrency})", retry_after=1.0
+        )
+
+    def backoff_delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """
+        Seconds to wait before retry number `attempt` (0-based).
+
+        A random delay between 0 and base_delay * 2**attempt (capped at
+        max_delay), so callers that failed together do not retry together;
+        a server-provided Retry-After is honoured as a lower bound.
+        """
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        return delay
+
+    def _next_delay(self, attempt: int, started: float, response=None) -> Optional[float]:
+        """Backoff before the next attempt, or None if there should be no retry."""
+        if attempt >= self.max_retries:
+            return None
+        retry_after = parse_retry_after(response.headers.get('Retry-After')) if response is not None else None
+        delay = self.backoff_delay(attempt, retry_after)
+        if self.deadline is not None and time.monotonic() - started + delay > self.deadline:
+            return None
+        return delay
+
+    def _judge(self, response) -> bool:
+        """Record a response with the breaker; True if it is worth retrying."""
+        status = response.status_code
+        if status in FAILURE_STATUSES:
+            self.breaker.record(False)
+        elif status < 400:
+            self.breaker.record(True)
+        else:
+            self.breaker.release_probe()  # 429 and other 4xx say nothing about the provider's health
+        return status in RETRY_STATUSES
+
+    # --- sync ----------------------------------------------------------------
+
+    @contextmanager
+    def _slot(self):
+        if not self._slots.acquire(timeout=self.acquire_timeout):
+            raise self._busy_error()
+        self._enter()
+        try:
+            yield
+        finally:
+            self._exit()
+            self._slots.release()
+
+    def _attempts(self, send):
+        started = time.monotonic()
+        attempt = 0
+        while True:
+            self.breaker.before_call()
+            if self.limiter is not None:
+                self.limiter.acquire()
+            try:
+                response = send()
+            except TRANSPORT_ERRORS:
+                self.breaker.record(False)
+                delay = self._next_delay(attempt, started)
+                if delay is None:
+                    self._count('failed')
+                    raise
+            except BaseException:
+                # Cancelled or a bug in send(): no verdict on the provider
+                self.breaker.release_probe()
+                raise
+            else:
+                if not self._judge(response):
+                    return response
+                delay = self._next_delay(attempt, started, response)
+                if delay is None:
+                    self._count('failed')
+                    return response
+                response.close()
+            self._count('retries')
+            time.sleep(delay)
+            attempt += 1
+
+    def request(self, send):
+        """Call send() (returning a requests.Response) with retries; blocks the calling thread."""
+        with self._slot():
+            return self._attempts(send)
+
+    # --- async ---------------------------------------------------------------
+
+    @asynccontextmanager
+    async def _slot_async(self):
+        if self._async_slots is None:
+            self._async_slots = asyncio.Semaphore(self.max_concurrency)
+        try:
+            await asyncio.wait_for(self._async_slots.acquire(), self.acquire_timeout)
+        except asyncio.TimeoutError:
+            raise self._busy_error() from None
+        self._enter()
+        try:
+            yield
+        finally:
+            self._exit()
+            self._async_slots.release()
+
+    async def _attempts_async(self, send):
+        started = time.monotonic()
+        attempt = 0
+        while True:
+            self.breaker.before_call()
+            if self.limiter is not None:
+                await self.limiter.acquire_async()
+            try:
+                response = await send()
+            except TRANSPORT_ERRORS:
+                self.breaker.record(False)
+                delay = self._next_delay(attempt, started)
+                if delay is None:
+                    self._count('failed')
+                    raise
+            except BaseException:
+                # Cancelled or a bug in send(): no verdict on the provider
+                self.breaker.release_probe()
+                raise
+            else:
+                if not self._judge(response):
+                    return response
+                delay = self._next_delay(attempt, started, response)
+                if delay is None:
+                    self._count('failed')
+                    return response
+                await response.aclose()
+            self._count('retries')
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def request_async(self, send) -> httpx.Response:
+        """Await send() (returning an httpx.Response) with retries."""
+        async with self._slot_async():
+            return await self._attempts_async(send)
+
+    @asynccontextmanager
+    async def stream_async(self, send):
+        """
+        Like request_async() for a streamed response (send() uses stream=True).
+
+        The concurrency slot is held until the stream is closed; only
+        opening the stream is retried, not errors while reading it.
+        """
+        async with self._slot_async():
+            response = await self._attempts_async(send)
+            try:
+                yield response
+            finally:
+                await response.aclose()
+
+    def stats(self) -> dict:
+        """Load and counters, for /api/stats."""
+        with self._lock:
+            stats = {
+                'name': self.name,
+                'max_concurrency': self.max_concurrency,
+                'in_flight': self.in_flight,
+                'peak_in_flight': self.peak_in_flight,
+                'calls': self.calls,
+                'retries': self.retries,
+                'busy': self.busy,
+                'failed': self.failed,
+            }
+        stats['circuit'] = {
+            'state': self.breaker.state,
+            'times_opened': self.breaker.times_opened,
+            'rejected': self.breaker.rejected,
+        }
+        stats['rate_limit'] = self.limiter.stats() if self.limiter else None
+        return stats
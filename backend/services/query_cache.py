@@ -0,0 +1,104 @@
+"""
+Query Embedding Cache
+
+Bounded LRU + TTL cache of query embeddings for SemanticMatcher.
+
+Users often send the same or nearly the same text to /api/match (chat
+summaries, retries, the frontend re-querying after should_show_stories).
+Cached queries skip model.encode entirely.
+"""
+
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Optional
+
+import numpy as np
+
+
+def normalize_query(text: str) -> str:
+    """
+    Cache key form of a query: Unicode-normalized, whitespace-collapsed,
+    case-folded. Texts that differ only in these ways share one entry (the
+    embedding of whichever arrived first); the matcher still encodes the
+    text as the user wrote it.
+    """
+    return ' '.join(unicodedata.normalize('NFKC', text).split()).casefold()
+
+
+class QueryEmbeddingCache:
+    """
+    Thread-safe LRU cache with a per-entry time-to-live.
+
+    Usage:
+        cache = QueryEmbeddingCache(max_size=1024, ttl_seconds=3600)
+        key = (model_name, normalize_query(text))
+        embedding = cache.get(key)
+        if embedding is None:
+            embedding = encode(text)
+            cache.put(key, embedding)
+    """
+
+    def __init__(self, max_size: int = 1024, ttl_seconds: float = 3600):
+        """
+        Args:
+            max_size: Most embeddings kept; least recently used go first
+                (0 disables the cache)
+            ttl_seconds: Entries older than this are treated as misses
+        """
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict = OrderedDict()  # key -> (stored_at, embedding)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key) -> Optional[np.ndarray]:
+        """Cached embedding for key, or None on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                stored_at, embedding = entry
+                if time.monotonic() - stored_at <= self.ttl_seconds:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return embedding
+                del self._entries[key]
+                self.expirations += 1
+            self.misses += 1
+            return None
+
+    def put(self, key, embedding: np.ndarray):
+        """Store an embedding, evicting the least recently used if full."""
+        if self.max_size <= 0:
+            return
+        # Shared between requests, so make sure nobody modifies it in place
+        embedding.setflags(write=False)
+        with self._lock:
+            self._entries[key] = (time.monotonic(), embedding)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        """Counters for /api/stats, to size the cache."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'ttl_seconds': self.ttl_seconds,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+            }
@@ -0,0 +1,82 @@
+"""
+Rate Limiting
+
+Shared token bucket for outbound API calls.
+
+One limiter is shared by every request a worker makes to a provider,
+instead of each request sleeping a fixed amount: calls go out
+immediately while there is budget, and only wait once the configured
+rate is actually exceeded.
+"""
+
+import asyncio
+import threading
+import time
+from typing import Optional
+
+
+class RateLimiter:
+    """
+    Token bucket usable from both threads and the event loop.
+
+    Callers reserve tokens first and then wait outside the lock, so the
+    bucket can go into debt: waiters are served in arrival order and the
+    long-run rate holds however many callers there are.
+
+    Usage:
+        limiter = RateLimiter(rate=10)         # 10 requests/sec, bursts of 10
+        await limiter.acquire_async()          # in async code
+        limiter.acquire()                      # in threads
+    """
+
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        """
+        Args:
+            rate: Tokens added per second
+            burst: Most tokens that can be saved up (defaults to one second's worth, at least 1)
+        """
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.burst = burst if burst is not None else max(rate, 1.0)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self.acquired = 0
+        self.delayed = 0
+
+    def reserve(self, tokens: float = 1.0) -> float:
+        """Take tokens now; returns how many seconds the caller must wait before using them."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= tokens
+            self.acquired += 1
+            wait = max(0.0, -self._tokens / self.rate)
+            if wait > 0:
+                self.delayed += 1
+            return wait
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        """Block until the tokens are available; returns seconds waited."""
+        wait = self.reserve(tokens)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    async def acquire_async(self, tokens: float = 1.0) -> float:
+        """Await until the tokens are available; returns seconds waited."""
+        wait = self.reserve(tokens)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'rate': self.rate,
+                'burst': self.burst,
+                'acquired': self.acquired,
+                'delayed': self.delayed,
+            }
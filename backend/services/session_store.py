@@ -0,0 +1,218 @@
+"""
+Chat Session Store
+
+Server-side conversation history for /api/chat, keyed by session id.
+
+With a session id the client sends only its new message instead of the
+whole conversation every turn; the backend looks the history up here and
+saves it back after the reply. Each conversation keeps at most its last
+max_messages messages (plus the rolling summary of older ones, if the
+chat has one), and idle sessions expire after the TTL.
+
+Two backends with the same interface:
+    MemorySessionStore   per-process LRU, the default (single worker)
+    SQLiteSessionStore   one file shared by every worker on the machine
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Optional
+
+
+def bounded(messages: List[dict], max_messages: int) -> List[dict]:
+    """The last max_messages messages, keeping a leading rolling summary (system message)."""
+    if messages and messages[0]['role'] == 'system':
+        return messages[:1] + messages[1:][-max_messages:]
+    return messages[-max_messages:]
+
+
+class MemorySessionStore:
+    """
+    Thread-safe LRU of conversations with an idle time-to-live.
+
+    Usage:
+        store = MemorySessionStore(max_sessions=10000, ttl_seconds=7200)
+        history = store.get(session_id) or []
+        ...
+        store.save(session_id, chat.conversation_history)
+    """
+
+    def __init__(self, max_sessions: int = 10000, ttl_seconds: float = 7200, max_messages: int = 40):
+        """
+        Args:
+            max_sessions: Most conversations kept; least recently used go first
+            ttl_seconds: Conversations idle for longer than this are dropped
+            max_messages: Most messages kept per conversation (oldest go first)
+        """
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self.max_messages = max_messages
+        self._sessions: OrderedDict = OrderedDict()  # session_id -> (updated_at, messages)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, session_id: str) -> Optional[List[dict]]:
+        """Copy of the conversation's messages, or None if unknown or expired."""
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is not None:
+                updated_at, messages = entry
+                if time.monotonic() - updated_at <= self.ttl_seconds:
+                    self._sessions.move_to_end(session_id)
+                    self.hits += 1
+                    return [dict(message) for message in messages]
+                del self._sessions[session_id]
+                self.expirations += 1
+            self.misses += 1
+            return None
+
+    def save(self, session_id: str, messages: List[dict]):
+        """Store the conversation (its last max_messages messages), evicting the LRU if full."""
+        messages = tuple(dict(message) for message in bounded(messages, self.max_messages))
+        with self._lock:
+            self._sessions[session_id] = (time.monotonic(), messages)
+            self._sessions.move_to_end(session_id)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, session_id: str):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def stats(self) -> dict:
+        """Counters for /api/stats, to size the store."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'backend': 'memory',
+                'size': len(self._sessions),
+                'max_sessions': self.max_sessions,
+                'ttl_seconds': self.ttl_seconds,
+                'max_messages': self.max_messages,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+            }
+
+    def close(self):
+        pass
+
+
+class SQLiteSessionStore:
+    """
+    Session store in a SQLite file, so every uvicorn worker sees the same
+    conversations.
+
+    Same interface and limits as MemorySessionStore. Lookups go through
+    the primary key; expired and excess sessions are pruned every
+    prune_every saves rather than on each one.
+    """
+
+    def __init__(self,
+                 path: str,
+                 max_sessions: int = 10000,
+                 ttl_seconds: float = 7200,
+                 max_messages: int = 40,
+                 prune_every: int = 100):
+        """
+        Args:
+            path: SQLite file (created if missing)
+            max_sessions: Most conversations kept; least recently used go first
+            ttl_seconds: Conversations idle for longer than this are dropped
+            max_messages: Most messages kept per conversation (oldest go first)
+            prune_every: Saves between sweeps of expired/excess sessions
+        """
+        self.path = path
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self.max_messages = max_messages
+        self.prune_every = prune_every
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        self._lock = threading.Lock()
+        # Wall-clock times, since other processes share the file
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=5.0)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('PRAGMA synchronous=NORMAL')
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS sessions ('
+            ' id TEXT PRIMARY KEY, messages TEXT NOT NULL, updated REAL NOT NULL)'
+        )
+        self._db.execute('CREATE INDEX IF NOT EXISTS sessions_updated ON sessions (updated)')
+        self._saves = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, session_id: str) -> Optional[List[dict]]:
+        """The conversation's messages, or None if unknown or expired."""
+        with self._lock:
+            row = self._db.execute(
+                'SELECT messages FROM sessions WHERE id = ? AND updated >= ?',
+                (session_id, time.time() - self.ttl_seconds)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return json.loads(row[0])
+
+    def save(self, session_id: str, messages: List[dict]):
+        """Store the conversation (its last max_messages messages)."""
+        value = json.dumps(bounded(messages, self.max_messages), ensure_ascii=False)
+        with self._lock:
+            self._db.execute(
+                'INSERT OR REPLACE INTO sessions (id, messages, updated) VALUES (?, ?, ?)',
+                (session_id, value, time.time())
+            )
+            self._saves += 1
+            if self._saves % self.prune_every == 0:
+                self._prune()
+
+    def _prune(self):
+        """Drop expired sessions, then the least recently used beyond max_sessions."""
+        expired = self._db.execute(
+            'DELETE FROM sessions WHERE updated < ?', (time.time() - self.ttl_seconds,)
+        ).rowcount
+        excess = self._db.execute(
+            'DELETE FROM sessions WHERE id IN (SELECT id FROM sessions ORDER BY updated DESC LIMIT -1 OFFSET ?)',
+            (self.max_sessions,)
+        ).rowcount
+        self.evictions += expired + excess
+
+    def delete(self, session_id: str):
+        with self._lock:
+            self._db.execute('DELETE FROM sessions WHERE id = ?', (session_id,))
+
+    def stats(self) -> dict:
+        """Counters for /api/stats (size is shared by all workers, counters are this worker's)."""
+        with self._lock:
+            size = self._db.execute('SELECT COUNT(*) FROM sessions').fetchone()[0]
+            lookups = self.hits + self.misses
+            return {
+                'backend': 'sqlite',
+                'path': self.path,
+                'size': size,
+                'max_sessions': self.max_sessions,
+                'ttl_seconds': self.ttl_seconds,
+                'max_messages': self.max_messages,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+                'evictions': self.evictions,
+            }
+
+    def close(self):
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,344 @@
+"""
+Vector Index
+
+Similarity search over mentor post embeddings.
+
+- BruteForceIndex: exact search over every post (default)
+- IVFIndex: approximate search over k-means clusters, for large corpora
+
+Pure NumPy, and free of model imports so it can be benchmarked on its own.
+"""
+
+import hashlib
+
+import numpy as np
+from pathlib import Path
+from typing import Optional
+
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Return the indices of the k highest scores, best first.
+
+    Uses np.argpartition to select the candidates in O(n) and only sorts
+    those k candidates, instead of sorting the whole score array.
+
+    Ordering matches np.argsort(scores, kind='stable')[::-1][:k]:
+    highest score first, ties broken by the higher index. (If several
+    posts tie exactly at the k-th score, which of them is kept may differ.)
+
+    Args:
+        scores: 1-D array of similarity scores
+        k: Number of indices to return
+
+    Returns:
+        Array of at most k indices into scores
+    """
+    n = scores.shape[0]
+    if k <= 0 or n == 0:
+        return np.empty(0, dtype=np.intp)
+
+    if k >= n:
+        candidates = np.arange(n)
+    else:
+        # Sort the selected candidates by index so the stable sort below
+        # breaks ties the same way a stable full sort would
+        candidates = np.sort(np.argpartition(scores, n - k)[n - k:])
+
+    order = np.argsort(scores[candidates], kind='stable')[::-1]
+    return candidates[order]
+
+
+def normalize_embeddings(embeddings: np.ndarray) -> np.ndarray:
+    """
+    L2-normalize embedding rows into a contiguous float32 matrix.
+
+    With unit-length rows, cosine similarity is a plain dot product, so
+    queries can be scored with one matrix-vector product. Zero rows are
+    left as zeros (cosine_similarity treats them the same way).
+
+    Args:
+        embeddings: 2-D array (n_posts, dim), or 1-D for a single vector
+
+    Returns:
+        Normalized float32 array with the same shape
+    """
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    norms = np.linalg.norm(embeddings, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return np.ascontiguousarray(embeddings / norms)
+
+
+def is_normalized(embeddings: np.ndarray, atol: float = 1e-5) -> bool:
+    """
+    True for a float32 matrix whose rows are already unit length (or zero).
+
+    normalize_embeddings() is not bit-for-bit idempotent, so callers check
+    this first to keep normalized arrays (and their fingerprints) unchanged.
+    """
+    if embeddings.dtype != np.float32 or embeddings.ndim != 2:
+        return False
+    norms = np.linalg.norm(embeddings, axis=1)
+    return bool(np.all((np.abs(norms - 1.0) <= atol) | (norms == 0)))
+
+
+def embeddings_fingerprint(embeddings: np.ndarray, n_rows: int = 1024) -> str:
+    """
+    Cheap content hash of an embedding matrix: its shape plus up to n_rows
+    evenly spaced rows.
+
+    Ties a saved index to the embeddings it was built from, so an index
+    left over from a regenerated corpus of the same size is not silently
+    reused. Reads only the sampled rows, which keeps it fast on
+    memory-mapped files.
+    """
+    n = embeddings.shape[0]
+    rows = np.unique(np.linspace(0, n - 1, min(n, n_rows)).astype(np.intp)) if n else []
+    digest = hashlib.sha256(repr(embeddings.shape).encode())
+    digest.update(np.ascontiguousarray(embeddings[rows], dtype=np.float32).tobytes())
+    return digest.hexdigest()
+
+
+def index_path_for(embeddings_path) -> Path:
+    """Where the search index for an embeddings file is stored (next to it)."""
+    embeddings_path = Path(embeddings_path)
+    return embeddings_path.with_name(embeddings_path.stem + '.index.npz')
+
+
+class BruteForceIndex:
+    """
+    Exact search: score every post, keep the top k.
+
+    The default index. Nothing to train, so build() is instant.
+    """
+
+    kind = 'brute'
+
+    def __init__(self):
+        self.embeddings: Optional[np.ndarray] = None
+        # (mask, indices of its False entries), swapped in as one tuple so
+        # concurrent searches never pair a mask with another mask's indices
+        self._excluded: tuple = (None, None)
+
+    def build(self, embeddings: np.ndarray) -> 'BruteForceIndex':
+        """Index a normalized embedding matrix."""
+        self.embeddings = embeddings
+        return self
+
+    def search(self, query: np.ndarray, k: int,
+               mask: Optional[np.ndarray] = None) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Find the k posts most similar to a normalized query vector.
+
+        Args:
+            mask: Optional boolean array, False for posts that must never
+                be returned (they get a score of -inf). Treated as read-only:
+                pass a new array to change it.
+
+        Returns:
+            (indices, scores), best match first
+        """
+        scores = self.embeddings @ query
+        if mask is not None:
+            scores[self._excluded_indices(mask)] = -np.inf
+        indices = top_k_indices(scores, k)
+        return indices, scores[indices]
+
+    def _excluded_indices(self, mask: np.ndarray) -> np.ndarray:
+        """Indices where mask is False, recomputed only when a new mask is passed."""
+        cached_mask, excluded = self._excluded
+        if cached_mask is not mask:
+            # The matcher replaces safe_mask on refresh rather than editing it
+            excluded = np.flatnonzero(~mask)
+            self._excluded = (mask, excluded)
+        return excluded
+
+    def _state(self) -> dict:
+        return {}
+
+    def _load_state(self, state: dict):
+        pass
+
+
+class IVFIndex:
+    """
+    Approximate search with an inverted file (IVF) over k-means clusters.
+
+    Posts are grouped into n_lists clusters at build time. A query is only
+    scored against the posts in its n_probe closest clusters, so latency
+    grows with n_probe / n_lists of the corpus instead of all of it.
+
+    Knobs:
+    - n_lists: number of clusters (default ~sqrt(n_posts)). More lists =
+      smaller lists = faster queries, but needs a higher n_probe for the
+      same recall.
+    - n_probe: clusters scanned per query (at least 1). Higher = better
+      recall, slower. Can be changed after building without rebuilding.
+    """
+
+    kind = 'ivf'
+
+    def __init__(self, n_lists: Optional[int] = None, n_probe: int = 8,
+                 n_iter: int = 20, sample_size: int = 100_000, seed: int = 42):
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.n_iter = n_iter
+        self.sample_size = sample_size
+        self.seed = seed
+        self.embeddings: Optional[np.ndarray] = None
+        self.centroids: Optional[np.ndarray] = None
+        # Post ids grouped by cluster: list i is list_ids[list_offsets[i]:list_offsets[i + 1]]
+        self.list_ids: Optional[np.ndarray] = None
+        self.list_offsets: Optional[np.ndarray] = None
+
+    @property
+    def n_probe(self) -> int:
+        return self._n_probe
+
+    @n_probe.setter
+    def n_probe(self, value: int):
+        # Probing no clusters would leave nothing to score
+        if int(value) < 1:
+            raise ValueError(f"n_probe must be at least 1, got {value}")
+        self._n_probe = int(value)
+
+    def build(self, embeddings: np.ndarray) -> 'IVFIndex':
+        """Cluster a normalized embedding matrix and build the inverted lists."""
+        n = embeddings.shape[0]
+        n_lists = self.n_lists or max(1, int(np.sqrt(n)))
+        n_lists = min(n_lists, n)
+        rng = np.random.default_rng(self.seed)
+
+        # Train centroids on a sample (spherical k-means: cosine assignment)
+        if n > self.sample_size:
+            sample = embeddings[np.sort(rng.choice(n, self.sample_size, replace=False))]
+        else:
+            sample = embeddings
+        centroids = sample[rng.choice(sample.shape[0], n_lists, replace=False)].copy()
+
+        for _ in range(self.n_iter):
+            assignments = self._assign(sample, centroids)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignments, sample)
+            empty = np.bincount(assignments, minlength=n_lists) == 0
+            # Re-seed empty clusters so every list stays in use
+            sums[empty] = sample[rng.choice(sample.shape[0], int(empty.sum()))]
+            centroids = normalize_embeddings(sums)
+
+        assignments = self._assign(embeddings, centroids)
+        self.embeddings = embeddings
+        self.centroids = centroids
+        self.n_lists = n_lists
+        self.list_ids = np.argsort(assignments, kind='stable')
+        self.list_offsets = np.concatenate(
+            [[0], np.cumsum(np.bincount(assignments, minlength=n_lists))]
+        )
+        return self
+
+    @staticmethod
+    def _assign(vectors: np.ndarray, centroids: np.ndarray,
+                chunk_size: int = 65_536) -> np.ndarray:
+        """Closest centroid for every vector, in chunks to bound memory."""
+        assignments = np.empty(vectors.shape[0], dtype=np.intp)
+        for start in range(0, vectors.shape[0], chunk_size):
+            chunk = vectors[start:start + chunk_size]
+            assignments[start:start + chunk_size] = np.argmax(chunk @ centroids.T, axis=1)
+        return assignments
+
+    def search(self, query: np.ndarray, k: int,
+               mask: Optional[np.ndarray] = None) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Find (approximately) the k posts most similar to a normalized query.
+
+        Args:
+            mask: Optional boolean array, False for posts that must never
+                be returned
+
+        Returns:
+            (indices, scores), best match first
+        """
+        probe = top_k_indices(self.centroids @ query, self.n_probe)
+        candidates = np.concatenate([
+            self.list_ids[self.list_offsets[i]:self.list_offsets[i + 1]] for i in probe
+        ])
+        if mask is not None:
+            candidates = candidates[mask[candidates]]
+        scores = self.embeddings[candidates] @ query
+        best = top_k_indices(scores, k)
+        return candidates[best], scores[best]
+
+    def _state(self) -> dict:
+        return {
+            'centroids': self.centroids,
+            'list_ids': self.list_ids,
+            'list_offsets': self.list_offsets,
+            'n_probe': self.n_probe,
+        }
+
+    def _load_state(self, state: dict):
+        self.centroids = state['centroids']
+        self.list_ids = state['list_ids']
+        self.list_offsets = state['list_offsets']
+        self.n_lists = len(self.centroids)
+        self.n_probe = int(state['n_probe'])
+
+
+INDEX_TYPES = {
+    BruteForceIndex.kind: BruteForceIndex,
+    IVFIndex.kind: IVFIndex,
+}
+
+
+def create_index(kind: str = 'brute', **params):
+    """Create an unbuilt index by name ('brute' or 'ivf')."""
+    if kind not in INDEX_TYPES:
+        raise ValueError(f"Unknown index type: {kind}. Available: {list(INDEX_TYPES)}")
+    return INDEX_TYPES[kind](**params)
+
+
+def save_index(index, filepath):
+    """
+    Save a built index to disk (the embeddings themselves are not stored).
+
+    Args:
+        filepath: Where to save (e.g. from index_path_for())
+    """
+    filepath = Path(filepath)
+    filepath.parent.mkdir(parents=True, exist_ok=True)
+    with open(filepath, 'wb') as f:
+        np.savez(
+            f,
+            kind=np.array(index.kind),
+            n_posts=np.array(index.embeddings.shape[0]),
+            fingerprint=np.array(embeddings_fingerprint(index.embeddings)),
+            **index._state()
+        )
+
+
+def load_index(filepath, embeddings: np.ndarray):
+    """
+    Load an index saved with save_index() and attach it to embeddings.
+
+    Raises:
+        ValueError: If the index was built for different embeddings (post
+            count or content), or predates fingerprints
+    """
+    with np.load(filepath) as data:
+        state = {key: data[key] for key in data.files}
+
+    n_posts = int(state.pop('n_posts'))
+    if n_posts != embeddings.shape[0]:
+        raise ValueError(f"Index at {filepath} was built for {n_posts} posts, "
+                         f"but {embeddings.shape[0]} are loaded. Rebuild the index.")
+    fingerprint = str(state.pop('fingerprint', ''))
+    if not fingerprint:
+        raise ValueError(f"Index at {filepath} has no embeddings fingerprint (saved by an "
+                         f"older version). Rebuild the index.")
+    if fingerprint != embeddings_fingerprint(embeddings):
+        raise ValueError(f"Index at {filepath} was built for different embeddings "
+                         f"(same post count, different content). Rebuild the index.")
+
+    index = create_index(str(state.pop('kind')))
+    index._load_state(state)
+    index.embeddings = embeddings
+    return index
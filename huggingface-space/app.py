@@ -10,9 +10,9 @@ from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, Field
 from sentence_transformers import SentenceTransformer
-from sklearn.metrics.pairwise import cosine_similarity
 import numpy as np
 import pandas as pd
+import json
 import pickle
 from pathlib import Path
 from typing import List, Optional
@@ -36,7 +36,15 @@ app.add_middleware(
 # Global variables for model and data
 model: Optional[SentenceTransformer] = None
 mentor_posts: Optional[pd.DataFrame] = None
-mentor_embeddings: Optional[np.ndarray] = None
+mentor_embeddings: Optional[np.ndarray] = None  # L2-normalized rows
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    """L2-normalize rows so cosine similarity is a dot product."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return np.ascontiguousarray(vectors / norms)
 
 
 @app.on_event("startup")
@@ -53,19 +61,27 @@ async def load_model():
     model = SentenceTransformer('all-MiniLM-L6-v2')
     print("✓ Model loaded")
 
-    # Load pre-computed embeddings
+    # Load pre-computed embeddings: prefer the embedding store directory
+    # (memory-mapped .npy + columnar posts.json), fall back to the legacy pickle
+    store_path = Path("mentor_embeddings")
     embeddings_path = Path("mentor_embeddings.pkl")
-    if embeddings_path.exists():
+    if (store_path / "embeddings.npy").exists():
+        print(f"Loading embedding store from {store_path}...")
+        mentor_embeddings = np.load(store_path / "embeddings.npy", mmap_mode='r')
+        with open(store_path / "posts.json", 'r', encoding='utf-8') as f:
+            mentor_posts = pd.DataFrame(json.load(f)['columns'])
+        print(f"✓ Loaded {len(mentor_posts)} mentor posts with embeddings")
+    elif embeddings_path.exists():
         print(f"Loading embeddings from {embeddings_path}...")
         with open(embeddings_path, 'rb') as f:
             data = pickle.load(f)
 
         mentor_posts = data['posts']
-        mentor_embeddings = data['embeddings']
+        mentor_embeddings = normalize(data['embeddings'])
         print(f"✓ Loaded {len(mentor_posts)} mentor posts with embeddings")
     else:
-        print(f"⚠ Warning: {embeddings_path} not found")
-        print("  Upload mentor_embeddings.pkl to your Space")
+        print(f"⚠ Warning: {store_path}/ not found")
+        print("  Upload the mentor_embeddings/ store to your Space")
 
     print("="*60)
     print(f"Matcher ready: {mentor_embeddings is not None}")
@@ -138,10 +154,10 @@ async def match_to_mentors(request: MatchRequest):
 
     try:
         # Embed user text
-        user_embedding = model.encode([request.user_text], convert_to_numpy=True)
+        user_embedding = normalize(model.encode([request.user_text], convert_to_numpy=True)[0])
 
-        # Calculate cosine similarity to all mentor posts
-        similarities = cosine_similarity(user_embedding, mentor_embeddings)[0]
+        # Cosine similarity to all mentor posts (rows are pre-normalized)
+        similarities = mentor_embeddings @ user_embedding
 
         # Get indices of top matches (sorted descending)
         top_indices = np.argsort(similarities)[::-1][:request.top_k * 2]
@@ -156,7 +172,6 @@ async def match_to_mentors(request: MatchRequest):
                 # Ensure topic_tags is a list
                 if 'topic_tags' in post_data:
                     if isinstance(post_data['topic_tags'], str):
-                        import json
                         try:
                             post_data['topic_tags'] = json.loads(post_data['topic_tags'])
                         except:
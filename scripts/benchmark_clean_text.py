@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Parity check and benchmark for CleaningPipeline vs clean_text.
+
+Parity is property-based: random texts built from fragments that
+interact across the cleaning passes (URLs next to mentions, '#' next to
+'@', emojis, Unicode case, odd whitespace) must clean identically with
+CleaningPipeline and clean_text, for all 128 option combinations.
+
+Usage:
+    python scripts/benchmark_clean_text.py
+    python scripts/benchmark_clean_text.py --texts 200000 --workers 4
+"""
+
+import argparse
+import itertools
+import random
+import sys
+import os
+import time
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.utils.text_utils import CleaningPipeline, clean_text
+
+OPTIONS = [
+    'lowercase', 'remove_urls', 'remove_mentions', 'remove_hashtags',
+    'remove_emojis', 'remove_punctuation', 'remove_extra_whitespace',
+]
+FRAGMENTS = [
+    "I", "feel", "SO", "lonely", "Agree?", "thoughts...", "École", "İstanbul", "straße", "ǅ",
+    "@", "#", "@bob", "#blessed", "#@x", "@#x", "#a@b", "@a#b", "##tag", "@@bob", "#_x", "@é",
+    "http", "https://x.co/@bob", "http://a.b#frag", "www.site.com", "@www.site.com", "#https://x",
+    "www.", "https://", "🚀", "💪🔥", "👍🏽", "👨‍👩‍👧", "🇦🇺", "1️⃣", "©", "!!", "?!", "'", '"', "-",
+    " ", "  ", "\n", "\t", " ", " ", "　", "\x1c",
+]
+WORDS = ["i", "feel", "so", "lonely", "today", "Nobody", "gets", "it", "my", "friends", "work", "is", "busy", "lol"]
+EDGE_CASES = ["", " ", "@", "#", "www.", "http://", " @bob ", " #x ", None, 0, float("nan")]
+
+
+def random_text(rng: random.Random) -> str:
+    """Fragments joined with or without separators, so they run together."""
+    return "".join(rng.choice(FRAGMENTS) + rng.choice(["", " ", ""]) for _ in range(rng.randint(0, 25)))
+
+
+def message_text(rng: random.Random) -> str:
+    """A typical message: mostly plain words, an occasional fragment."""
+    return " ".join(
+        rng.choice(FRAGMENTS) if rng.random() < 0.05 else rng.choice(WORDS)
+        for _ in range(rng.randint(0, 40))
+    )
+
+
+def throughput(fn, texts: list) -> float:
+    start = time.perf_counter()
+    fn(texts)
+    return len(texts) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark CleaningPipeline')
+    parser.add_argument('--texts', type=int, default=100_000, help='Number of texts')
+    parser.add_argument('--samples', type=int, default=2_000, help='Random texts per option combination')
+    parser.add_argument('--workers', type=int, default=4, help='Processes for the parallel run')
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+
+    print("=" * 60)
+    print("BENCHMARK: CLEANING PIPELINE")
+    print("=" * 60)
+
+    # Parity, every option combination
+    checked = 0
+    for values in itertools.product([False, True], repeat=len(OPTIONS)):
+        options = dict(zip(OPTIONS, values))
+        pipeline = CleaningPipeline(**options)
+        for text in EDGE_CASES + [random_text(rng) for _ in range(args.samples)]:
+            expected = clean_text(text, **options)
+            actual = pipeline(text)
+            assert actual == expected, f"{options}\n  {text!r}\n  expected {expected!r}\n  actual   {actual!r}"
+            checked += 1
+    print(f"\nParity: {checked:,} texts across {2 ** len(OPTIONS)} option combinations, identical output")
+
+    texts = [message_text(rng) for _ in range(args.texts)]
+    pipeline = CleaningPipeline()
+    serial = pipeline.clean_batch(texts)
+    assert pipeline.clean_batch(texts, workers=args.workers) == serial
+    print(f"Parity: clean_batch(workers={args.workers}) matches the serial run")
+
+    print(f"\n{'options':>10} | {'clean_text':>14} | {'pipeline':>14} | {'speed-up':>8}")
+    print("-" * 56)
+    for label, options in [("default", {}), ("all on", dict.fromkeys(OPTIONS, True))]:
+        pipeline = CleaningPipeline(**options)
+        old = throughput(lambda t: [clean_text(x, **options) for x in t], texts)
+        new = throughput(pipeline.clean_batch, texts)
+        print(f"{label:>10} | {old:>8,.0f} tx/s | {new:>8,.0f} tx/s | {new / old:>7.1f}x")
+
+    new = throughput(lambda t: CleaningPipeline().clean_batch(t, workers=args.workers), texts)
+    print(f"\nclean_batch(workers={args.workers}), default options: {new:,.0f} tx/s")
+
+    print("\n" + "=" * 60)
+    print("BENCHMARK COMPLETE")
+    print("=" * 60)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
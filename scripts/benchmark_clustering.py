@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Benchmark EmbeddingClassifier clustering: full-batch vs streaming.
+
+Writes a synthetic set of message embeddings (clustered Gaussian blobs,
+all-MiniLM-L6-v2 sized) to a .npy file, then clusters it in a fresh
+process per mode and reports wall time, peak memory and agreement with
+the true clusters (adjusted Rand index):
+
+    full       np.load + KMeans.fit_predict (what cluster() does after embedding)
+    streaming  cluster_embeddings_streaming (what cluster_streaming() does)
+
+Both start from embeddings on disk, so model encoding (the same cost in
+both modes) is left out.
+
+Usage:
+    python scripts/benchmark_clustering.py
+    python scripts/benchmark_clustering.py --rows 200000 --clusters 50
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.classifiers.api_classifiers import cluster_embeddings_streaming
+
+
+def write_synthetic(path: str, labels_path: str, rows: int, dim: int, clusters: int, chunk_size: int):
+    """Clustered embeddings written chunk by chunk, plus the true labels."""
+    rng = np.random.default_rng(0)
+    centers = rng.normal(size=(clusters, dim)).astype(np.float32)
+    labels = rng.integers(0, clusters, size=rows)
+    with open(path, 'wb') as f:
+        np.lib.format.write_array_header_1_0(f, {
+            'descr': np.lib.format.dtype_to_descr(np.dtype(np.float32)),
+            'fortran_order': False,
+            'shape': (rows, dim),
+        })
+        for start in range(0, rows, chunk_size):
+            block = labels[start:start + chunk_size]
+            noise = rng.normal(scale=1.5, size=(len(block), dim)).astype(np.float32)
+            f.write((centers[block] + noise).tobytes())
+    np.save(labels_path, labels)
+
+
+def run_mode(mode: str, path: str, clusters: int, chunk_size: int, out: str):
+    """Child process: cluster, save labels, print time and peak RSS as JSON."""
+    start = time.perf_counter()
+    if mode == 'full':
+        from sklearn.cluster import KMeans
+        embeddings = np.load(path)
+        labels = KMeans(n_clusters=clusters, random_state=42).fit_predict(embeddings)
+    else:
+        labels = cluster_embeddings_streaming(path, clusters, chunk_size)
+    elapsed = time.perf_counter() - start
+    np.save(out, labels)
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(json.dumps({'seconds': elapsed, 'peak_mb': peak_mb}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark full-batch vs streaming clustering')
+    parser.add_argument('--rows', type=int, default=1_000_000, help='Synthetic messages')
+    parser.add_argument('--dim', type=int, default=384, help='Embedding dimension')
+    parser.add_argument('--clusters', type=int, default=20, help='Number of clusters')
+    parser.add_argument('--chunk-size', type=int, default=10_000, help='Rows per streaming chunk')
+    parser.add_argument('--modes', nargs='+', default=['full', 'streaming'], choices=['full', 'streaming'])
+    parser.add_argument('--run', choices=['full', 'streaming'], help=argparse.SUPPRESS)
+    parser.add_argument('--path', help=argparse.SUPPRESS)
+    parser.add_argument('--out', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        run_mode(args.run, args.path, args.clusters, args.chunk_size, args.out)
+        return 0
+
+    from sklearn.metrics import adjusted_rand_score
+
+    print("=" * 60)
+    print("BENCHMARK: CLUSTERING")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'embeddings.npy')
+        labels_path = os.path.join(tmp, 'true_labels.npy')
+        write_synthetic(path, labels_path, args.rows, args.dim, args.clusters, args.chunk_size)
+        true_labels = np.load(labels_path)
+        print(f"\n{args.rows:,} x {args.dim} embeddings ({os.path.getsize(path) / 2**20:,.0f} MB), "
+              f"{args.clusters} clusters, chunk size {args.chunk_size:,}\n")
+
+        print(f"{'mode':>10} | {'time':>9} | {'peak RSS':>10} | {'ARI vs truth':>12}")
+        print("-" * 52)
+        for mode in args.modes:
+            out = os.path.join(tmp, f'{mode}_labels.npy')
+            result = subprocess.run(
+                [sys.executable, __file__, '--run', mode, '--path', path, '--out', out,
+                 '--clusters', str(args.clusters), '--chunk-size', str(args.chunk_size)],
+                capture_output=True, text=True, check=True
+            )
+            stats = json.loads(result.stdout.strip().splitlines()[-1])
+            ari = adjusted_rand_score(true_labels, np.load(out))
+            print(f"{mode:>10} | {stats['seconds']:>8.1f}s | {stats['peak_mb']:>7,.0f} MB | {ari:>12.3f}")
+
+    print("\n" + "=" * 60)
+    print("BENCHMARK COMPLETE")
+    print("=" * 60)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
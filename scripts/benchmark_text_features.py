@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Benchmark src.utils.text_utils.count_features.
+
+Checks that count_features() and count_features_batch() give exactly the
+same values as the old implementation (separate regex scans, per-character
+emoji lookups), then compares throughput in texts/sec.
+
+Usage:
+    python scripts/benchmark_text_features.py
+    python scripts/benchmark_text_features.py --texts 200000
+"""
+
+import argparse
+import random
+import re
+import sys
+import os
+import time
+
+import emoji
+import pandas as pd
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.utils.text_utils import FEATURE_NAMES, count_features, count_features_batch
+
+WORDS = [
+    "i", "feel", "SO", "lonely", "today", "Agree?", "Thoughts?", "GAME-CHANGER", "école", "ÅNGST",
+    "straße", "İstanbul", "ǅ", "Ⅻ", "123", "@someone", "@", "#blessed", "#", "#_x",
+    "https://example.com/a?b=c", "http://x", "http", "www.site.com", "🚀", "💪🔥", "©", "®", "👍🏽",
+    "👨‍👩‍👧", "🇦🇺", "1️⃣", "...", "!!", "?!", "\n", "\t", " ",
+]
+EDGE_CASES = ["", " ", ".", "!?!?", "A", "a.B!c?", "🚀", "@@@", "##", "http://", None, 0, float("nan")]
+
+
+def legacy_count_features(text: str) -> dict:
+    """The original count_features()."""
+    if not isinstance(text, str):
+        return {}
+
+    features = {
+        'char_count': len(text),
+        'word_count': len(text.split()),
+        'sentence_count': len(re.findall(r'[.!?]+', text)),
+        'emoji_count': len([c for c in text if c in emoji.EMOJI_DATA]),
+        'url_count': len(re.findall(r'https?://\S+', text)),
+        'mention_count': len(re.findall(r'@\w+', text)),
+        'hashtag_count': len(re.findall(r'#\w+', text)),
+        'exclamation_count': text.count('!'),
+        'question_count': text.count('?'),
+    }
+
+    alpha_chars = [c for c in text if c.isalpha()]
+    if alpha_chars:
+        features['caps_ratio'] = sum(1 for c in alpha_chars if c.isupper()) / len(alpha_chars)
+    else:
+        features['caps_ratio'] = 0.0
+
+    return features
+
+
+def random_text(rng: random.Random, vocabulary: list) -> str:
+    return rng.choice([" ", "", "  "]).join(rng.choice(vocabulary) for _ in range(rng.randint(0, 60)))
+
+
+def throughput(fn, texts: list) -> float:
+    start = time.perf_counter()
+    fn(texts)
+    return len(texts) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark count_features')
+    parser.add_argument('--texts', type=int, default=100_000, help='Number of texts')
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+
+    print("=" * 60)
+    print("BENCHMARK: COUNT_FEATURES")
+    print("=" * 60)
+
+    # Parity: same keys in the same order, identical values
+    parity = EDGE_CASES + [random_text(rng, WORDS) for _ in range(50_000)]
+    for text in parity:
+        expected = legacy_count_features(text)
+        actual = count_features(text)
+        assert list(actual.items()) == list(expected.items()), f"{text!r}\n  {expected}\n  {actual}"
+
+    batch = count_features_batch(parity)
+    expected = pd.DataFrame(
+        [legacy_count_features(t) or dict.fromkeys(FEATURE_NAMES, 0) for t in parity],
+        columns=FEATURE_NAMES,
+    )
+    assert batch.equals(expected.astype(batch.dtypes))
+    assert (batch.dtypes[:-1] == 'int64').all() and batch.dtypes.iloc[-1] == 'float64'
+    print(f"\nParity: {len(parity):,} texts, identical features (single and batch)")
+
+    ascii_words = [w for w in WORDS if w.isascii()]
+    print(f"\n{'input':>8} | {'before':>14} | {'count_features':>16} | {'batch':>14} | {'speed-up':>8}")
+    print("-" * 74)
+    for label, vocabulary in [("mixed", WORDS), ("ascii", ascii_words)]:
+        texts = [random_text(rng, vocabulary) for _ in range(args.texts)]
+        old = throughput(lambda t: pd.DataFrame([legacy_count_features(x) for x in t]), texts)
+        single = throughput(lambda t: pd.DataFrame([count_features(x) for x in t]), texts)
+        new = throughput(count_features_batch, texts)
+        print(f"{label:>8} | {old:>8,.0f} tx/s | {single:>10,.0f} tx/s | {new:>8,.0f} tx/s | {new / old:>7.1f}x")
+
+    print("\n" + "=" * 60)
+    print("BENCHMARK COMPLETE")
+    print("=" * 60)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -4,9 +4,18 @@ Quick script to classify a CSV of messages.
 
 Usage:
     python classify_messages.py input.csv output.csv --text-column text
+
+For inputs too big for memory, stream them in chunks:
+    python classify_messages.py input.csv output.csv --chunksize 100000
+
+Spread the chunks over several processes (output is identical to the
+serial streaming run):
+    python classify_messages.py input.csv output.csv --workers 8
 """
 
 import argparse
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
 from tqdm import tqdm
 import sys
@@ -15,7 +24,7 @@ import os
 # Add parent directory to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
-from src.utils.text_utils import clean_text, count_features, detect_patterns
+from src.utils.text_utils import clean_text, count_features_batch, detect_patterns
 import re
 
 
@@ -38,7 +47,7 @@ def classify_by_keywords(text: str) -> dict:
         scores['linkedin_lunatic'] += 2
     if re.search(r'thought leader|game.?changer|disruption', text_lower):
         scores['linkedin_lunatic'] += 1
-    if re.search(r'🚀|💪|🙏|✨', text):
+    if re.search(r'🚀|💪|🙏|✨', text_lower):
         scores['linkedin_lunatic'] += 1
     
     # Body dysmorphia
@@ -72,14 +81,116 @@ def classify_by_keywords(text: str) -> dict:
     return {'category': primary, 'confidence': confidence, 'scores': scores}
 
 
+FEATURE_COLUMNS = ['word_count', 'emoji_count', 'caps_ratio']
+DEFAULT_CHUNKSIZE = 50_000
+
+
+def classify_chunk(texts: pd.Series, progress: bool = False) -> pd.DataFrame:
+    """
+    Category, confidence and feature columns for a series of messages.
+
+    Module-level so it can run in worker processes.
+    """
+    # Classify
+    results = texts.progress_apply(classify_by_keywords) if progress else texts.apply(classify_by_keywords)
+    columns = {
+        'category': results.apply(lambda x: x['category']),
+        'confidence': results.apply(lambda x: x['confidence']),
+    }
+    
+    # Extract features
+    if progress:
+        print("Extracting features...")
+    features = count_features_batch(texts.tolist())
+    features.index = texts.index
+    for col in FEATURE_COLUMNS:
+        columns[col] = features[col]
+    
+    return pd.DataFrame(columns, index=texts.index)
+
+
+def scored_chunks(chunks, text_column: str, workers: int):
+    """
+    Yield (chunk, classify_chunk result) in input order.
+
+    With workers > 1 the chunks are classified in a process pool. At most
+    2 * workers chunks are in flight, so memory stays bounded.
+    """
+    if workers <= 1:
+        for chunk in chunks:
+            yield chunk, classify_chunk(chunk[text_column])
+        return
+    
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for chunk in chunks:
+            # Only the text column is sent to the worker
+            pending.append((chunk, pool.submit(classify_chunk, chunk[text_column])))
+            if len(pending) >= 2 * workers:
+                chunk, future = pending.popleft()
+                yield chunk, future.result()
+        while pending:
+            chunk, future = pending.popleft()
+            yield chunk, future.result()
+
+
+def classify_streaming(args) -> int:
+    """
+    Classify the input chunk by chunk, appending each to the output.
+
+    Only a bounded number of chunks is in memory at a time, and the
+    category counts are accumulated as the chunks go through.
+    """
+    columns = list(pd.read_csv(args.input, nrows=0).columns)
+    if args.text_column not in columns:
+        print(f"Error: Column '{args.text_column}' not found")
+        print(f"Available columns: {columns}")
+        return 1
+    
+    print(f"Streaming {args.input} in chunks of {args.chunksize} ({args.workers} worker(s))...")
+    counts = Counter()
+    total = 0
+    
+    chunks = pd.read_csv(args.input, chunksize=args.chunksize)
+    with tqdm(unit=' msg') as progress:
+        for i, (chunk, scored) in enumerate(scored_chunks(chunks, args.text_column, args.workers)):
+            chunk[list(scored.columns)] = scored
+            chunk.to_csv(args.output, mode='w' if i == 0 else 'a', header=(i == 0), index=False)
+            
+            counts.update(chunk['category'])
+            total += len(chunk)
+            progress.update(len(chunk))
+    
+    print(f"Classified {total} messages")
+    
+    # Summary
+    print("\nCategory Distribution:")
+    print(pd.Series(counts, name='count', dtype='int64').rename_axis('category').sort_values(ascending=False))
+    
+    print(f"\nSaved to {args.output}")
+    
+    return 0
+
+
 def main():
     parser = argparse.ArgumentParser(description='Classify messages from CSV')
     parser.add_argument('input', help='Input CSV file')
     parser.add_argument('output', help='Output CSV file')
     parser.add_argument('--text-column', default='text', help='Name of text column')
     parser.add_argument('--user-column', default='user', help='Name of user column (optional)')
+    parser.add_argument('--chunksize', type=int, default=None,
+                        help='Stream the input in chunks of this many rows (bounded memory)')
+    parser.add_argument('--workers', type=int, default=1,
+                        help=f'Classify chunks in this many processes (streams in chunks of '
+                             f'{DEFAULT_CHUNKSIZE} unless --chunksize is given)')
     args = parser.parse_args()
     
+    if args.workers > 1 and not args.chunksize:
+        args.chunksize = DEFAULT_CHUNKSIZE
+    
+    if args.chunksize:
+        return classify_streaming(args)
+    
     print(f"Loading {args.input}...")
     df = pd.read_csv(args.input)
     print(f"Loaded {len(df)} messages")
@@ -91,17 +202,8 @@ def main():
     
     print("Classifying messages...")
     tqdm.pandas()
-    
-    # Classify
-    results = df[args.text_column].progress_apply(classify_by_keywords)
-    df['category'] = results.apply(lambda x: x['category'])
-    df['confidence'] = results.apply(lambda x: x['confidence'])
-    
-    # Extract features
-    print("Extracting features...")
-    features = df[args.text_column].progress_apply(count_features)
-    for col in ['word_count', 'emoji_count', 'caps_ratio']:
-        df[col] = features.apply(lambda x: x.get(col, 0))
+    scored = classify_chunk(df[args.text_column], progress=True)
+    df[list(scored.columns)] = scored
     
     # Summary
     print("\nCategory Distribution:")
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Exercise the API classifiers against local mock servers.
+
+The Perspective mock enforces a requests-per-second limit (429 above it,
+sliding one-second window), fails a share of requests with 503 and adds
+latency. batch_analyze must return every result, in input order, at
+close to the configured rate.
+
+The Groq mock serves an OpenAI-style chat completions endpoint with the
+same limits; batch_classify must keep per-item error dicts and input
+order at any concurrency (needs the groq package).
+
+Usage:
+    python scripts/test_api_clients.py
+    python scripts/test_api_clients.py --texts 300 --limit 50
+"""
+
+import argparse
+import json
+import random
+import sys
+import os
+import tempfile
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.classifiers.api_classifiers import PerspectiveAPI
+from src.utils.llm_cache import LLMCache
+
+
+def expected_score(text: str) -> float:
+    """What the mock returns for a text, so ordering can be checked."""
+    return (sum(map(ord, text)) % 1000) / 1000
+
+
+class MockServer(ThreadingHTTPServer):
+    """Rate-limited, flaky JSON API on localhost."""
+
+    daemon_threads = True
+
+    def __init__(self, handler, limit: float, error_rate: float, latency: float):
+        super().__init__(('127.0.0.1', 0), handler)
+        self.limit = limit
+        self.error_rate = error_rate
+        self.latency = latency
+        self.lock = threading.Lock()
+        self.recent = deque()  # times of accepted requests in the last second
+        self.counts = {'ok': 0, 'rate_limited': 0, 'errors': 0}
+        self.rng = random.Random(0)
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def admit(self) -> int:
+        """Status code for the next request."""
+        with self.lock:
+            now = time.monotonic()
+            while self.recent and now - self.recent[0] >= 1.0:
+                self.recent.popleft()
+            if len(self.recent) >= self.limit:
+                self.counts['rate_limited'] += 1
+                return 429
+            self.recent.append(now)
+            if self.rng.random() < self.error_rate:
+                self.counts['errors'] += 1
+                return 503
+            self.counts['ok'] += 1
+            return 200
+
+    def __enter__(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+        self.server_close()
+
+
+class JSONHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive, so connection reuse is visible
+
+    def log_message(self, *args):
+        pass
+
+    def send_json(self, status: int, body: dict):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def read_json(self) -> dict:
+        return json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+
+
+class PerspectiveHandler(JSONHandler):
+    def do_POST(self):
+        request = self.read_json()
+        status = self.server.admit()
+        time.sleep(self.server.latency)
+        if status != 200:
+            self.send_json(status, {'error': {'code': status}})
+            return
+        score = expected_score(request['comment']['text'])
+        self.send_json(200, {'attributeScores': {
+            attr: {'summaryScore': {'value': score, 'type': 'PROBABILITY'}}
+            for attr in request['requestedAttributes']
+        }})
+
+
+def test_perspective(n_texts: int, limit: float, qps: float, workers: int) -> bool:
+    texts = [f"message {i} " + "x" * (i % 17) for i in range(n_texts)]
+    with MockServer(PerspectiveHandler, limit=limit, error_rate=0.05, latency=0.05) as server:
+        client = PerspectiveAPI(api_key='test', qps=qps, max_workers=workers,
+                                endpoint=f"{server.url}/v1alpha1/comments:analyze")
+        start = time.perf_counter()
+        results = client.batch_analyze(texts)
+        elapsed = time.perf_counter() - start
+        # delay= paces only that batch; the client's own limiter stays as configured
+        limiter = client.rate_limiter
+        client.batch_analyze(texts[:2], delay=0.01)
+        kept = client.rate_limiter is limiter
+
+    ordered = all(r == {'TOXICITY': expected_score(t)} for t, r in zip(texts, results))
+    print(f"  qps={qps:g} workers={workers}: {n_texts} texts in {elapsed:.1f}s "
+          f"({n_texts / elapsed:.1f}/s), 429s={server.counts['rate_limited']}, "
+          f"503s={server.counts['errors']}, all results in order: {ordered}, "
+          f"qps kept after a delay= batch: {kept}")
+    return ordered and kept
+
+
+class GroqHandler(JSONHandler):
+    def do_POST(self):
+        request = self.read_json()
+        status = self.server.admit()
+        time.sleep(self.server.latency)
+        if status != 200:
+            self.send_json(status, {'error': {'message': 'mock failure', 'type': 'mock', 'code': str(status)}})
+            return
+        text = request['messages'][-1]['content']
+        # Texts marked 'invalid' get a non-JSON reply, to exercise the error dicts
+        content = "not json" if 'invalid' in text else json.dumps({
+            'category': 'benign', 'confidence': expected_score(text), 'indicators': [], 'reasoning': 'mock'
+        })
+        self.send_json(200, {
+            'id': 'chatcmpl-mock', 'object': 'chat.completion', 'created': int(time.time()),
+            'model': request['model'],
+            'choices': [{'index': 0, 'finish_reason': 'stop',
+                         'message': {'role': 'assistant', 'content': content}}],
+            'usage': {'prompt_tokens': 100, 'completion_tokens': 20, 'total_tokens': 120},
+        })
+
+
+def test_groq(n_texts: int, limit: float, concurrency: int) -> bool:
+    from src.classifiers.api_classifiers import GroqClassifier
+
+    texts = [f"post {i}" + (" invalid" if i % 25 == 0 else "") for i in range(n_texts)]
+    with MockServer(GroqHandler, limit=limit, error_rate=0.05, latency=0.05) as server:
+        client = GroqClassifier(api_key='test', base_url=server.url,
+                                requests_per_minute=limit * 60 * 0.9)
+        start = time.perf_counter()
+        results = client.batch_classify(texts, show_progress=False, concurrency=concurrency)
+        elapsed = time.perf_counter() - start
+
+    def as_expected(text: str, result: dict) -> bool:
+        if 'invalid' in text:
+            return result['category'] == 'error' and 'error' in result
+        return result == {'category': 'benign', 'confidence': expected_score(f"Classify this text:\n\n{text}"),
+                          'indicators': [], 'reasoning': 'mock'}
+
+    ordered = all(as_expected(t, r) for t, r in zip(texts, results))
+    print(f"  concurrency={concurrency}: {n_texts} texts in {elapsed:.1f}s ({n_texts / elapsed:.1f}/s), "
+          f"429s={server.counts['rate_limited']}, 503s={server.counts['errors']}, "
+          f"results and error dicts in order: {ordered}")
+    return ordered
+
+
+def test_groq_cache(n_texts: int, limit: float) -> bool:
+    """A re-run with a warm cache must not call the API at all."""
+    from src.classifiers.api_classifiers import GroqClassifier
+
+    texts = [f"post {i}" for i in range(n_texts)]
+    with tempfile.TemporaryDirectory() as tmp, \
+            MockServer(GroqHandler, limit=limit, error_rate=0.0, latency=0.05) as server:
+        cache = LLMCache(os.path.join(tmp, 'llm_cache.sqlite'))
+        client = GroqClassifier(api_key='test', base_url=server.url, requests_per_minute=None, cache=cache)
+        first = client.batch_classify(texts, show_progress=False, concurrency=8)
+        calls = server.counts['ok']
+
+        start = time.perf_counter()
+        second = client.batch_classify(texts, show_progress=False, concurrency=8)
+        elapsed = time.perf_counter() - start
+        stats = cache.stats()
+        cache.close()
+
+    ok = first == second and server.counts['ok'] == calls == n_texts
+    print(f"  cache: re-run of {n_texts} texts in {elapsed:.2f}s, API calls {calls} -> "
+          f"{server.counts['ok'] - calls}, hit rate {stats['hit_rate']}, same results: {first == second}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Test API classifiers against mock servers')
+    parser.add_argument('--texts', type=int, default=200, help='Texts per run')
+    parser.add_argument('--limit', type=float, default=40, help='Mock server requests/sec limit')
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("API CLIENTS vs MOCK SERVERS")
+    print("=" * 60)
+
+    print(f"\nPerspective API (server limit {args.limit:g} req/s, 5% 503s, 50ms latency)")
+    ok = all([
+        # Within quota: paced by the token bucket, retries only for 503s
+        test_perspective(args.texts, args.limit, qps=args.limit * 0.9, workers=8),
+        # Over quota: the server pushes back with 429s, retries recover
+        test_perspective(args.texts, args.limit, qps=args.limit * 2, workers=16),
+    ])
+
+    print(f"\nGroq (server limit {args.limit:g} req/s, 5% 503s, 50ms latency)")
+    try:
+        import groq  # noqa: F401
+    except ImportError:
+        print("  skipped: groq not installed (pip install groq)")
+    else:
+        ok = all([ok] + [test_groq(args.texts, args.limit, concurrency) for concurrency in (1, 8)]
+                 + [test_groq_cache(args.texts, args.limit)])
+
+    print("\n" + "=" * 60)
+    print("ALL PASSED" if ok else "FAILED")
+    print("=" * 60)
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -5,9 +5,20 @@ Supports: OpenAI, Anthropic, Perspective API
 
 import os
 import json
+import hashlib
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import List, Dict, Optional, Any
 from dotenv import load_dotenv
 
+try:
+    from ..utils.llm_cache import LLMCache
+    from ..utils.rate_limit import TokenBucket, backoff_delay, parse_retry_after
+except ImportError:
+    # Imported with src/ itself on sys.path (e.g. test_groq.py)
+    from utils.llm_cache import LLMCache
+    from utils.rate_limit import TokenBucket, backoff_delay, parse_retry_after
+
 load_dotenv()
 
 
@@ -35,12 +46,45 @@ class PerspectiveAPI:
         'FLIRTATION',
     ]
     
-    def __init__(self, api_key: Optional[str] = None):
+    # Responses worth retrying: rate limited or a transient server error
+    RETRY_STATUSES = {429, 500, 502, 503, 504}
+    
+    def __init__(self, api_key: Optional[str] = None,
+                 qps: float = 1.0,
+                 max_workers: int = 4,
+                 max_retries: int = 5,
+                 timeout: float = 30.0,
+                 endpoint: Optional[str] = None):
+        """
+        Args:
+            api_key: Google API key (or set GOOGLE_API_KEY in .env)
+            qps: Requests per second allowed by your quota (free tier: 1)
+            max_workers: Requests in flight at once in batch_analyze
+            max_retries: Retries on 429/5xx and connection errors, with
+                exponential backoff
+            timeout: Seconds to wait for each response
+            endpoint: API URL override (e.g. a local mock server)
+        """
+        import requests
+        
         self.api_key = api_key or os.getenv('GOOGLE_API_KEY')
         if not self.api_key:
             raise ValueError("GOOGLE_API_KEY not found. Set it in .env or pass directly.")
         
-        self.endpoint = 'https://commentanalyzer.googleapis.com/v1alpha1/comments:analyze'
+        self.endpoint = endpoint or 'https://commentanalyzer.googleapis.com/v1alpha1/comments:analyze'
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.timeout = timeout
+        
+        # Shared by every thread, so the total rate stays within quota.
+        # No burst: requests are spaced 1/qps apart.
+        self.rate_limiter = TokenBucket(qps, capacity=1)
+        
+        # One pooled session: connections are kept alive and reused
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_maxsize=max_workers)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
     
     def analyze(self, text: str, 
                 attributes: Optional[List[str]] = None,
@@ -56,6 +100,11 @@ class PerspectiveAPI:
         Returns:
             Dict mapping attribute names to scores (0-1)
         """
+        return self._analyze(text, attributes, languages, self.rate_limiter)
+    
+    def _analyze(self, text: str, attributes: Optional[List[str]],
+                 languages: List[str], rate_limiter: TokenBucket) -> Dict[str, float]:
+        """analyze(), paced by the given rate limiter."""
         import requests
         
         if attributes is None:
@@ -70,10 +119,25 @@ class PerspectiveAPI:
             'requestedAttributes': requested_attributes
         }
         
-        response = requests.post(
-            f"{self.endpoint}?key={self.api_key}",
-            json=payload
-        )
+        for attempt in range(self.max_retries + 1):
+            rate_limiter.acquire()
+            try:
+                response = self.session.post(
+                    f"{self.endpoint}?key={self.api_key}",
+                    json=payload,
+                    timeout=self.timeout
+                )
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt == self.max_retries:
+                    raise
+                time.sleep(backoff_delay(attempt))
+                continue
+            
+            if response.status_code in self.RETRY_STATUSES and attempt < self.max_retries:
+                retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                time.sleep(backoff_delay(attempt, retry_after=retry_after))
+                continue
+            break
         
         if response.status_code != 200:
             raise Exception(f"Perspective API error: {response.text}")
@@ -90,30 +154,39 @@ class PerspectiveAPI:
     
     def batch_analyze(self, texts: List[str], 
                       attributes: Optional[List[str]] = None,
-                      delay: float = 1.0) -> List[Dict[str, float]]:
+                      delay: Optional[float] = None) -> List[Dict[str, float]]:
         """
-        Analyze multiple texts (with rate limiting).
+        Analyze multiple texts concurrently (with rate limiting).
+        
+        Up to max_workers requests are in flight over the pooled session,
+        while the shared token bucket keeps the overall rate at qps.
         
         Args:
             texts: List of texts to analyze
             attributes: Attributes to check
-            delay: Seconds between requests (default 1.0 for free tier)
+            delay: Seconds between requests; if given, this batch is paced
+                at 1/delay instead of qps (kept for older callers)
         
         Returns:
-            List of score dicts
+            List of score dicts, in input order ({} for texts that failed)
         """
-        import time
         from tqdm import tqdm
         
-        results = []
-        for text in tqdm(texts, desc="Analyzing with Perspective API"):
-            try:
-                scores = self.analyze(text, attributes)
-                results.append(scores)
-            except Exception as e:
-                print(f"Error: {e}")
-                results.append({})
-            time.sleep(delay)
+        # A delay only applies to this batch; later analyze() calls keep qps
+        rate_limiter = TokenBucket(1 / delay, capacity=1) if delay else self.rate_limiter
+        
+        results: List[Dict[str, float]] = [{} for _ in texts]
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = {
+                pool.submit(self._analyze, text, attributes, ['en'], rate_limiter): i
+                for i, text in enumerate(texts)
+            }
+            for future in tqdm(as_completed(futures), total=len(futures),
+                               desc="Analyzing with Perspective API"):
+                try:
+                    results[futures[future]] = future.result()
+                except Exception as e:
+                    print(f"Error: {e}")
         
         return results
 
@@ -123,13 +196,17 @@ class LLMClassifier:
     Use LLMs (OpenAI/Anthropic) for flexible text classification.
     """
     
-    def __init__(self, provider: str = 'openai', model: Optional[str] = None):
+    def __init__(self, provider: str = 'openai', model: Optional[str] = None,
+                 cache: Optional[LLMCache] = None):
         """
         Args:
             provider: 'openai' or 'anthropic'
             model: Model name (defaults to gpt-4o-mini or claude-3-haiku)
+            cache: Reuse results for texts already classified with the same
+                provider, model and prompt (optional)
         """
         self.provider = provider
+        self.cache = cache
         
         if provider == 'openai':
             from openai import OpenAI
@@ -173,7 +250,12 @@ Only respond with valid JSON."""
 
         prompt = system_prompt or default_prompt
         
-        if self.provider == 'openai':
+        # Reuse an earlier answer to the same request if there is one
+        cached = self.cache.get(self.provider, self.model, prompt, text) if self.cache else None
+        
+        if cached is not None:
+            result = cached
+        elif self.provider == 'openai':
             response = self.client.chat.completions.create(
                 model=self.model,
                 messages=[
@@ -207,6 +289,9 @@ Only respond with valid JSON."""
                 else:
                     result = {"category": "unknown", "confidence": 0, "error": "Could not parse response"}
         
+        if self.cache and cached is None and 'error' not in result:
+            self.cache.put(self.provider, self.model, prompt, text, result)
+        
         if not return_reasoning and 'reasoning' in result:
             del result['reasoning']
         
@@ -259,7 +344,15 @@ class GroqClassifier:
     - Supports Llama, Mixtral, Gemma models
     """
 
-    def __init__(self, model: str = 'llama-3.1-70b-versatile', api_key: Optional[str] = None):
+    # Rough completion size used to budget tokens per request
+    COMPLETION_TOKENS_ESTIMATE = 200
+
+    def __init__(self, model: str = 'llama-3.1-70b-versatile', api_key: Optional[str] = None,
+                 requests_per_minute: Optional[float] = None,
+                 tokens_per_minute: Optional[float] = None,
+                 max_retries: int = 5,
+                 base_url: Optional[str] = None,
+                 cache: Optional[LLMCache] = None):
         """
         Args:
             model: Groq model name
@@ -267,6 +360,16 @@ class GroqClassifier:
                 - llama-3.1-8b-instant (faster, good for simple tasks)
                 - mixtral-8x7b-32768 (good for nuanced tasks)
             api_key: Groq API key (or set GROQ_API_KEY in .env)
+            requests_per_minute: Request budget shared by all threads
+                (default None: no client-side limit; set it, e.g. 30 on
+                the free tier, before running a concurrent batch)
+            tokens_per_minute: Token budget shared by all threads, using an
+                estimate of ~4 characters per token (None for no limit)
+            max_retries: Retries on rate limits, timeouts and 5xx errors,
+                with exponential backoff and jitter
+            base_url: API URL override (e.g. a local fake endpoint)
+            cache: Reuse results for texts already classified with the same
+                model and prompt (optional)
         """
         try:
             from groq import Groq
@@ -277,8 +380,33 @@ class GroqClassifier:
         if not self.api_key:
             raise ValueError("GROQ_API_KEY not found. Set it in .env or pass directly.")
 
-        self.client = Groq(api_key=self.api_key)
+        # One client for all threads (it pools connections); retries are
+        # done here so they respect the budgets below
+        self.client = Groq(api_key=self.api_key, base_url=base_url, max_retries=0)
         self.model = model
+        self.cache = cache
+        self.max_retries = max_retries
+        self.request_limiter = TokenBucket(requests_per_minute / 60) if requests_per_minute else None
+        self.token_limiter = TokenBucket(tokens_per_minute / 60) if tokens_per_minute else None
+
+    def _create_completion(self, messages: List[Dict[str, str]], **kwargs):
+        """chat.completions.create within the rate budgets, retrying transient failures."""
+        import groq
+
+        estimated_tokens = sum(len(m['content']) for m in messages) // 4 + self.COMPLETION_TOKENS_ESTIMATE
+        for attempt in range(self.max_retries + 1):
+            if self.request_limiter:
+                self.request_limiter.acquire()
+            if self.token_limiter:
+                self.token_limiter.acquire(estimated_tokens)
+            try:
+                return self.client.chat.completions.create(model=self.model, messages=messages, **kwargs)
+            except (groq.RateLimitError, groq.APIConnectionError, groq.InternalServerError) as e:
+                if attempt == self.max_retries:
+                    raise
+                response = getattr(e, 'response', None)
+                retry_after = parse_retry_after(response.headers.get('retry-after')) if response is not None else None
+                time.sleep(backoff_delay(attempt, retry_after=retry_after))
 
     def classify(self, text: str,
                  categories: List[str],
@@ -311,8 +439,14 @@ Only respond with valid JSON."""
 
         prompt = system_prompt or default_prompt
 
-        response = self.client.chat.completions.create(
-            model=self.model,
+        # Reuse an earlier answer to the same request if there is one
+        result = self.cache.get('groq', self.model, prompt, text) if self.cache else None
+        if result is not None:
+            if not return_reasoning and 'reasoning' in result:
+                del result['reasoning']
+            return result
+
+        response = self._create_completion(
             messages=[
                 {"role": "system", "content": prompt},
                 {"role": "user", "content": f"Classify this text:\n\n{text}"}
@@ -322,6 +456,8 @@ Only respond with valid JSON."""
         )
 
         result = json.loads(response.choices[0].message.content)
+        if self.cache:
+            self.cache.put('groq', self.model, prompt, text, result)
 
         if not return_reasoning and 'reasoning' in result:
             del result['reasoning']
@@ -399,7 +535,8 @@ Only respond with valid JSON."""
 
     def batch_classify(self, texts: List[str],
                        classification_fn: str = 'competition',
-                       show_progress: bool = True) -> List[Dict[str, Any]]:
+                       show_progress: bool = True,
+                       concurrency: int = 1) -> List[Dict[str, Any]]:
         """
         Classify multiple texts.
 
@@ -407,38 +544,48 @@ Only respond with valid JSON."""
             texts: List of texts to classify
             classification_fn: 'competition' or 'custom'
             show_progress: Show progress bar
+            concurrency: Requests in flight at once (all threads share the
+                client and any per-minute budgets set in the constructor)
 
         Returns:
-            List of classification results
+            List of classification results, in input order
         """
-        if show_progress:
-            try:
-                from tqdm import tqdm
-                iterator = tqdm(texts, desc="Classifying with Groq")
-            except ImportError:
-                iterator = texts
-        else:
-            iterator = texts
-
-        results = []
-        for text in iterator:
+        def classify_one(text: str) -> Dict[str, Any]:
             try:
                 if classification_fn == 'competition':
-                    result = self.classify_competition(text, return_reasoning=True)
-                else:
-                    result = self.classify(text, [], return_reasoning=True)
-                results.append(result)
+                    return self.classify_competition(text, return_reasoning=True)
+                return self.classify(text, [], return_reasoning=True)
             except Exception as e:
                 print(f"Error classifying: {e}")
-                results.append({"category": "error", "confidence": 0, "error": str(e)})
+                return {"category": "error", "confidence": 0, "error": str(e)}
 
-        return results
+        with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+            # map() yields in input order, whatever order the calls finish in
+            results = pool.map(classify_one, texts)
+
+            if show_progress:
+                try:
+                    from tqdm import tqdm
+                    results = tqdm(results, total=len(texts), desc="Classifying with Groq")
+                except ImportError:
+                    pass
+
+            return list(results)
 
 
 class EmbeddingClassifier:
     """
     Use embeddings for similarity-based classification.
     Good for clustering similar messages together.
+    
+    find_similar works against an indexed corpus that is encoded once and
+    kept as normalized embeddings, so each lookup costs one query encode
+    plus one matrix product:
+    
+        clf = EmbeddingClassifier()
+        clf.index_corpus(posts)
+        clf.find_similar("I feel so alone")
+        clf.add_texts(new_posts)          # only the new posts are encoded
     """
     
     def __init__(self, model: str = 'all-MiniLM-L6-v2'):
@@ -448,36 +595,128 @@ class EmbeddingClassifier:
         """
         from sentence_transformers import SentenceTransformer
         self.model = SentenceTransformer(model)
+        self.model_name = model
+        
+        # Indexed corpus: texts and their L2-normalized embeddings (row i <-> corpus[i])
+        self.corpus: List[str] = []
+        self.corpus_embeddings = None
+        # Last corpus passed to find_similar(corpus=...), kept apart from the index
+        self._adhoc_corpus: Optional[List[str]] = None
+        self._adhoc_embeddings = None
     
     def embed(self, texts: List[str]) -> Any:
         """Get embeddings for texts."""
         return self.model.encode(texts, show_progress_bar=True)
     
-    def find_similar(self, query: str, corpus: List[str], top_k: int = 5) -> List[tuple]:
+    def _encode_normalized(self, texts: List[str]) -> Any:
+        """Unit-length float32 embeddings, so cosine similarity is a dot product."""
+        import numpy as np
+        
+        embeddings = self.model.encode(
+            texts, convert_to_numpy=True, normalize_embeddings=True,
+            show_progress_bar=len(texts) >= 1000
+        )
+        return np.ascontiguousarray(embeddings, dtype=np.float32)
+    
+    def index_corpus(self, corpus: List[str]):
+        """Encode a corpus once and keep it for find_similar (replaces any previous corpus)."""
+        self.corpus = list(corpus)
+        self.corpus_embeddings = self._encode_normalized(self.corpus)
+    
+    def add_texts(self, texts: List[str]):
+        """Add texts to the indexed corpus, encoding only the new ones."""
+        import numpy as np
+        
+        texts = list(texts)
+        if not texts:
+            return
+        if self.corpus_embeddings is None:
+            self.index_corpus(texts)
+            return
+        self.corpus.extend(texts)
+        self.corpus_embeddings = np.concatenate([self.corpus_embeddings, self._encode_normalized(texts)])
+    
+    def remove_texts(self, texts: List[str]):
+        """Remove every occurrence of the given texts from the indexed corpus."""
+        import numpy as np
+        
+        if self.corpus_embeddings is None:
+            return
+        to_remove = set(texts)
+        keep = np.array([t not in to_remove for t in self.corpus], dtype=bool)
+        self.corpus = [t for t, k in zip(self.corpus, keep) if k]
+        self.corpus_embeddings = np.ascontiguousarray(self.corpus_embeddings[keep])
+    
+    def find_similar(self, query: str, corpus: Optional[List[str]] = None, top_k: int = 5) -> List[tuple]:
         """
         Find most similar texts in corpus.
         
+        Args:
+            query: Text to look up
+            corpus: Texts to search instead of the indexed corpus; encoded
+                on first use and reused while the same list is passed. The
+                index from index_corpus()/add_texts() is left as it is.
+            top_k: Number of results
+        
         Returns:
             List of (text, similarity_score) tuples
         """
-        from sklearn.metrics.pairwise import cosine_similarity
+        return self.find_similar_batch([query], corpus=corpus, top_k=top_k)[0]
+    
+    def find_similar_batch(self, queries: List[str], corpus: Optional[List[str]] = None,
+                           top_k: int = 5) -> List[List[tuple]]:
+        """
+        find_similar for many queries: one encode for all of them and one
+        matrix product against the corpus.
+        
+        Returns:
+            One list of (text, similarity_score) tuples per query
+        """
         import numpy as np
         
-        query_embedding = self.model.encode([query])
-        corpus_embeddings = self.model.encode(corpus)
+        texts, embeddings = self._search_corpus(corpus)
+        if embeddings is None or not texts or top_k <= 0:
+            return [[] for _ in queries]
         
-        similarities = cosine_similarity(query_embedding, corpus_embeddings)[0]
-        top_indices = np.argsort(similarities)[-top_k:][::-1]
+        similarities = self._encode_normalized(list(queries)) @ embeddings.T
         
-        return [(corpus[i], similarities[i]) for i in top_indices]
+        k = min(top_k, len(texts))
+        results = []
+        for row in similarities:
+            # Partial selection of the k best, then sort just those
+            top = np.argpartition(row, -k)[-k:] if k < len(row) else np.arange(len(row))
+            top = top[np.argsort(row[top])[::-1]]
+            results.append([(texts[i], float(row[i])) for i in top])
+        
+        return results
+    
+    def _search_corpus(self, corpus: Optional[List[str]]) -> tuple:
+        """(texts, embeddings) to search: the indexed corpus, or an ad-hoc one."""
+        if corpus is None:
+            return self.corpus, self.corpus_embeddings
+        corpus = list(corpus)
+        if corpus != self._adhoc_corpus:
+            self._adhoc_corpus = corpus
+            self._adhoc_embeddings = self._encode_normalized(corpus) if corpus else None
+        return self._adhoc_corpus, self._adhoc_embeddings
     
-    def cluster(self, texts: List[str], n_clusters: int = 5) -> List[int]:
+    def cluster(self, texts: List[str], n_clusters: int = 5,
+                streaming: bool = False, **streaming_kwargs) -> List[int]:
         """
         Cluster texts into groups.
         
+        Args:
+            texts: Texts to cluster
+            n_clusters: Number of clusters
+            streaming: Use cluster_streaming (bounded memory, for large
+                datasets); extra keyword arguments are passed to it
+        
         Returns:
             List of cluster labels
         """
+        if streaming:
+            return self.cluster_streaming(texts, n_clusters=n_clusters, **streaming_kwargs)
+        
         from sklearn.cluster import KMeans
         
         embeddings = self.embed(texts)
@@ -485,3 +724,160 @@ class EmbeddingClassifier:
         labels = kmeans.fit_predict(embeddings)
         
         return labels.tolist()
+    
+    def cluster_streaming(self, texts: Optional[List[str]] = None, n_clusters: int = 5,
+                          chunk_size: int = 10_000,
+                          embeddings_path: Optional[str] = None) -> List[int]:
+        """
+        Cluster a large set of texts with memory bounded by chunk_size.
+        
+        Texts are embedded chunk by chunk and written to a .npy file, then
+        MiniBatch k-means is fitted on the chunks and a second pass over the
+        file assigns the labels. Only one chunk of embeddings is in memory
+        at a time.
+        
+        Args:
+            texts: Texts to cluster (not needed if embeddings_path exists)
+            n_clusters: Number of clusters
+            chunk_size: Texts embedded / rows clustered per step
+            embeddings_path: .npy file of embeddings. Reused if it exists
+                and, when texts are given, was written for these texts with
+                this model (checked against the .json sidecar written next to it);
+                otherwise written and kept for next time. If None, a
+                temporary file is used and deleted afterwards.
+        
+        Returns:
+            List of cluster labels
+        """
+        import tempfile
+        
+        if embeddings_path is not None and os.path.exists(embeddings_path):
+            if texts is None or self._embeddings_match(embeddings_path, texts):
+                return cluster_embeddings_streaming(embeddings_path, n_clusters, chunk_size).tolist()
+            print(f"{embeddings_path} was not written for these {len(texts)} texts "
+                  f"with {self.model_name}; re-embedding")
+        if texts is None:
+            raise ValueError("texts are required when embeddings_path does not exist yet")
+        
+        if embeddings_path is not None:
+            self._write_embeddings(texts, embeddings_path, chunk_size)
+            return cluster_embeddings_streaming(embeddings_path, n_clusters, chunk_size).tolist()
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'embeddings.npy')
+            self._write_embeddings(texts, path, chunk_size)
+            return cluster_embeddings_streaming(path, n_clusters, chunk_size).tolist()
+    
+    def _embeddings_match(self, path: str, texts: List[str]) -> bool:
+        """True if the .npy file at path was written for texts with this model."""
+        try:
+            with open(_embeddings_meta_path(path), 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return False  # no sidecar (older file) or unreadable: can't tell
+        return (meta.get('model') == self.model_name
+                and meta.get('texts') == texts_fingerprint(texts)
+                and embedding_file_rows(path) == len(texts))
+    
+    def _write_embeddings(self, texts: List[str], path: str, chunk_size: int):
+        """
+        Embed texts chunk by chunk straight into a .npy file, then record
+        the model and a fingerprint of the texts in its .json sidecar.
+        """
+        import numpy as np
+        
+        # The header is written with the first chunk, so there must be one
+        if len(texts) == 0:
+            raise ValueError("No texts to embed")
+        
+        # Drop the old sidecar first, so an interrupted write is never reused
+        meta_path = _embeddings_meta_path(path)
+        if os.path.exists(meta_path):
+            os.remove(meta_path)
+        
+        with open(path, 'wb') as f:
+            for start in range(0, len(texts), chunk_size):
+                chunk = self.model.encode(list(texts[start:start + chunk_size]), convert_to_numpy=True)
+                chunk = np.ascontiguousarray(chunk, dtype=np.float32)
+                if start == 0:
+                    np.lib.format.write_array_header_1_0(f, {
+                        'descr': np.lib.format.dtype_to_descr(chunk.dtype),
+                        'fortran_order': False,
+                        'shape': (len(texts), chunk.shape[1]),
+                    })
+                f.write(chunk.tobytes())
+        
+        with open(meta_path, 'w', encoding='utf-8') as f:
+            json.dump({'model': self.model_name, 'texts': texts_fingerprint(texts)}, f)
+
+
+def _embeddings_meta_path(path: str) -> str:
+    """Sidecar recording what a cluster_streaming .npy file was built from."""
+    return os.path.splitext(path)[0] + '.json'
+
+
+def texts_fingerprint(texts: List[str]) -> str:
+    """SHA-256 over the texts, in order (each length-prefixed, so splits differ)."""
+    digest = hashlib.sha256()
+    for text in texts:
+        data = text.encode('utf-8')
+        digest.update(len(data).to_bytes(8, 'little'))
+        digest.update(data)
+    return digest.hexdigest()
+
+
+def _read_npy_header(f) -> tuple:
+    """(shape, fortran_order, dtype) of an open .npy file, leaving f at the data."""
+    import numpy as np
+    
+    if np.lib.format.read_magic(f) == (1, 0):
+        return np.lib.format.read_array_header_1_0(f)
+    return np.lib.format.read_array_header_2_0(f)
+
+
+def embedding_file_rows(path: str) -> int:
+    """Number of rows in a .npy file of embeddings, from its header alone."""
+    with open(path, 'rb') as f:
+        return _read_npy_header(f)[0][0]
+
+
+def iter_embedding_chunks(path: str, chunk_size: int):
+    """
+    Yield consecutive row blocks of a 2-D .npy file.
+    
+    Reads with plain file reads rather than a memory map, so only the
+    current block is resident.
+    """
+    import numpy as np
+    
+    with open(path, 'rb') as f:
+        shape, fortran_order, dtype = _read_npy_header(f)
+        if fortran_order or len(shape) != 2:
+            raise ValueError(f"{path}: expected a C-ordered 2-D array, got shape {shape}")
+        n_rows, dim = shape
+        for start in range(0, n_rows, chunk_size):
+            rows = min(chunk_size, n_rows - start)
+            yield np.fromfile(f, dtype=dtype, count=rows * dim).reshape(rows, dim)
+
+
+def cluster_embeddings_streaming(path: str, n_clusters: int = 5, chunk_size: int = 10_000,
+                                 random_state: int = 42) -> Any:
+    """
+    MiniBatch k-means over a .npy file of embeddings, one chunk at a time.
+    
+    First pass: partial_fit on every chunk. Second pass: predict labels.
+    
+    Returns:
+        Array of cluster labels, one per row
+    """
+    import numpy as np
+    from sklearn.cluster import MiniBatchKMeans
+    
+    if chunk_size < n_clusters:
+        raise ValueError("chunk_size must be at least n_clusters")
+    
+    kmeans = MiniBatchKMeans(n_clusters=n_clusters, random_state=random_state, n_init=3)
+    for chunk in iter_embedding_chunks(path, chunk_size):
+        kmeans.partial_fit(chunk)
+    
+    return np.concatenate([kmeans.predict(chunk) for chunk in iter_embedding_chunks(path, chunk_size)])
@@ -1,2 +1,4 @@
 # Utility functions
-from .text_utils import clean_text, count_features, detect_patterns, extract_emojis
+from .text_utils import CleaningPipeline, clean_text, count_features, count_features_batch, detect_patterns, extract_emojis
+from .llm_cache import LLMCache
+from .rate_limit import TokenBucket
@@ -0,0 +1,119 @@
+"""
+Persistent cache for LLM classification results.
+
+Results are stored in SQLite, keyed by a hash of (provider, model, system
+prompt, text), so re-running a labelling job (after a crash, or after a
+change that leaves the prompt alone) reuses every answer already paid for.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+
+class LLMCache:
+    """
+    Disk-backed, thread-safe cache of classification results.
+
+    Every entry is committed as soon as it is written, so nothing is lost
+    if a job dies halfway. When max_entries is exceeded the least recently
+    used entries are evicted.
+
+    Usage:
+        cache = LLMCache('data/cache/llm_cache.sqlite')
+        classifier = GroqClassifier(cache=cache)
+        classifier.batch_classify(texts)   # second run: no API calls
+        print(cache.stats())
+    """
+
+    def __init__(self, path: str = 'data/cache/llm_cache.sqlite', max_entries: Optional[int] = 1_000_000):
+        """
+        Args:
+            path: SQLite file (created if missing)
+            max_entries: Most results kept (None for no limit)
+        """
+        self.path = path
+        self.max_entries = max_entries
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('PRAGMA synchronous=NORMAL')
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS results ('
+            ' key TEXT PRIMARY KEY, value TEXT NOT NULL, created REAL NOT NULL, last_used REAL NOT NULL)'
+        )
+        self._db.execute('CREATE INDEX IF NOT EXISTS results_last_used ON results (last_used)')
+        self._size = self._db.execute('SELECT COUNT(*) FROM results').fetchone()[0]
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(provider: str, model: str, system_prompt: str, text: str) -> str:
+        """Content hash identifying one classification request."""
+        payload = json.dumps([provider, model, system_prompt, text], ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, provider: str, model: str, system_prompt: str, text: str) -> Optional[Dict[str, Any]]:
+        """Cached result for this request, or None on a miss."""
+        key = self.make_key(provider, model, system_prompt, text)
+        with self._lock:
+            row = self._db.execute('SELECT value FROM results WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._db.execute('UPDATE results SET last_used = ? WHERE key = ?', (time.time(), key))
+            self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, provider: str, model: str, system_prompt: str, text: str, result: Dict[str, Any]):
+        """Store a result, evicting the least recently used entries if full."""
+        key = self.make_key(provider, model, system_prompt, text)
+        value = json.dumps(result, ensure_ascii=False)
+        now = time.time()
+        with self._lock:
+            existed = self._db.execute('SELECT 1 FROM results WHERE key = ?', (key,)).fetchone()
+            self._db.execute(
+                'INSERT OR REPLACE INTO results (key, value, created, last_used) VALUES (?, ?, ?, ?)',
+                (key, value, now, now)
+            )
+            if not existed:
+                self._size += 1
+            if self.max_entries is not None and self._size > self.max_entries:
+                excess = self._size - self.max_entries
+                self._db.execute(
+                    'DELETE FROM results WHERE key IN '
+                    '(SELECT key FROM results ORDER BY last_used LIMIT ?)', (excess,)
+                )
+                self._size -= excess
+                self.evictions += excess
+
+    def clear(self):
+        with self._lock:
+            self._db.execute('DELETE FROM results')
+            self._size = 0
+
+    def stats(self) -> dict:
+        """Counters for this session plus the size on disk."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'path': self.path,
+                'size': self._size,
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+                'evictions': self.evictions,
+            }
+
+    def close(self):
+        with self._lock:
+            self._db.close()
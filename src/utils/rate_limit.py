@@ -0,0 +1,91 @@
+"""
+Rate limiting and retry helpers for the API classifiers.
+"""
+
+import random
+import threading
+import time
+from typing import Optional
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket.
+
+    Tokens refill continuously at `rate` per second up to `capacity`;
+    acquire() blocks until enough tokens are available. One bucket can
+    be shared by all threads calling the same API.
+
+    Usage:
+        bucket = TokenBucket(rate=5)          # 5 requests/sec
+        bucket.acquire()                      # before each request
+
+        tpm = TokenBucket(rate=6000 / 60, capacity=6000)   # tokens/minute budget
+        tpm.acquire(estimated_tokens)
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        """
+        Args:
+            rate: Tokens added per second
+            capacity: Most tokens that can be saved up (burst size);
+                defaults to one second's worth, at least 1
+        """
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        """
+        Take tokens, waiting for them if needed.
+
+        A request larger than the capacity waits for a full bucket and then
+        overdraws it; later callers wait until the debt is paid off, so the
+        long-run rate still holds.
+
+        Returns:
+            Seconds spent waiting
+        """
+        needed = min(tokens, self.capacity)
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= needed:
+                    self._tokens -= tokens
+                    return waited
+                wait = (needed - self._tokens) / self.rate
+            time.sleep(wait)
+            waited += wait
+
+
+def backoff_delay(attempt: int,
+                  base: float = 0.5,
+                  maximum: float = 30.0,
+                  retry_after: Optional[float] = None) -> float:
+    """
+    Seconds to wait before retry number `attempt` (0-based).
+
+    Exponential backoff with full jitter: a random delay between 0 and
+    base * 2**attempt (capped at maximum), so clients that failed together
+    do not retry together. A server-provided Retry-After is honoured as a
+    lower bound.
+    """
+    delay = random.uniform(0, min(maximum, base * 2 ** attempt))
+    if retry_after is not None:
+        delay = max(delay, min(retry_after, maximum))
+    return delay
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Retry-After header in seconds (only the delta-seconds form), or None."""
+    try:
+        return max(0.0, float(value)) if value is not None else None
+    except ValueError:
+        return None